@@ -0,0 +1,365 @@
+"""API data headless (HTTP dan in-process) untuk agregat dashboard.
+
+Agregat yang sama dengan ``app.py`` (total dan YoY tab Ringkasan, tabel
+efisiensi komoditas tab Komoditas, riwayat klaster tab Klastering) dilayani
+tanpa sesi Streamlit. Data dibaca dari snapshot dan turunan di
+``.cache/snapshot`` yang sama dengan dashboard, lalu dimuat sekali per versi
+data dan dipakai bersama semua thread.
+
+Pemakaian in-process::
+
+    service = DataService()
+    service.year_summary(2024)
+    service.commodity_summary(2024, region='Garut')
+
+Server HTTP (``ThreadingHTTPServer``, satu thread per permintaan)::
+
+    python api.py --port 8600
+
+Endpoint (GET):
+
+- ``/v1/version``
+- ``/v1/years`` dan ``/v1/regions``
+- ``/v1/years/<tahun>/summary``
+- ``/v1/years/<tahun>/commodities[?region=<nama atau kode>]``
+- ``/v1/regions/<nama atau kode>/clusters[?k=<k>]``
+
+Respons JSON secara default; Arrow IPC stream dengan ``?format=arrow`` atau
+header ``Accept: application/vnd.apache.arrow.stream``. ETag diturunkan
+dari versi data, sehingga ``If-None-Match`` dijawab ``304`` selama CSV
+tidak berubah. Endpoint klaster juga memakai sidik jari model di ``models/``
+sehingga ETag-nya berubah setelah model difit ulang.
+"""
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from cluster_predictor import ClusterPredictor
+from clustering import DEFAULT_K, model_fingerprint
+from data_store import BASE_DIR, CACHE_DIR, SnapshotUnavailable, active_version, load_derived, load_version
+from fact_table import AggregateCube, build_cube, build_fact_table
+from regions import ID_COLUMN, RegionIndex
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow opsional
+    pa = None
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8600
+# Jeda minimum antar pemeriksaan versi data (detik); pemeriksaan = stat CSV
+VERSION_CHECK_INTERVAL = 1.0
+JSON_TYPE = 'application/json'
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+CLUSTER_COLUMNS = ['Tahun', ID_COLUMN, 'Kabupaten_Kota', 'Produksi_Total', 'LuasPanen_Total', 'Cluster']
+
+
+class NotFound(LookupError):
+    """Tahun atau wilayah yang diminta tidak ada di data."""
+
+
+class DataContext:
+    """Data satu versi: snapshot, kubus agregat, lookup wilayah, dan model klaster (hanya-baca)."""
+
+    def __init__(self, version, data, cube, model_dir):
+        self.version = version
+        # Diambil sebelum model dimuat: bila model berubah di tengah jalan, pemeriksaan berikutnya memuat ulang
+        self.model_fingerprint = model_fingerprint(model_dir)
+        self.data = data
+        self.cube = cube
+        self.regions = RegionIndex(data['regions'])
+        cluster_all = data.get('cluster_all')
+        self.cluster_history = cluster_all.set_index(ID_COLUMN).sort_index() if cluster_all is not None else None
+        self.cluster_predictor = ClusterPredictor.from_store(model_dir)
+
+    @property
+    def cluster_version(self):
+        """Versi respons klaster: versi data ditambah sidik jari model."""
+        return f"{self.version}.{self.model_fingerprint}"
+
+    @classmethod
+    def load(cls, version, base_dir=BASE_DIR, cache_dir=CACHE_DIR, model_dir=None):
+        data = load_version(version, base_dir, cache_dir)
+        fact = load_derived(version, 'fact', lambda: build_fact_table(data['dataset_final'], data['regions']), cache_dir)
+        cube = load_derived(version, 'cube', lambda: build_cube(fact), cache_dir)
+        return cls(version, data, AggregateCube(cube), model_dir or Path(base_dir) / 'models')
+
+
+class DataService:
+    """Agregat dashboard per versi data, aman dipanggil dari banyak thread.
+
+    Versi diperiksa paling sering sekali per ``check_interval`` detik; bila CSV
+    atau model klaster berubah, konteks baru dimuat satu kali (thread lain
+    menunggu di lock yang sama) dan permintaan yang sedang berjalan tetap
+    memakai konteks lamanya.
+    """
+
+    def __init__(self, base_dir=BASE_DIR, cache_dir=CACHE_DIR, model_dir=None, check_interval=VERSION_CHECK_INTERVAL):
+        self.base_dir = Path(base_dir)
+        self.cache_dir = Path(cache_dir)
+        self.model_dir = Path(model_dir) if model_dir else self.base_dir / 'models'
+        self.check_interval = check_interval
+        self._context = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def context(self):
+        """Konteks data versi terkini."""
+        context = self._context
+        if context is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return context
+        with self._lock:
+            if self._context is None or time.monotonic() - self._checked_at >= self.check_interval:
+                version = active_version(self.base_dir, self.cache_dir)
+                if self._context is None or self._stale(self._context, version):
+                    try:
+                        self._context = DataContext.load(version, self.base_dir, self.cache_dir, self.model_dir)
+                    except SnapshotUnavailable:
+                        # Snapshot terbitan dipangkas/diganti sebelum dimuat: baca ulang versi aktif
+                        version = active_version(self.base_dir, self.cache_dir)
+                        if self._context is None or self._context.version != version:
+                            self._context = DataContext.load(version, self.base_dir, self.cache_dir, self.model_dir)
+                self._checked_at = time.monotonic()
+            return self._context
+
+    def _stale(self, context, version):
+        return context.version != version or context.model_fingerprint != model_fingerprint(self.model_dir)
+
+    @property
+    def version(self):
+        return self.context().version
+
+    def years(self, context=None):
+        return (context or self.context()).cube.years
+
+    def regions(self, context=None):
+        """Kode dan nama kabupaten/kota (tanpa total provinsi)."""
+        index = (context or self.context()).regions
+        return pd.DataFrame({
+            ID_COLUMN: index.region_codes,
+            'Kabupaten_Kota': [index.name(code) for code in index.region_codes],
+        })
+
+    def _year(self, context, year):
+        year = int(year)
+        if year not in context.cube.years:
+            raise NotFound(f"Tahun {year} tidak ada di data")
+        return year
+
+    def region_code(self, region, context=None):
+        """Kode wilayah dari kode (angka) atau nama kabupaten/kota."""
+        context = context or self.context()
+        text = str(region).strip()
+        code = int(text) if text.isdigit() else context.regions.lookup(text)
+        if code is None or code not in context.regions.region_codes:
+            raise NotFound(f"Wilayah {region!r} tidak dikenal")
+        return code
+
+    def year_summary(self, year, context=None):
+        """Total produksi, luas panen, rata-rata efisiensi, dan YoY produksi (tab Ringkasan)."""
+        context = context or self.context()
+        year = self._year(context, year)
+        return {'Tahun': year, **{key: float(value) for key, value in context.cube.year_summary(year).items()}}
+
+    def commodity_summary(self, year, region=None, context=None):
+        """Tabel efisiensi per komoditas (``df_compare`` tab Komoditas), opsional satu wilayah."""
+        context = context or self.context()
+        year = self._year(context, year)
+        region_code = None if region is None else self.region_code(region, context)
+        return context.cube.commodity_summary(year, region_code)
+
+    def cluster_history(self, region, k=DEFAULT_K, context=None):
+        """Riwayat klaster tahunan satu wilayah (tab Klastering), opsional untuk k lain."""
+        context = context or self.context()
+        code = self.region_code(region, context)
+        history = context.cluster_history
+        if history is None or code not in history.index:
+            raise NotFound(f"Data klaster untuk wilayah {region!r} tidak ada")
+        df_history = history.loc[[code]].reset_index().sort_values(by='Tahun', ignore_index=True)
+        if k != DEFAULT_K:
+            predictor = context.cluster_predictor
+            if k not in predictor.k_values() or not predictor.covers(df_history['Tahun'].unique()):
+                raise ValueError(f"Model klaster untuk k={k} tidak tersedia")
+            df_history = predictor.assign_frame(df_history, k)
+        return df_history[CLUSTER_COLUMNS]
+
+
+# --- Serialisasi ---
+
+def _json_value(value):
+    if isinstance(value, (np.integer, np.bool_)):
+        return value.item()
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) or math.isinf(value) else float(value)
+    return value
+
+
+def frame_records(df):
+    """Baris DataFrame sebagai list dict bertipe JSON (NaN menjadi null)."""
+    columns = list(df.columns)
+    arrays = [df[col].astype(object).to_numpy() if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].to_numpy()
+              for col in columns]
+    return [{col: _json_value(value) for col, value in zip(columns, row)} for row in zip(*arrays)]
+
+
+def to_json(payload, version):
+    if isinstance(payload, pd.DataFrame):
+        payload = frame_records(payload)
+    elif isinstance(payload, dict):
+        payload = {key: _json_value(value) for key, value in payload.items()}
+    return json.dumps({'version': version, 'data': payload}, ensure_ascii=False).encode('utf-8')
+
+
+def to_arrow(payload, version):
+    """Arrow IPC stream; versi data disimpan di metadata skema."""
+    if isinstance(payload, dict):
+        payload = pd.DataFrame([payload])
+    elif not isinstance(payload, pd.DataFrame):
+        payload = pd.DataFrame({'value': payload})
+    table = pa.Table.from_pandas(payload, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'data_version': version.encode()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# --- HTTP ---
+
+def route(service, path, query):
+    """Menjalankan satu endpoint; mengembalikan ``(context, tag, payload)``.
+
+    ``tag`` adalah versi yang menentukan isi respons (dasar ETag).
+    """
+    parts = [unquote(part) for part in path.strip('/').split('/') if part]
+    if not parts or parts[0] != 'v1':
+        raise NotFound(f"Endpoint {path} tidak dikenal")
+    parts = parts[1:]
+    context = service.context()
+    if parts == ['version']:
+        return context, context.version, {'version': context.version}
+    if parts == ['years']:
+        return context, context.version, pd.DataFrame({'Tahun': service.years(context)})
+    if parts == ['regions']:
+        return context, context.version, service.regions(context)
+    if len(parts) == 3 and parts[0] == 'years':
+        year = _int_param(parts[1], 'tahun')
+        if parts[2] == 'summary':
+            return context, context.version, service.year_summary(year, context)
+        if parts[2] == 'commodities':
+            return context, context.version, service.commodity_summary(year, query.get('region'), context)
+    if len(parts) == 3 and parts[0] == 'regions' and parts[2] == 'clusters':
+        k = _int_param(query.get('k', DEFAULT_K), 'k')
+        return context, context.cluster_version, service.cluster_history(parts[1], k, context)
+    raise NotFound(f"Endpoint {path} tidak dikenal")
+
+
+def _int_param(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Parameter {name} harus bilangan bulat, bukan {value!r}") from None
+
+
+def _wants_arrow(query, accept):
+    fmt = query.get('format')
+    if fmt is not None:
+        if fmt not in ('json', 'arrow'):
+            raise ValueError(f"Format {fmt!r} tidak didukung (json, arrow)")
+        return fmt == 'arrow'
+    return ARROW_TYPE in (accept or '')
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """Handler GET; ``self.server.service`` adalah ``DataService`` bersama."""
+
+    server_version = 'BiofarmakaAPI/1'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            arrow = _wants_arrow(query, self.headers.get('Accept'))
+            if arrow and pa is None:
+                return self._error(HTTPStatus.NOT_ACCEPTABLE, "pyarrow tidak terpasang")
+            context, tag, payload = route(self.server.service, url.path, query)
+        except NotFound as e:
+            return self._error(HTTPStatus.NOT_FOUND, str(e))
+        except ValueError as e:
+            return self._error(HTTPStatus.BAD_REQUEST, str(e))
+
+        # Representasi JSON dan Arrow berbeda, jadi formatnya ikut di ETag
+        etag = f'"{tag}-{"arrow" if arrow else "json"}"'
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = to_arrow(payload, context.version) if arrow else to_json(payload, context.version)
+        self._send(HTTPStatus.OK, body, ARROW_TYPE if arrow else JSON_TYPE, etag)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'), JSON_TYPE)
+
+    def _send(self, status, body, content_type, etag=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(service=None, host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    """``ThreadingHTTPServer`` untuk ``service``; ``port=0`` memilih port bebas."""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.service = service or DataService()
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API data headless dashboard biofarmaka.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--data-dir', default=str(BASE_DIR), help='folder berisi file CSV')
+    parser.add_argument('--cache-dir', default=None, help='folder snapshot (default: <data-dir>/.cache/snapshot)')
+    parser.add_argument('--verbose', action='store_true', help='log setiap permintaan')
+    args = parser.parse_args(argv)
+
+    data_dir = Path(args.data_dir)
+    cache_dir = Path(args.cache_dir) if args.cache_dir else data_dir / '.cache' / 'snapshot'
+    service = DataService(data_dir, cache_dir)
+    service.context()  # muat data sebelum menerima permintaan
+    server = make_server(service, args.host, args.port, args.verbose)
+    print(f"API data versi {service.version} di http://{args.host}:{server.server_port}/v1/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,24 @@
+import uuid
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import numpy as np
+
+import perf
+from cluster_predictor import ClusterPredictor, kmeans_numpy, standardize
+from cluster_stability import STABLE_THRESHOLD, ClusterStability
+from clustering import DEFAULT_K, K_VALUES, fit_all, load_yearly_datasets, save_models
+from data_model import isin_mask
+from data_store import KEEP_SNAPSHOTS, SnapshotUnavailable, active_version, load_derived, load_version
+from fact_table import AggregateCube, build_cube, build_fact_table, drop_junk_rows
+from forecast import CONFIDENCE, Forecast, fit_forecasts
+from figures import (
+    FigureCache, choropleth_figure, cluster_box_figure, cluster_history_figure, cluster_scatter_figure,
+    efficiency_figure, figure_key, trend_figure,
+)
+from geo import DEFAULT_LEVEL, DETAIL_LEVELS, RegionGeometry, geojson_mtime, geojson_path
+from prefetch import Prefetcher, enabled_by_default as prefetch_enabled, neighbours
+from rankings import RankingIndex
+from raw_explorer import FILTER_COLUMNS, PAGE_SIZES, page_count, selected_rows, sort_order, spool_export
+from regions import ID_COLUMN, RegionIndex
 
 # --- 1. Konfigurasi Halaman & Fungsi Mode Gelap/Terang ---
 st.set_page_config(
@@ -163,128 +180,250 @@ def mode_switcher():
 # Panggil switcher mode sebelum konten utama
 mode_switcher()
 
-# --- Fungsi pembersihan dan pemuatan data ---
-def clean_column_name(col_name):
-    col_name = str(col_name).strip()
-    col_name = col_name.replace(' ', '_').replace('/', '_').replace('(', '').replace(')', '')
-    col_name = col_name.replace('_kilogram', '').replace('_Kg', '').replace('_meter_persegi', '').replace('_M2', '').replace('_pohon', '').replace('_Pohon', '').replace('__', '_')
-    return col_name
-
-@st.cache_data
-def load_data():
-    """Memuat semua data CSV dan menggabungkannya."""
-    # Mapping file yang tersedia
-    data_files = {
-        'cluster_2022': 'cluster_2022.csv',
-        'cluster_2023': 'cluster_2023.csv',
-        'cluster_2024': 'cluster_2024.csv',
-        'dataset_final': 'dataset_final.csv'
-    }
-    data = {}
-    
-    # Load dataset_final
+# --- Instrumentasi performa per sesi ---
+# Dimatikan secara default (aktifkan lewat sidebar atau BIOFARMAKA_PERF=1);
+# saat mati, setiap tahap hanya berupa konteks kosong.
+if 'perf' not in st.session_state:
+    st.session_state['perf'] = perf.PerfRecorder(
+        enabled=perf.enabled_by_default(), parent=perf.PROCESS, session=uuid.uuid4().hex[:8]
+    )
+perf_recorder = st.session_state['perf']
+# Dengan ekspor Prometheus aktif, semua sesi tetap dicatat walau panelnya tertutup
+perf_recorder.enabled = st.session_state.get('perf_enabled', perf_recorder.enabled) or perf.prometheus_path() is not None
+# Agregat seluruh sesi ditulis thread latar untuk textfile collector Prometheus
+perf.start_prometheus_export()
+
+def render_perf_panel(recorder):
+    """Ringkasan durasi tahap, cache, dan ukuran DataFrame sesi ini di sidebar."""
+    snap = recorder.snapshot()
+    with st.expander("Performa Sesi", expanded=True):
+        st.caption("Durasi per tahap (ms). Tab diperbarui setiap kali fragment-nya dijalankan.")
+        st.dataframe([
+            {
+                'Tahap': name, 'N': stat['count'],
+                'Terakhir': stat['last'] * 1000, 'Rata-rata': stat['total'] / stat['count'] * 1000, 'Maks': stat['max'] * 1000,
+            }
+            for name, stat in snap['durations'].items()
+        ], hide_index=True, use_container_width=True,
+            column_config={col: st.column_config.NumberColumn(format="%.1f") for col in ['Terakhir', 'Rata-rata', 'Maks']})
+        if snap['cache']:
+            st.dataframe([
+                {'Cache': name, 'Hit': counts['hit'], 'Miss': counts['miss']} for name, counts in snap['cache'].items()
+            ], hide_index=True, use_container_width=True)
+        if snap['frames']:
+            st.dataframe([
+                {'DataFrame': name, 'Baris': size['rows'], 'Kolom': size['columns'], 'MB': size['bytes'] / 2**20}
+                for name, size in snap['frames'].items()
+            ], hide_index=True, use_container_width=True,
+                column_config={'MB': st.column_config.NumberColumn(format="%.2f")})
+        st.download_button(
+            "Unduh Metrik (Prometheus)", data=recorder.prometheus_text(), file_name="biofarmaka_perf.prom",
+            mime="text/plain", on_click="ignore", use_container_width=True
+        )
+        if st.button("Reset Metrik Sesi", use_container_width=True):
+            recorder.reset()
+
+# --- Fungsi pemuatan data ---
+# Loader berkunci versi data menyimpan paling banyak KEEP_SNAPSHOTS versi, sama
+# dengan snapshot yang dipertahankan di disk; versi lama dilepas dari memori.
+@perf.timed(cache=True)
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS)
+def load_data(data_version):
+    """Memuat semua data versi ``data_version`` dari snapshot kolumnar yang di-mmap.
+
+    cache_resource (bukan cache_data) agar frame dipakai bersama tanpa
+    di-pickle dan disalin di setiap pemanggilan; frame diperlakukan
+    hanya-baca.
+    """
+    perf.mark_miss()
     try:
-        # Menggunakan file dataset_final.csv yang tersedia
-        df_final = pd.read_csv(data_files['dataset_final'])
-        df_final.columns = [clean_column_name(col) for col in df_final.columns]
-        data['dataset_final'] = df_final
+        data = load_version(data_version)
+    except SnapshotUnavailable:
+        # Tidak di-cache: pemanggil membaca ulang versi aktif
+        raise
     except Exception:
         # Jika dataset_final gagal, aplikasi tidak bisa dilanjutkan
         return None
-        
-    # Load and combine cluster data
-    cluster_dfs = []
-    for year in ['2022', '2023', '2024']:
-        file = data_files.get(f'cluster_{year}')
-        if file:
-            try:
-                df_cluster_temp = pd.read_csv(file)
-                df_cluster_temp.columns = [clean_column_name(col) for col in df_cluster_temp.columns]
-                
-                # Menemukan kolom klaster yang benar (Cluster_YYYY)
-                cluster_col_name = [col for col in df_cluster_temp.columns if 'Cluster' in col and df_cluster_temp.columns.get_loc(col) == df_cluster_temp.shape[1]-1][0]
-                df_cluster_temp = df_cluster_temp.rename(columns={cluster_col_name: 'Cluster'})
-                
-                for col in ['Produksi_Total', 'LuasPanen_Total', 'Cluster']:
-                    if col in df_cluster_temp.columns:
-                        df_cluster_temp[col] = pd.to_numeric(df_cluster_temp[col], errors='coerce').fillna(0).astype(int)
-                        
-                cluster_dfs.append(df_cluster_temp)
-            except Exception:
-                pass 
-
-    if cluster_dfs:
-        data['cluster_all'] = pd.concat(cluster_dfs, ignore_index=True)
-    
     return data
 
-def preprocess_biofarmaka_data(df_final):
-    """Melakukan pivoting dan pembersihan untuk data komoditas, termasuk menghitung efisiensi."""
-    prod_cols = [col for col in df_final.columns if 'Produksi_' in col]
-    luas_cols = [col for col in df_final.columns if 'Luas_Panen_' in col]
-    
-    komoditas_prod_map = {col: col.replace('Produksi_', '') for col in prod_cols}
-    komoditas_luas_map = {col: col.replace('Luas_Panen_', '') for col in luas_cols}
-    
-    common_komoditas = list(set(komoditas_prod_map.values()) & set(komoditas_luas_map.values()))
-    
-    final_prod_cols = [k for k, v in komoditas_prod_map.items() if v in common_komoditas]
-    final_luas_cols = [k for k, v in komoditas_luas_map.items() if v in common_komoditas]
-    
-    df_prod = df_final[['Kabupaten_Kota', 'Tahun'] + final_prod_cols].copy()
-    df_prod = df_prod.rename(columns={k: komoditas_prod_map[k] for k in final_prod_cols})
-    df_prod_melt = df_prod.melt(id_vars=['Kabupaten_Kota', 'Tahun'], value_vars=common_komoditas, var_name='Komoditas', value_name='Produksi_Kg')
-
-    df_luas = df_final[['Kabupaten_Kota', 'Tahun'] + final_luas_cols].copy()
-    df_luas = df_luas.rename(columns={k: komoditas_luas_map[k] for k in final_luas_cols})
-    df_luas_melt = df_luas.melt(id_vars=['Kabupaten_Kota', 'Tahun'], value_vars=common_komoditas, var_name='Komoditas', value_name='Luas_Panen')
-    
-    df_merged = pd.merge(df_prod_melt, df_luas_melt, on=['Kabupaten_Kota', 'Tahun', 'Komoditas'])
-    
-    df_merged['Produksi_Kg'] = pd.to_numeric(df_merged['Produksi_Kg'], errors='coerce').fillna(0)
-    df_merged['Luas_Panen'] = pd.to_numeric(df_merged['Luas_Panen'], errors='coerce').fillna(0)
-    
-    # HITUNG METRIK BARU: Efisiensi Produksi (Kg/M2)
-    df_merged['Efisiensi_Kg_per_M2'] = np.where(
-        df_merged['Luas_Panen'] > 0,
-        df_merged['Produksi_Kg'] / df_merged['Luas_Panen'],
-        0 
-    )
-    
-    return df_merged
+@perf.timed(cache=True)
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS)
+def load_fact_cube(data_version):
+    """Tabel fakta long dan kubus agregat, dibangun sekali per versi data."""
+    perf.mark_miss()
+    data = load_data(data_version)
+    with perf.stage('preprocess_biofarmaka_data'):
+        fact = load_derived(data_version, 'fact', lambda: build_fact_table(data['dataset_final'], data['regions']))
+    with perf.stage('build_cube'):
+        cube = load_derived(data_version, 'cube', lambda: build_cube(fact))
+    return fact, AggregateCube(cube)
+
+@perf.timed(cache=True)
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS)
+def load_cluster_predictor(data_version):
+    """Centroid K-Means tersimpan (models/), difit sekali bila belum mencakup semua tahun."""
+    perf.mark_miss()
+    predictor = ClusterPredictor.from_store()
+    cluster_all = load_data(data_version).get('cluster_all')
+    years = cluster_all['Tahun'].unique() if cluster_all is not None else []
+    if not predictor.covers(years):
+        models = fit_all(load_yearly_datasets())
+        try:
+            save_models(models)
+        except OSError:
+            pass
+        predictor = ClusterPredictor(models)
+    return predictor
+
+@perf.timed(cache=True)
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS)
+def load_forecast(data_version):
+    """Proyeksi tren semua seri (wilayah, komoditas), difit sekali per versi data."""
+    perf.mark_miss()
+    _, cube = load_fact_cube(data_version)
+    return Forecast(load_derived(data_version, 'forecast', lambda: fit_forecasts(cube.cube)))
+
+@perf.timed(cache=True)
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS)
+def load_rankings(data_version):
+    """Indeks peringkat komoditas per (wilayah, tahun), dibangun sekali per versi data."""
+    perf.mark_miss()
+    _, cube = load_fact_cube(data_version)
+    return RankingIndex(cube.cube)
+
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS)
+def load_region_index(data_version):
+    """Lookup nama <-> kode wilayah dari tabel wilayah snapshot."""
+    return RegionIndex(load_data(data_version)['regions'])
+
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS)
+def load_cluster_history(data_version):
+    """Data klaster gabungan berindeks kode wilayah untuk riwayat per wilayah."""
+    return load_data(data_version)['cluster_all'].set_index(ID_COLUMN).sort_index()
+
+@perf.timed(cache=True)
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS * len(K_VALUES))
+def load_cluster_stability(data_version, k):
+    """Stabilitas klaster semua tahun untuk k (resampling bootstrap dan seed), sekali per versi data."""
+    perf.mark_miss()
+    return ClusterStability(load_data(data_version)['cluster_all'], k, load_cluster_predictor(data_version))
+
+@perf.timed(cache=True)
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS)
+def load_region_geometry(data_version, source_mtime):
+    """Batas kabupaten/kota per tingkat detail dari GeoJSON lokal, atau None bila belum ada.
+
+    ``source_mtime`` (``geojson_mtime()``) hanya kunci cache: file yang baru
+    disimpan atau diganti terbaca pada rerun berikutnya tanpa restart.
+    """
+    perf.mark_miss()
+    return RegionGeometry.load(load_data(data_version)['regions'])
+
+@perf.timed(cache=True)
+@st.cache_data(max_entries=64)
+def cluster_by_komoditas(data_version, year, k, region_codes):
+    """Klaster wilayah berdasarkan produksi per komoditas (K-Means NumPy, tanpa model tersimpan).
+
+    Memakai baris dataset_final per kode wilayah, sehingga wilayah klastering
+    yang bukan kabupaten/kota (total provinsi) tetap punya fitur.
+    """
+    perf.mark_miss()
+    df_final = load_data(data_version)['dataset_final']
+    produksi_cols = [col for col in df_final.columns if col.startswith('Produksi_')]
+    df_year = df_final[(df_final['Tahun'] == year) & (df_final[ID_COLUMN] >= 0)]
+    pivot = df_year.set_index(ID_COLUMN)[produksi_cols].reindex(list(region_codes)).fillna(0)
+    labels, _ = kmeans_numpy(standardize(pivot.to_numpy(dtype=float)), k, order_by=pivot.sum(axis=1).to_numpy())
+    return labels
+
+@perf.timed(cache=True)
+@st.cache_resource(max_entries=KEEP_SNAPSHOTS)
+def load_explorer_frames(data_version):
+    """Tabel yang dapat dijelajahi di tab Raw Data, berbagi objek dengan cache lain."""
+    perf.mark_miss()
+    data = load_data(data_version)
+    fact, _ = load_fact_cube(data_version)
+    frames = {
+        "Data Biofarmaka (Format Long, termasuk Efisiensi)": fact,
+        "Data Final Produksi dan Luas Panen": drop_junk_rows(data['dataset_final']),
+    }
+    if data.get('cluster_all') is not None:
+        frames["Data Klastering Gabungan"] = data['cluster_all']
+    return frames
+
+@perf.timed(cache=True)
+@st.cache_data(max_entries=32)
+def explorer_sort_order(data_version, table, sort_by, ascending):
+    """Urutan baris per (tabel, kolom, arah); tidak dihitung ulang saat ganti halaman/filter."""
+    perf.mark_miss()
+    return sort_order(load_explorer_frames(data_version)[table], sort_by, ascending)
+
+@st.cache_resource
+def get_figure_cache():
+    """Cache figur bersama untuk semua sesi dalam satu proses."""
+    return FigureCache()
+
+@st.cache_resource
+def get_prefetcher():
+    """Thread pool prefetch bersama untuk semua sesi dalam satu proses."""
+    return Prefetcher()
+
+FITUR_TOTAL = "Total Produksi & Luas Panen"
+FITUR_KOMODITAS = "Produksi per Komoditas"
+RANKING_METRICS = {"Produksi": 'produksi', "Efisiensi": 'efisiensi'}
+# Pilihan peta wilayah: label -> (kolom nilai, label legenda)
+MAP_METRICS = {
+    "Klaster": ('Cluster', "Kategori Klaster"),
+    "Produksi": ('Total_Produksi_Kg', "Produksi Total (Kg)"),
+    "Efisiensi": ('Rata_rata_Efisiensi', "Rata-rata Efisiensi (Kg/M2)"),
+}
 
 # --- Muat Data ---
-data_dict = load_data()
+with perf_recorder.stage('load'):
+    # Versi terbitan loader.py bila ada (sama untuk semua worker), selain itu versi CSV
+    with perf.stage('current_data_version'):
+        data_version = active_version()
+    try:
+        data_dict = load_data(data_version)
+    except SnapshotUnavailable:
+        # Snapshot terbitan dipangkas/diganti di antara pembacaan CURRENT dan pemuatan
+        data_version = active_version()
+        data_dict = load_data(data_version)
 
 if data_dict is not None and 'dataset_final' in data_dict:
     df_final = data_dict['dataset_final']
     df_cluster = data_dict.get('cluster_all')
-    
-    # ==========================================================
-    # BAGIAN BARU: Filter Data "Sampah" (Angka sementara, dll)
-    # ==========================================================
-    junk_values = ['0', 'Angka sementara', 'Angka tetap', 'Catatan']
-    df_final = df_final[~df_final['Kabupaten_Kota'].isin(junk_values)]
-    # ==========================================================
+    region_index = load_region_index(data_version)
 
     try:
-        df_biofarmaka = preprocess_biofarmaka_data(df_final)
+        with perf_recorder.stage('pra_proses'):
+            df_biofarmaka, cube = load_fact_cube(data_version)
     except Exception as e:
         st.error(f"Error saat pra-pemrosesan data: {e}")
         st.stop()
+
+    if perf_recorder.enabled:
+        perf_recorder.record_frame('dataset_final', df_final)
+        perf_recorder.record_frame('fact', df_biofarmaka)
+        perf_recorder.record_frame('cube', cube.cube)
+        if df_cluster is not None:
+            perf_recorder.record_frame('cluster_all', df_cluster)
         
+    # Rentang tahun mengikuti data yang ada (tahun baru dari ingest.py ikut terbaca)
+    available_years = cube.years
+    year_range = f"{available_years[0]}-{available_years[-1]}"
+
     # --- Judul Aplikasi ---
     st.title("🌿 Dashboard Analisis Biofarmaka Jawa Barat 🌾")
-    st.caption("Analisis Komprehensif Produksi, Luas Panen, Efisiensi, dan Klastering Wilayah (2022-2024)")
+    st.caption(f"Analisis Komprehensif Produksi, Luas Panen, Efisiensi, dan Klastering Wilayah ({year_range})")
 
     # --- Sidebar untuk Filter Global ---
     with st.sidebar:
         st.header("⚙️ Pengaturan Data")
         
-        available_years = sorted(df_final['Tahun'].unique())
         selected_year = st.selectbox("Pilih Tahun Analisis:", available_years)
 
-        available_kabkota = sorted(df_final['Kabupaten_Kota'].unique())
+        # Hanya kabupaten/kota (tanpa baris sampah dan total provinsi), sesuai regions.csv
+        available_kabkota = list(df_biofarmaka['Kabupaten_Kota'].cat.categories)
         
         # Logika agar tidak error jika data kosong setelah difilter
         if available_kabkota:
@@ -311,34 +450,124 @@ if data_dict is not None and 'dataset_final' in data_dict:
             st.warning("Data Kabupaten/Kota kosong.")
             selected_kabkota_cluster = None
 
-    # --- Tab Aplikasi ---
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📊 Ringkasan & Tren Waktu", 
-        "🗺️ Klastering & Peringkat Wilayah", 
-        "📈 Perbandingan & Efisiensi Komoditas", 
-        "Raw Data"])
+    # Widget di dalam tab tidak dirender saat tabnya tertutup; nilai disimpan
+    # ulang ke session state supaya pilihan pengguna tidak di-reset Streamlit.
+    for widget_key, widget_default in {
+        'cluster_k': DEFAULT_K,
+        'cluster_fitur': FITUR_TOTAL,
+        'cluster_subset': [],
+        'trend_forecast': True,
+        'whatif_produksi': 0,
+        'whatif_luas': 0,
+        'map_metric': "Klaster",
+        'map_detail': DEFAULT_LEVEL,
+        'ranking_kabkota': 'Semua Wilayah',
+        'ranking_metric': "Produksi",
+        'ranking_komoditas': available_komoditas[0] if available_komoditas else None,
+        'raw_table': None,
+        'raw_sort_by': "(urutan asli)",
+        'raw_sort_dir': "Naik",
+        'raw_page_size': PAGE_SIZES[1],
+        'raw_page': 1,
+        **{key: [] for key in st.session_state if str(key).startswith('raw_filter_')},
+    }.items():
+        st.session_state[widget_key] = st.session_state.get(widget_key, widget_default)
 
     # Tentukan template Plotly berdasarkan mode tema
     plotly_template = "plotly_white" if st.session_state.mode == 'light' else "plotly_dark"
+    figure_cache = get_figure_cache()
+
+    # --- Spesifikasi tampilan ---
+    # Kunci cache figur dibentuk dari nilai filter saja (murah). Fungsi *_view
+    # menghitung data tampilan dan mengembalikan pasangan (kunci, builder);
+    # resource (proyeksi, prediktor, geometri) diberikan oleh pemanggil, jadi
+    # view juga aman dijalankan di worker prefetch tanpa memuat apa pun.
+    def trend_key(komoditas, kabkota, show_forecast):
+        return figure_key('trend', data_version, plotly_template, komoditas=komoditas, kabupaten_kota=kabkota, forecast=show_forecast)
+
+    def cluster_keys(year, k, fitur, kabkota_subset):
+        cluster_filters = dict(year=year, k=k, fitur=fitur, kabupaten_kota=kabkota_subset)
+        return (figure_key('cluster_scatter', data_version, plotly_template, **cluster_filters),
+                figure_key('cluster_box', data_version, plotly_template, **cluster_filters))
+
+    def map_key(year, metric_label, level, k, fitur, kabkota_subset):
+        column, _ = MAP_METRICS[metric_label]
+        if column == 'Cluster':
+            filters = dict(year=year, k=k, fitur=fitur, kabupaten_kota=kabkota_subset)
+        else:
+            filters = dict(year=year, kabupaten_kota=kabkota_subset)
+        # mtime GeoJSON ikut kunci agar batas yang diganti tidak tertutup figur lama
+        return figure_key('map', data_version, plotly_template, metric=column, level=level,
+                          geometry=geojson_mtime(), **filters)
+
+    def efficiency_key(year):
+        return figure_key('efficiency', data_version, plotly_template, year=year)
+
+    def trend_view(komoditas, kabkota, forecast):
+        """Tren produksi satu komoditas untuk beberapa wilayah, plus proyeksi bila ``forecast`` ada (tab 1)."""
+        region_codes = region_index.codes(kabkota)
+        df_trend_agg = cube.trend(komoditas, region_codes)
+        df_forecast = forecast.trend(komoditas, region_codes) if forecast is not None else None
+        key = trend_key(komoditas, kabkota, forecast is not None)
+        return df_trend_agg, df_forecast, (key, lambda: trend_figure(df_trend_agg, komoditas, year_range, plotly_template, df_forecast))
+
+    def cluster_view(year, k, fitur, kabkota_subset, cluster_predictor):
+        """Data klaster satu tahun untuk k dan fitur pilihan, plus figur sebaran dan box (tab 2)."""
+        df_cluster_year = df_cluster[df_cluster['Tahun'] == year]
+        if kabkota_subset:
+            df_cluster_year = df_cluster_year[isin_mask(df_cluster_year['Kabupaten_Kota'], kabkota_subset)]
+
+        if fitur == FITUR_KOMODITAS and not df_cluster_year.empty:
+            df_cluster_year = df_cluster_year.assign(Cluster=cluster_by_komoditas(
+                data_version, year, k, tuple(df_cluster_year[ID_COLUMN].tolist())
+            ))
+        elif k != DEFAULT_K and year in cluster_predictor.years:
+            df_cluster_year = cluster_predictor.assign_frame(df_cluster_year, k)
+        scatter_key, box_key = cluster_keys(year, k, fitur, kabkota_subset)
+        return df_cluster_year, [
+            (scatter_key, lambda: cluster_scatter_figure(df_cluster_year, plotly_template)),
+            (box_key, lambda: cluster_box_figure(df_cluster_year, plotly_template)),
+        ]
+
+    def map_view(year, metric_label, level, k, fitur, kabkota_subset, cluster_predictor, region_geometry):
+        """Nilai per kode wilayah dan figur choropleth satu tahun (tab 2).
+
+        Geometri berasal dari cache ``RegionGeometry`` per tingkat detail; yang
+        berbeda antar filter hanya nilai per wilayah. Elemen ketiga adalah
+        jumlah wilayah yang punya batas dan ukuran GeoJSON figur tersebut.
+        """
+        column, label = MAP_METRICS[metric_label]
+        if column == 'Cluster':
+            df_map = cluster_view(year, k, fitur, kabkota_subset, cluster_predictor)[0]
+        else:
+            df_map = cube.region_summary(year)
+            if kabkota_subset:
+                df_map = df_map[isin_mask(df_map['Kabupaten_Kota'], kabkota_subset)]
+        title = f'Peta {metric_label} per Kabupaten/Kota Tahun {year}'
+        geojson = region_geometry.geojson(level)
+        drawn = df_map[ID_COLUMN].isin([feature['id'] for feature in geojson['features']])
+        return df_map, (map_key(year, metric_label, level, k, fitur, kabkota_subset), lambda: choropleth_figure(
+            geojson, df_map, column, title, label, plotly_template,
+            n_classes=k if column == 'Cluster' else None
+        )), (int(drawn.sum()), region_geometry.payload_size(level))
+
+    def efficiency_view(year):
+        """Tabel per komoditas dan figur efisiensi satu tahun (tab 3)."""
+        df_compare = cube.commodity_summary(year)
+        return df_compare, (efficiency_key(year), lambda: efficiency_figure(df_compare, year, plotly_template))
 
     # --- Tab 1: Ringkasan & Tren Waktu ---
-    with tab1:
+    @st.fragment
+    @perf_recorder.timed('tab_ringkasan')
+    def render_ringkasan(selected_year, selected_komoditas, selected_kabkota_trend):
         st.header(f"Total Agregat Produksi Tahun {selected_year}")
         
-        df_bio_year = df_biofarmaka[df_biofarmaka['Tahun'] == selected_year]
-        
-        total_produksi = df_bio_year['Produksi_Kg'].sum()
-        total_luas_panen = df_bio_year['Luas_Panen'].sum()
-        avg_efficiency = df_bio_year['Efisiensi_Kg_per_M2'].mean()
-        
-        # Perhitungan YoY untuk Produksi
-        prod_yoy = None
-        try:
-            df_prev_year = df_biofarmaka[df_biofarmaka['Tahun'] == (selected_year - 1)]
-            prev_production = df_prev_year['Produksi_Kg'].sum()
-            prod_yoy = ((total_produksi - prev_production) / prev_production) * 100 if prev_production else 0
-        except:
-            pass
+        # Total dan YoY dari kubus (sama dengan yang dilayani api.py)
+        year_summary = cube.year_summary(selected_year)
+        total_produksi = year_summary['total_produksi']
+        total_luas_panen = year_summary['total_luas_panen']
+        avg_efficiency = year_summary['avg_efficiency']
+        prod_yoy = year_summary['produksi_yoy']
 
         col_metric_1, col_metric_2, col_metric_3, col_metric_4 = st.columns(4)
         
@@ -362,65 +591,126 @@ if data_dict is not None and 'dataset_final' in data_dict:
 
         st.subheader(f"📈 Tren Produksi {selected_komoditas} Antar Wilayah")
         
-        df_trend = df_biofarmaka[
-            (df_biofarmaka['Kabupaten_Kota'].isin(selected_kabkota_trend)) & 
-            (df_biofarmaka['Komoditas'] == selected_komoditas)
-        ]
+        show_forecast = st.toggle("Tampilkan proyeksi tahun berikutnya", key='trend_forecast')
+        forecast = load_forecast(data_version) if show_forecast else None
+        if forecast is not None:
+            # Proyeksi sudah dimuat: prefetch tren boleh memakainya
+            st.session_state.setdefault('prefetch_ready', set()).add('ringkasan')
+        df_trend_agg, df_forecast, trend_spec = trend_view(selected_komoditas, selected_kabkota_trend, forecast)
 
-        if not df_trend.empty:
-            df_trend_agg = df_trend.groupby(['Tahun', 'Kabupaten_Kota'])['Produksi_Kg'].sum().reset_index()
-            fig_trend = px.line(
-                df_trend_agg, x='Tahun', y='Produksi_Kg', color='Kabupaten_Kota',
-                title=f'Perkembangan Produksi {selected_komoditas} ({available_years[0]}-{available_years[-1]})',
-                labels={'Produksi_Kg': 'Produksi (Kg)', 'Tahun': 'Tahun'}, 
-                markers=True, template=plotly_template
-            )
+        if not df_trend_agg.empty:
+            fig_trend = figure_cache.get_figure(*trend_spec)
             st.plotly_chart(fig_trend, use_container_width=True)
+
+            if df_forecast is not None and not df_forecast.empty:
+                st.caption(
+                    f"Proyeksi memakai tren linear per wilayah dan komoditas; pita menunjukkan interval prediksi "
+                    f"{CONFIDENCE:.0%}. Proyeksi dari data {len(available_years)} tahun hanya gambaran kasar."
+                )
+                st.dataframe(
+                    df_forecast,
+                    column_config={
+                        "Kabupaten_Kota": "Kabupaten/Kota",
+                        "Produksi_Kg": st.column_config.NumberColumn("Proyeksi Produksi (Kg)", format="%.0f"),
+                        "Produksi_Kg_Bawah": st.column_config.NumberColumn("Batas Bawah (Kg)", format="%.0f"),
+                        "Produksi_Kg_Atas": st.column_config.NumberColumn("Batas Atas (Kg)", format="%.0f"),
+                    },
+                    hide_index=True,
+                    use_container_width=True
+                )
         else:
             st.info("Pilih Kabupaten/Kota dan Komoditas di sidebar untuk melihat tren waktu.")
 
 
     # --- Tab 2: Klastering & Peringkat Wilayah ---
-    with tab2:
+    @st.fragment
+    @perf_recorder.timed('tab_klastering')
+    def render_klastering(selected_year, selected_kabkota_cluster):
         st.header("🗺️ Analisis Klastering Wilayah (K-Means)")
         
+        # Eksplorasi k dan set fitur: dihitung on-demand dari centroid tersimpan
+        cluster_predictor = load_cluster_predictor(data_version)
+        k_options = cluster_predictor.k_values(selected_year) or [DEFAULT_K]
+        col_k, col_fitur, col_subset = st.columns(3)
+        with col_k:
+            if st.session_state['cluster_k'] not in k_options:
+                st.session_state['cluster_k'] = DEFAULT_K if DEFAULT_K in k_options else k_options[0]
+            selected_k = st.select_slider("Jumlah Klaster (k):", options=k_options, key='cluster_k')
+        with col_fitur:
+            selected_fitur = st.selectbox("Fitur Klastering:", [FITUR_TOTAL, FITUR_KOMODITAS], key='cluster_fitur')
+        with col_subset:
+            selected_kabkota_subset = st.multiselect("Batasi Wilayah (opsional):", available_kabkota, key='cluster_subset')
+
         col_scatter, col_box = st.columns(2)
 
+        # K-Means per komoditas butuh minimal k wilayah; subset yang lebih kecil tidak diklaster
+        too_few_regions = f"Klaster per komoditas butuh minimal {selected_k} wilayah: tambah wilayah atau kecilkan k."
+
         if df_cluster is not None and not df_cluster.empty:
-            df_cluster_year = df_cluster[df_cluster['Tahun'] == selected_year]
-            
-            if 'Produksi_Total' in df_cluster_year.columns and 'LuasPanen_Total' in df_cluster_year.columns:
+            try:
+                df_cluster_year, (scatter_spec, box_spec) = cluster_view(
+                    selected_year, selected_k, selected_fitur, selected_kabkota_subset, cluster_predictor
+                )
+            except ValueError:
+                df_cluster_year = None
+
+            if df_cluster_year is None:
+                st.warning(too_few_regions)
+            elif 'Produksi_Total' in df_cluster_year.columns and 'LuasPanen_Total' in df_cluster_year.columns:
                 
                 with col_scatter:
                     st.subheader(f"Sebaran Klaster Produksi vs Luas Panen Tahun {selected_year}")
-                    fig_cluster = px.scatter(
-                        df_cluster_year, x='LuasPanen_Total', y='Produksi_Total',
-                        color='Cluster', 
-                        hover_data=['Kabupaten_Kota', 'Produksi_Total', 'LuasPanen_Total'],
-                        title='Klastering Wilayah Biofarmaka',
-                        labels={'LuasPanen_Total': 'Luas Panen Total (M2/Pohon)', 'Produksi_Total': 'Produksi Total (Kg)'},
-                        color_continuous_scale=px.colors.qualitative.Antique, 
-                        template=plotly_template
-                    )
+                    fig_cluster = figure_cache.get_figure(*scatter_spec)
                     st.plotly_chart(fig_cluster, use_container_width=True)
                     
 
                 with col_box:
                     st.subheader(f"Distribusi Produksi per Klaster Tahun {selected_year} (Box Plot)")
-                    fig_box_cluster = px.box(
-                        df_cluster_year, 
-                        x='Cluster', 
-                        y='Produksi_Total',
-                        color='Cluster',
-                        title='Distribusi Produksi Total Berdasarkan Klaster',
-                        labels={'Produksi_Total': 'Produksi Total (Kg)', 'Cluster': 'Kategori Klaster'},
-                        template=plotly_template
-                    )
+                    fig_box_cluster = figure_cache.get_figure(*box_spec)
                     st.plotly_chart(fig_box_cluster, use_container_width=True)
             else:
                 st.warning("Kolom Klastering tidak ditemukan di file Klaster.")
         else:
             st.info("File klastering tidak tersedia atau gagal dimuat.")
+
+        # Peta Wilayah (batas dari GeoJSON lokal, tanpa tile server)
+        st.subheader(f"🗺️ Peta Wilayah Tahun {selected_year}")
+        region_geometry = load_region_geometry(data_version, geojson_mtime())
+        # Prediktor dan geometri sudah dimuat: prefetch tab ini boleh memakainya
+        st.session_state.setdefault('prefetch_ready', set()).add('klastering')
+        if region_geometry is None:
+            st.info(
+                f"Peta belum tersedia karena file batas wilayah `{geojson_path()}` belum ada. "
+                "Jalankan `python geo.py --fetch` untuk mengunduh batas kabupaten/kota dari geoBoundaries "
+                "IDN ADM2 (CC BY 4.0), lalu muat ulang halaman.\n\n"
+                "Batas dari sumber lain (mis. batas administrasi BIG) juga dapat disimpan di path tersebut "
+                "(GeoJSON Polygon/MultiPolygon, koordinat bujur-lintang) dengan properti kode wilayah BPS "
+                "(mis. `Kode_Wilayah`, `KDPKAB`, `ADM2_PCODE`) atau nama kabupaten/kota "
+                "(mis. `WADMKK`, `ADM2_EN`, `shapeName`); catat sumber dan lisensinya di `geo/SOURCE`."
+            )
+        else:
+            col_map_metric, col_map_level = st.columns(2)
+            with col_map_metric:
+                map_label = st.radio("Warnai berdasarkan:", list(MAP_METRICS), horizontal=True, key='map_metric')
+            with col_map_level:
+                map_level = st.select_slider("Tingkat Detail Batas:", options=list(DETAIL_LEVELS), key='map_detail')
+
+            if map_label == "Klaster" and (df_cluster is None or df_cluster.empty):
+                st.info("File klastering tidak tersedia, peta klaster tidak dapat ditampilkan.")
+            elif map_label == "Klaster" and df_cluster_year is None:
+                st.info(too_few_regions)
+            else:
+                _, map_spec, (map_regions, map_size) = map_view(
+                    selected_year, map_label, map_level, selected_k, selected_fitur, selected_kabkota_subset,
+                    cluster_predictor, region_geometry
+                )
+                if map_regions == 0:
+                    st.warning("Tidak ada wilayah terpilih yang punya batas di GeoJSON; periksa properti kode/nama fiturnya.")
+                else:
+                    st.plotly_chart(figure_cache.get_figure(*map_spec), use_container_width=True)
+                    st.caption(f"Batas {map_regions} wilayah, tingkat {map_level} ({map_size / 1024:,.0f} KB).")
+                if region_geometry.unmatched:
+                    st.caption(f"Fitur GeoJSON tanpa kode wilayah yang dikenal: {', '.join(region_geometry.unmatched)}")
             
         st.divider()
         
@@ -428,16 +718,21 @@ if data_dict is not None and 'dataset_final' in data_dict:
         st.subheader(f"🔍 Riwayat Klaster Tahunan untuk Kabupaten/Kota: **{selected_kabkota_cluster}**")
         
         if df_cluster is not None and not df_cluster.empty:
-            df_history = df_cluster[df_cluster['Kabupaten_Kota'] == selected_kabkota_cluster].sort_values(by='Tahun')
+            cluster_history = load_cluster_history(data_version)
+            region_code = region_index.lookup(selected_kabkota_cluster)
+            if region_code in cluster_history.index:
+                df_history = cluster_history.loc[[region_code]].reset_index().sort_values(by='Tahun')
+            else:
+                df_history = cluster_history.iloc[:0].reset_index()
+            # Riwayat memakai fitur total; id klaster stabil antar tahun berkat warm-start
+            if selected_k != DEFAULT_K and cluster_predictor.covers(df_history['Tahun'].unique()):
+                df_history = cluster_predictor.assign_frame(df_history, selected_k)
             
             if not df_history.empty:
-                fig_history = px.line(
-                    df_history, x='Tahun', y='Cluster', 
-                    title=f'Perubahan Kategori Klaster {selected_kabkota_cluster} (2022-2024)',
-                    labels={'Cluster': 'Kategori Klaster (0=Rendah, 2=Tinggi)'},
-                    markers=True, template=plotly_template
+                fig_history = figure_cache.get_figure(
+                    figure_key('cluster_history', data_version, plotly_template, kabupaten_kota=selected_kabkota_cluster, k=selected_k),
+                    lambda: cluster_history_figure(df_history, selected_kabkota_cluster, year_range, selected_k, plotly_template)
                 )
-                fig_history.update_yaxes(tick0=0, dtick=1, range=[-0.5, 2.5]) 
                 st.plotly_chart(fig_history, use_container_width=True)
                 
                 st.markdown("### Tabel Detail Klaster Tahunan")
@@ -446,102 +741,358 @@ if data_dict is not None and 'dataset_final' in data_dict:
                     column_config={
                         "Produksi_Total": st.column_config.NumberColumn("Produksi Total (Kg)", format="%.0f"),
                         "LuasPanen_Total": st.column_config.NumberColumn("Luas Panen Total", format="%.0f"),
-                        "Cluster": st.column_config.TextColumn("Kategori Klaster (0/1/2)")
+                        "Cluster": st.column_config.TextColumn(f"Kategori Klaster (0-{selected_k - 1})")
                     },
                     use_container_width=True, hide_index=True
                 )
-                st.caption("Interpretasi Klaster: 0=Rendah/Kurang Potensi, 1=Sedang, 2=Tinggi/Potensi Utama.")
+                if selected_k == DEFAULT_K:
+                    st.caption("Interpretasi Klaster: 0=Rendah/Kurang Potensi, 1=Sedang, 2=Tinggi/Potensi Utama.")
+                else:
+                    st.caption(f"Interpretasi Klaster: 0=Rendah/Kurang Potensi hingga {selected_k - 1}=Tinggi/Potensi Utama.")
             else:
                 st.info(f"Data klastering tidak ditemukan untuk {selected_kabkota_cluster}.")
+
+        st.divider()
+
+        # Stabilitas Klaster: seberapa kokoh kategori di atas bila wilayah dan seed di-resample
+        st.subheader(f"🎯 Stabilitas Klaster Tahun {selected_year} (k={selected_k})")
+
+        if df_cluster is None or df_cluster.empty:
+            stability_summary = None
+            st.info("File klastering tidak tersedia atau gagal dimuat.")
+        else:
+            stability = load_cluster_stability(data_version, selected_k)
+            stability_summary = stability.summary().set_index('Tahun')
+            st.caption(
+                f"Dari {stability.n_resamples} replikasi K-Means (sampel bootstrap wilayah dan seed berbeda) "
+                f"dengan fitur {FITUR_TOTAL}. Keyakinan = porsi replikasi yang menempatkan wilayah di klaster yang sama."
+            )
+
+        if stability_summary is not None and selected_year in stability_summary.index:
+            year_stability = stability_summary.loc[selected_year]
+            col_silhouette, col_confidence, col_unstable = st.columns(3)
+            with col_silhouette:
+                st.metric(
+                    "Silhouette", f"{year_stability['Silhouette']:.3f}" if selected_k > 1 else "-",
+                    help=(f"Rentang replikasi (P10-P90): {year_stability['Silhouette_P10']:.3f} - "
+                          f"{year_stability['Silhouette_P90']:.3f}") if selected_k > 1 else None
+                )
+            with col_confidence:
+                st.metric("Rata-rata Keyakinan", f"{year_stability['Keyakinan_Rata_rata']:.0%}")
+            with col_unstable:
+                st.metric(
+                    "Wilayah Tidak Stabil", f"{int(year_stability['Wilayah_Tidak_Stabil'])}",
+                    help=f"Keyakinan di bawah {STABLE_THRESHOLD:.0%}"
+                )
+
+            col_membership, col_transition = st.columns([3, 2])
+            with col_membership:
+                st.markdown("### Keyakinan Keanggotaan per Wilayah")
+                st.dataframe(
+                    stability.year_membership(selected_year).drop(columns=['Tahun', ID_COLUMN]),
+                    column_config={
+                        "Kabupaten_Kota": "Kabupaten/Kota",
+                        "Cluster": st.column_config.TextColumn("Klaster"),
+                        "Keyakinan": st.column_config.ProgressColumn("Keyakinan", min_value=0.0, max_value=1.0, format="percent"),
+                        "Silhouette": st.column_config.NumberColumn("Silhouette", format="%.3f"),
+                        "Peluang_Berubah": st.column_config.NumberColumn("Peluang Berubah vs Tahun Lalu", format="percent"),
+                        **{
+                            f"Peluang_{cls}": st.column_config.NumberColumn(f"P(Klaster {cls})", format="percent")
+                            for cls in range(selected_k)
+                        },
+                    },
+                    use_container_width=True, hide_index=True
+                )
+            with col_transition:
+                st.markdown("### Perpindahan Klaster Antar Tahun")
+                st.dataframe(
+                    stability.transitions(),
+                    column_config={
+                        "Dari_Tahun": st.column_config.NumberColumn("Dari Tahun", format="%d"),
+                        "Ke_Tahun": st.column_config.NumberColumn("Ke Tahun", format="%d"),
+                        "Dari_Cluster": "Dari Klaster",
+                        "Ke_Cluster": "Ke Klaster",
+                        "Jumlah": "Jumlah Wilayah",
+                    },
+                    use_container_width=True, hide_index=True
+                )
+
+            # Simulasi what-if: hanya jarak ke centroid referensi dan centroid replikasi
+            st.markdown(f"### Simulasi What-if: {selected_kabkota_cluster}")
+            col_produksi, col_luas = st.columns(2)
+            with col_produksi:
+                produksi_pct = st.slider("Perubahan Produksi (%)", -90, 200, step=5, key='whatif_produksi')
+            with col_luas:
+                luas_pct = st.slider("Perubahan Luas Panen (%)", -90, 200, step=5, key='whatif_luas')
+            try:
+                scenario = stability.what_if(
+                    selected_year, region_index.lookup(selected_kabkota_cluster), produksi_pct, luas_pct
+                )
+            except KeyError:
+                st.info(f"Data klastering tidak ditemukan untuk {selected_kabkota_cluster} tahun {selected_year}.")
+            else:
+                col_before, col_after, col_probability = st.columns(3)
+                with col_before:
+                    st.metric("Klaster Saat Ini", scenario['Cluster_Awal'])
+                with col_after:
+                    st.metric(
+                        "Klaster Skenario", scenario['Cluster_Baru'],
+                        delta=scenario['Cluster_Baru'] - scenario['Cluster_Awal'] or None
+                    )
+                with col_probability:
+                    st.metric("Keyakinan Skenario", f"{scenario['Peluang'][scenario['Cluster_Baru']]:.0%}")
+                st.caption(
+                    f"Produksi {scenario['Nilai_Baru']['Produksi_Total']:,.0f} Kg, luas panen "
+                    f"{scenario['Nilai_Baru']['LuasPanen_Total']:,.0f}; wilayah lain tetap. Peluang per klaster: "
+                    + ", ".join(f"{cls}: {p:.0%}" for cls, p in enumerate(scenario['Peluang']))
+                )
         
 
 
     # --- Tab 3: Perbandingan & Efisiensi Komoditas ---
-    with tab3:
+    @st.fragment
+    @perf_recorder.timed('tab_komoditas')
+    def render_komoditas(selected_year):
         st.header(f"Analisis Efisiensi dan Kontribusi Komoditas Tahun {selected_year}")
         
-        df_compare = df_bio_year.groupby('Komoditas').agg(
-            Total_Produksi_Kg=('Produksi_Kg', 'sum'),
-            Total_Luas_Panen=('Luas_Panen', 'sum'),
-            Rata_rata_Efisiensi=('Efisiensi_Kg_per_M2', 'mean')
-        ).reset_index()
+        df_compare, efficiency_spec = efficiency_view(selected_year)
         
         # --- Analisis Efisiensi Produksi (Scatter Plot) ---
         st.subheader("⚖️ Analisis Efisiensi Produksi (Kg/M2) Komoditas")
         st.caption("Visualisasi ini membandingkan total produksi (ukuran gelembung) dengan rata-rata efisiensi (sumbu Y). Komoditas yang berada di atas adalah yang paling efisien dalam menggunakan lahan.")
         
-        fig_eff = px.scatter(
-            df_compare, 
-            x='Total_Luas_Panen', 
-            y='Rata_rata_Efisiensi', 
-            color='Komoditas', 
-            size='Total_Produksi_Kg', 
-            hover_data=['Total_Produksi_Kg', 'Total_Luas_Panen'],
-            title=f'Perbandingan Efisiensi Produksi Komoditas ({selected_year})',
-            labels={'Total_Luas_Panen': 'Total Luas Panen (Log Scale)', 'Rata_rata_Efisiensi': 'Rata-rata Efisiensi (Kg/M2)'},
-            log_x=True, 
-            template=plotly_template
-        )
+        fig_eff = figure_cache.get_figure(*efficiency_spec)
         st.plotly_chart(fig_eff, use_container_width=True)
         
         
         st.divider()
 
         # --- Peringkat Komoditas per Wilayah (Tabel) ---
-        st.subheader("🥇 Peringkat Komoditas Unggulan berdasarkan Produksi")
+        # Peringkat diambil dari indeks per versi data, bukan dihitung ulang per pilihan
+        rankings = load_rankings(data_version)
+        ranking_column_config = {
+            "Peringkat": st.column_config.NumberColumn("Peringkat", format="%d"),
+            "Komoditas": "Komoditas",
+            "Kabupaten_Kota": "Kabupaten/Kota",
+            "Total_Produksi_Kg": st.column_config.NumberColumn("Produksi (Kg)", format="%.0f"),
+            "Rata_rata_Efisiensi": st.column_config.NumberColumn("Efisiensi (Kg/M2)", format="%.3f")
+        }
+
+        ranking_label = st.radio("Peringkat berdasarkan:", list(RANKING_METRICS), horizontal=True, key='ranking_metric')
+        ranking_metric = RANKING_METRICS[ranking_label]
+        st.subheader(f"🥇 Peringkat Komoditas Unggulan berdasarkan {ranking_label}")
         
         selected_city_for_ranking = st.selectbox(
             "Pilih Kabupaten/Kota untuk Melihat Peringkat Komoditas Unggulan:", 
             ['Semua Wilayah'] + available_kabkota,
-            index=0
+            key='ranking_kabkota'
         )
         
         if selected_city_for_ranking == 'Semua Wilayah':
-            df_rank_data = df_compare[['Komoditas', 'Total_Produksi_Kg', 'Total_Luas_Panen', 'Rata_rata_Efisiensi']].copy()
+            region_code = None
             title_suffix = "Semua Wilayah"
         else:
-            df_rank_data = df_bio_year[df_bio_year['Kabupaten_Kota'] == selected_city_for_ranking]
-            df_rank_data = df_rank_data.groupby('Komoditas').agg(
-                Total_Produksi_Kg=('Produksi_Kg', 'sum'),
-                Total_Luas_Panen=('Luas_Panen', 'sum'),
-                Rata_rata_Efisiensi=('Efisiensi_Kg_per_M2', 'mean')
-            ).reset_index()
+            region_code = region_index.lookup(selected_city_for_ranking)
             title_suffix = selected_city_for_ranking
-            
-        df_rank_data = df_rank_data[df_rank_data['Total_Produksi_Kg'] > 0]
-        df_rank_data['Peringkat_Prod'] = df_rank_data['Total_Produksi_Kg'].rank(method='min', ascending=False).astype(int)
-        df_rank_data = df_rank_data.sort_values(by='Peringkat_Prod').head(10)
+        df_rank_data = rankings.top(selected_year, region_code, ranking_metric)
         
-        st.markdown(f"**Top 10 Komoditas di {title_suffix} Tahun {selected_year}**")
+        st.markdown(f"**Top {rankings.top_n} Komoditas di {title_suffix} Tahun {selected_year}**")
         st.dataframe(
             df_rank_data, 
-            column_order=['Peringkat_Prod', 'Komoditas', 'Total_Produksi_Kg', 'Rata_rata_Efisiensi'],
-            column_config={
-                "Peringkat_Prod": st.column_config.NumberColumn("Peringkat", format="%d"),
-                "Komoditas": "Komoditas",
-                "Total_Produksi_Kg": st.column_config.NumberColumn("Produksi (Kg)", format="%.0f"),
-                "Rata_rata_Efisiensi": st.column_config.NumberColumn("Efisiensi (Kg/M2)", format="%.3f")
-            },
+            column_order=['Peringkat', 'Komoditas', 'Total_Produksi_Kg', 'Rata_rata_Efisiensi'],
+            column_config=ranking_column_config,
             hide_index=True, 
             use_container_width=True
         )
 
+        # --- Wilayah Unggulan per Komoditas (lookup balik) ---
+        st.subheader(f"📍 Wilayah Unggulan per Komoditas berdasarkan {ranking_label}")
+        st.caption("Wilayah diurutkan menurut peringkat komoditas ini di wilayahnya sendiri (1 = komoditas unggulan utama wilayah tersebut).")
+        selected_komoditas_ranking = st.selectbox(
+            "Pilih Komoditas:", available_komoditas, key='ranking_komoditas'
+        )
+        df_region_rank = rankings.top_regions(selected_komoditas_ranking, selected_year, ranking_metric, n=rankings.top_n)
+        if not df_region_rank.empty:
+            st.dataframe(
+                df_region_rank,
+                column_order=['Peringkat', 'Kabupaten_Kota', 'Total_Produksi_Kg', 'Rata_rata_Efisiensi'],
+                column_config=ranking_column_config,
+                hide_index=True,
+                use_container_width=True
+            )
+        else:
+            st.info(f"Tidak ada wilayah yang memproduksi {selected_komoditas_ranking} pada tahun {selected_year}.")
+
 
     # --- Tab 4: Raw Data ---
-    with tab4:
+    @st.fragment
+    @perf_recorder.timed('tab_raw_data')
+    def render_raw_data():
         st.header("Data Mentah dan Hasil Penggabungan")
-        
-        with st.expander("Data Final Produksi dan Luas Panen"):
-            st.dataframe(df_final.head(), use_container_width=True)
-        
-        with st.expander("Data Klastering Gabungan (2022-2024)"):
-            if df_cluster is not None:
-                 st.dataframe(df_cluster, use_container_width=True)
-            else:
-                 st.info("Data klastering gabungan tidak tersedia.")
 
-        with st.expander("Data Biofarmaka (Format Long, termasuk Efisiensi)"):
-            st.dataframe(df_biofarmaka.head(), use_container_width=True)
+        # Filter, urut, dan paginasi dijalankan di server; browser hanya
+        # menerima baris halaman yang sedang ditampilkan.
+        frames = load_explorer_frames(data_version)
+        if st.session_state['raw_table'] not in frames:
+            st.session_state['raw_table'] = next(iter(frames))
+        table = st.selectbox("Pilih Tabel:", list(frames), key='raw_table')
+        df_raw = frames[table]
+
+        filters = {}
+        filter_cols = st.columns(len(FILTER_COLUMNS))
+        for col, filter_col in zip(FILTER_COLUMNS, filter_cols):
+            if col not in df_raw.columns:
+                continue
+            with filter_col:
+                options = sorted(df_raw[col].unique())
+                filters[col] = st.multiselect(f"Filter {col.replace('_', ' ')}:", options, key=f'raw_filter_{table}_{col}')
+
+        sort_options = ["(urutan asli)"] + list(df_raw.columns)
+        if st.session_state['raw_sort_by'] not in sort_options:
+            st.session_state['raw_sort_by'] = sort_options[0]
+        sort_col1, sort_col2, sort_col3 = st.columns([2, 1, 1])
+        with sort_col1:
+            sort_by = st.selectbox("Urutkan berdasarkan:", sort_options, key='raw_sort_by')
+        with sort_col2:
+            ascending = st.radio("Arah:", ["Naik", "Turun"], horizontal=True, key='raw_sort_dir') == "Naik"
+        with sort_col3:
+            page_size = st.selectbox("Baris per halaman:", PAGE_SIZES, key='raw_page_size')
+
+        sort_by = sort_by if sort_by in df_raw.columns else None
+        order = explorer_sort_order(data_version, table, sort_by, ascending)
+        rows = selected_rows(df_raw, filters, order=order)
+        total_rows = len(rows)
+        n_pages = page_count(total_rows, page_size)
+        if st.session_state.get('raw_page', 1) > n_pages:
+            st.session_state['raw_page'] = n_pages
+        page = st.number_input("Halaman:", min_value=1, max_value=n_pages, step=1, key='raw_page')
+
+        start = (page - 1) * page_size
+        df_page = df_raw.iloc[rows[start:start + page_size]]
+        st.dataframe(df_page, use_container_width=True)
+        st.caption(
+            f"Menampilkan baris {min(start + 1, total_rows)}–{start + len(df_page)} dari {total_rows} "
+            f"(halaman {page} dari {n_pages})"
+        )
+
+        # Ekspor dibuat hanya saat tombol diklik, ditulis per potongan ke file sementara
+        file_stem = table.split(' (')[0].lower().replace(' ', '_')
+        export_col1, export_col2 = st.columns(2)
+        with export_col1:
+            st.download_button(
+                "⬇️ Unduh CSV", data=lambda: spool_export(df_raw, rows, 'csv'),
+                file_name=f"{file_stem}.csv", mime="text/csv", on_click="ignore", key='raw_export_csv'
+            )
+        with export_col2:
+            st.download_button(
+                "⬇️ Unduh Parquet", data=lambda: spool_export(df_raw, rows, 'parquet'),
+                file_name=f"{file_stem}.parquet", mime="application/vnd.apache.parquet",
+                on_click="ignore", key='raw_export_parquet'
+            )
+
+    # --- Tab Aplikasi ---
+    # Hanya tab yang sedang terbuka yang dihitung (on_change="rerun" + .open).
+    # Setiap tab adalah fragment, jadi widget di dalam tab hanya me-rerun tab itu.
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "📊 Ringkasan & Tren Waktu", 
+        "🗺️ Klastering & Peringkat Wilayah", 
+        "📈 Perbandingan & Efisiensi Komoditas", 
+        "Raw Data"], key="active_view", on_change="rerun")
+
+    if tab1.open:
+        with tab1:
+            render_ringkasan(selected_year, selected_komoditas, selected_kabkota_trend)
+    if tab2.open:
+        with tab2:
+            render_klastering(selected_year, selected_kabkota_cluster)
+    if tab3.open:
+        with tab3:
+            render_komoditas(selected_year)
+    if tab4.open:
+        with tab4:
+            render_raw_data()
+
+    # --- Prefetch tampilan berikutnya ---
+    # Dijadwalkan setelah tab terbuka selesai dirender: figur tab yang terbuka
+    # lebih dulu (tahun bertetangga, komoditas lain), lalu tab lain. Jadwal
+    # baru membatalkan sisa jadwal rerun sebelumnya milik sesi ini.
+    def prefetch_tasks():
+        """Pasangan (kunci, builder) yang belum ada di cache figur.
+
+        Di thread skrip hanya kunci yang dibentuk; data dan figur dihitung
+        oleh builder di worker. Resource tab 2 (prediktor, geometri) hanya
+        dipakai bila sudah dimuat oleh tab tersebut, dan proyeksi hanya bila
+        tab 1 sudah dirender, sehingga prefetch tidak pernah memicu fit/muat
+        berat di thread skrip.
+        """
+        ready = st.session_state.get('prefetch_ready', set())
+        years = [selected_year] + neighbours(available_years, selected_year, limit=2)
+        subset = st.session_state['cluster_subset']
+
+        trend_tasks = []
+        show_forecast = st.session_state['trend_forecast']
+        if selected_kabkota_trend and (not show_forecast or 'ringkasan' in ready):
+            forecast = load_forecast(data_version) if show_forecast else None
+            for komoditas in neighbours(available_komoditas, selected_komoditas, limit=2):
+                trend_tasks.append((
+                    trend_key(komoditas, selected_kabkota_trend, show_forecast),
+                    lambda komoditas=komoditas: trend_view(komoditas, selected_kabkota_trend, forecast)[-1][1](),
+                ))
+
+        cluster_tasks = []
+        k, fitur = st.session_state['cluster_k'], st.session_state['cluster_fitur']
+        # Klaster per komoditas menjalankan K-Means lewat st.cache_data, jadi tidak di-prefetch
+        if df_cluster is not None and fitur == FITUR_TOTAL and 'klastering' in ready:
+            cluster_predictor = load_cluster_predictor(data_version)
+            region_geometry = load_region_geometry(data_version, geojson_mtime())
+            map_metric, map_level = st.session_state['map_metric'], st.session_state['map_detail']
+            for year in years:
+                if k != DEFAULT_K and k not in cluster_predictor.k_values(year):
+                    continue
+                for position, key in enumerate(cluster_keys(year, k, fitur, subset)):
+                    cluster_tasks.append((key, lambda year=year, position=position: cluster_view(
+                        year, k, fitur, subset, cluster_predictor
+                    )[1][position][1]()))
+                if region_geometry is not None:
+                    cluster_tasks.append((
+                        map_key(year, map_metric, map_level, k, fitur, subset),
+                        lambda year=year: map_view(
+                            year, map_metric, map_level, k, fitur, subset, cluster_predictor, region_geometry
+                        )[1][1](),
+                    ))
+
+        efficiency_tasks = [
+            (efficiency_key(year), lambda year=year: efficiency_view(year)[1][1]()) for year in years
+        ]
+        by_tab = [(tab1, trend_tasks), (tab2, cluster_tasks), (tab3, efficiency_tasks)]
+        return [
+            task for tab, tasks in sorted(by_tab, key=lambda item: not item[0].open) for task in tasks
+            if not figure_cache.contains(task[0])
+        ]
+
+    prefetcher = get_prefetcher()
+    if prefetch_enabled():
+        with perf_recorder.stage('prefetch_schedule'):
+            prefetcher.schedule(
+                perf_recorder.session,
+                [(key, lambda key=key, build=build: figure_cache.get_json(key, build)) for key, build in prefetch_tasks()],
+                is_cached=figure_cache.contains,
+            )
+
+    # Statistik cache figur, ditulis setelah semua grafik dibangun
+    figure_stats = figure_cache.stats()
+    prefetch_stats = prefetcher.stats()
+    st.sidebar.caption(
+        f"Cache figur: {figure_stats['hits']} hit / {figure_stats['misses']} miss "
+        f"({figure_stats['size']}/{figure_stats['maxsize']} entri) · "
+        f"Prefetch: {prefetch_stats['completed']} selesai, {prefetch_stats['pending']} antre"
+    )
+
+    # --- Panel Performa (opsional) ---
+    with st.sidebar:
+        st.toggle("⏱️ Panel Performa", value=perf.enabled_by_default(), key='perf_enabled')
+        if st.session_state['perf_enabled']:
+            render_perf_panel(perf_recorder)
 
 else:
     st.error("Aplikasi gagal berjalan. Pastikan file `dataset_final.csv` dan file klaster ada dan terbaca dengan benar.")
\ No newline at end of file
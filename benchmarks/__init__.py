@@ -0,0 +1 @@
+"""Benchmark dan generator data sintetis untuk pipeline dashboard."""
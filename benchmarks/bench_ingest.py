@@ -0,0 +1,91 @@
+"""Benchmark parsing file BPS tahunan: regex setelah baca vs parsing saat baca, serial vs paralel.
+
+Jalankan dari root repo::
+
+    python -m benchmarks.bench_ingest --years 10 --regions 5000 --repeat 3 --jobs 1 2 4
+
+Setiap nilai ``--jobs`` diukur terpisah dan dibandingkan dengan ``--jobs 1``
+(tanpa pool); jumlah core mesin ikut dicetak karena speedup dibatasi olehnya.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import ingest
+from benchmarks.synthetic import write_synthetic_bps_year
+
+
+def clean_numeric_regex(df):
+    """Implementasi notebook (replace regex di setiap sel), disimpan sebagai pembanding."""
+    df = df.replace("...", np.nan)
+    df = df.replace(",", "", regex=True)
+    for col in df.columns:
+        if col not in ["Kabupaten/Kota", "Tahun"]:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df.fillna(0)
+    return df
+
+
+def merge_year_regex(produksi_path, luas_path, year):
+    df_produksi = pd.read_csv(produksi_path)
+    df_luaspanen = pd.read_csv(luas_path)
+    df_produksi["Tahun"] = year
+    df_luaspanen["Tahun"] = year
+    merged = pd.merge(df_produksi, df_luaspanen, on=["Kabupaten/Kota", "Tahun"], how="inner")
+    return clean_numeric_regex(merged)
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, default=10, help='jumlah tahun sintetis (default: 10)')
+    parser.add_argument('--regions', type=int, default=5000, help='jumlah wilayah per tahun (default: 5000)')
+    parser.add_argument('--komoditas', type=int, default=16)
+    parser.add_argument('--jobs', type=int, nargs='+', default=None,
+                        help='jumlah proses paralel yang dibandingkan (default: 1 dan jumlah core)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+    jobs = sorted(set(args.jobs or [1, os.cpu_count() or 1]) | {1})
+
+    with tempfile.TemporaryDirectory(prefix='bench_ingest_') as data_dir:
+        years = list(range(2024 - args.years + 1, 2025))
+        for year in years:
+            write_synthetic_bps_year(data_dir, year, args.regions, args.komoditas)
+        pairs = ingest.discover_year_pairs(data_dir)
+        # Baris wilayah + total provinsi + 3 baris catatan kaki, dua file per tahun
+        n_cells = args.years * (args.regions + 4) * args.komoditas * 2
+        print(f"{args.years} tahun x {args.regions} wilayah x {args.komoditas} komoditas ({n_cells:,d} sel), "
+              f"{os.cpu_count()} core")
+
+        runs = {'regex, serial': lambda: {year: merge_year_regex(*pairs[year], year) for year in years}}
+        for n_jobs in jobs:
+            runs[f'read_csv, --jobs {n_jobs}'] = lambda n_jobs=n_jobs: ingest.parse_years(pairs, years, jobs=n_jobs)
+        results = {}
+        timings = {}
+        for label, func in runs.items():
+            timings[label], results[label] = best_of(func, args.repeat)
+        serial = timings['read_csv, --jobs 1']
+        for label, seconds in timings.items():
+            print(f"    {label:<22} {seconds * 1000:>10.1f} ms {n_cells / seconds / 1e6:>8.2f} juta sel/detik"
+                  f" {serial / seconds:>6.2f}x vs --jobs 1")
+
+        reference, *others = results.values()
+        for other in others:
+            for year in years:
+                pd.testing.assert_frame_equal(reference[year], other[year], check_dtype=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark reshape lebar -> long: melt + merge lama vs tumpukan blok NumPy.
+
+Jalankan dari root repo::
+
+    python -m benchmarks.bench_reshape --scale 100 --repeat 3
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_synthetic_final
+from data_store import read_sources
+from fact_table import drop_junk_rows, preprocess_biofarmaka_data
+
+
+def reshape_melt_merge(df_final):
+    """Implementasi lama (dua melt + merge tiga kunci), disimpan sebagai pembanding."""
+    prod_cols = [col for col in df_final.columns if 'Produksi_' in col]
+    luas_cols = [col for col in df_final.columns if 'Luas_Panen_' in col]
+
+    komoditas_prod_map = {col: col.replace('Produksi_', '') for col in prod_cols}
+    komoditas_luas_map = {col: col.replace('Luas_Panen_', '') for col in luas_cols}
+
+    common_komoditas = list(set(komoditas_prod_map.values()) & set(komoditas_luas_map.values()))
+
+    final_prod_cols = [k for k, v in komoditas_prod_map.items() if v in common_komoditas]
+    final_luas_cols = [k for k, v in komoditas_luas_map.items() if v in common_komoditas]
+
+    df_prod = df_final[['Kabupaten_Kota', 'Tahun'] + final_prod_cols].copy()
+    df_prod = df_prod.rename(columns={k: komoditas_prod_map[k] for k in final_prod_cols})
+    df_prod_melt = df_prod.melt(id_vars=['Kabupaten_Kota', 'Tahun'], value_vars=common_komoditas, var_name='Komoditas', value_name='Produksi_Kg')
+
+    df_luas = df_final[['Kabupaten_Kota', 'Tahun'] + final_luas_cols].copy()
+    df_luas = df_luas.rename(columns={k: komoditas_luas_map[k] for k in final_luas_cols})
+    df_luas_melt = df_luas.melt(id_vars=['Kabupaten_Kota', 'Tahun'], value_vars=common_komoditas, var_name='Komoditas', value_name='Luas_Panen')
+
+    df_merged = pd.merge(df_prod_melt, df_luas_melt, on=['Kabupaten_Kota', 'Tahun', 'Komoditas'])
+
+    df_merged['Produksi_Kg'] = pd.to_numeric(df_merged['Produksi_Kg'], errors='coerce').fillna(0)
+    df_merged['Luas_Panen'] = pd.to_numeric(df_merged['Luas_Panen'], errors='coerce').fillna(0)
+
+    df_merged['Efisiensi_Kg_per_M2'] = np.where(
+        df_merged['Luas_Panen'] > 0,
+        df_merged['Produksi_Kg'] / df_merged['Luas_Panen'],
+        0
+    )
+    return df_merged
+
+
+IMPLEMENTATIONS = {
+    'melt_merge': reshape_melt_merge,
+    'numpy_stack': preprocess_biofarmaka_data,
+}
+
+
+def measure(func, df_final, repeat):
+    """Waktu terbaik (detik) dan puncak memori (MB) dari ``repeat`` kali eksekusi."""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(df_final)
+        best = min(best, time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = func(df_final)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 2**20, result
+
+
+def _canonical(df):
+    df = df.drop(columns='Kode_Wilayah', errors='ignore')
+    df = df.assign(Komoditas=df['Komoditas'].astype(str), Kabupaten_Kota=df['Kabupaten_Kota'].astype(str))
+    return df.sort_values(['Kabupaten_Kota', 'Tahun', 'Komoditas'], ignore_index=True)
+
+
+def run(label, df_final, repeat):
+    results = {}
+    for name, func in IMPLEMENTATIONS.items():
+        try:
+            seconds, peak_mb, out = measure(func, df_final, repeat)
+        except MemoryError:
+            print(f"{label:<22} {name:<12} MemoryError")
+            continue
+        results[name] = out
+        print(f"{label:<22} {name:<12} {seconds * 1000:>10.1f} ms {peak_mb:>10.1f} MB {len(out):>12,d} baris")
+
+    if len(results) == 2:
+        left, right = (_canonical(df) for df in results.values())
+        pd.testing.assert_frame_equal(left, right, check_dtype=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=100,
+                        help='faktor pengali jumlah wilayah dan komoditas data sintetis (default: 100)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    df_final = drop_junk_rows(read_sources()['dataset_final'])
+    run('dataset_final.csv', df_final, args.repeat)
+
+    n_regions = df_final['Kabupaten_Kota'].nunique() * args.scale
+    n_komoditas = sum('Produksi_' in col for col in df_final.columns) * args.scale
+    synthetic = make_synthetic_final(n_regions, n_komoditas)
+    run(f"sintetis x{args.scale}", synthetic, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+"""Benchmark headless alur dashboard: muat -> pra-proses -> agregasi -> figur.
+
+Setiap tahap dijalankan dengan fungsi yang sama seperti ``app.py`` tetapi
+tanpa Streamlit, lalu waktu terbaik (perf_counter) dan puncak memori
+(tracemalloc) dicatat per tahap. Data yang diukur: CSV bawaan repo dan data
+sintetis yang diperbesar per sumbu (wilayah, komoditas, tahun) secara
+terpisah dari ukuran dasar. Hasil ditulis ke laporan JSON; dengan
+``--baseline`` laporan baru dibandingkan dengan laporan lama dan proses
+keluar dengan kode 1 bila ada tahap yang melambat melewati toleransi.
+
+Jalankan dari root repo::
+
+    python -m benchmarks.run_benchmarks --output bench_report.json
+    python -m benchmarks.run_benchmarks --regions 27,5000 --years 3,30 --repeat 5
+    python -m benchmarks.run_benchmarks --baseline bench_report.json --tolerance 0.25
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from benchmarks.synthetic import make_synthetic_final, to_raw_columns
+from cluster_predictor import kmeans_numpy, standardize
+from cluster_stability import ClusterStability
+from data_store import DATASET_FINAL, clean_column_name, load_snapshot, read_sources
+from fact_table import AggregateCube, build_cube, build_fact_table, drop_junk_rows
+from forecast import Forecast, fit_forecasts
+from figures import cluster_box_figure, cluster_scatter_figure, efficiency_figure, trend_figure
+from rankings import METRICS, RankingIndex
+from regions import ID_COLUMN
+
+BASE_REGIONS = 27
+BASE_KOMODITAS = 16
+BASE_YEARS = 3
+LAST_YEAR = 2024
+TEMPLATE = 'plotly_white'
+# Perbedaan di bawah ambang ini dianggap derau pengukuran, bukan regresi
+MIN_SECONDS = 0.005
+
+
+def measure(func, repeat):
+    """Waktu terbaik (detik) dan puncak memori (MB) untuk ``func()``.
+
+    Mengembalikan ``(seconds, peak_mb, result)``; pengukuran memori dijalankan
+    terpisah supaya overhead tracemalloc tidak ikut terhitung di waktu.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+        del result
+
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak / 2**20, result
+
+
+def tab1_aggregations(cube, region_codes, komoditas):
+    """Metrik tahun, YoY, dan tren komoditas seperti tab Ringkasan."""
+    out = []
+    for year in cube.years:
+        out.append(cube.year_totals(year))
+        out.append(cube.year_totals(year - 1))
+    out.append(cube.trend(komoditas, region_codes))
+    return out
+
+
+def tab3_aggregations(cube, rankings, year, region_code, komoditas):
+    """Tabel per komoditas + top 10 (semua wilayah, satu wilayah) dan wilayah unggulan seperti tab Komoditas."""
+    df_compare = cube.commodity_summary(year)
+    ranked = [rankings.top(year, code, metric) for code in (None, region_code) for metric in METRICS]
+    ranked.append(rankings.top_regions(komoditas, year, n=rankings.top_n))
+    return df_compare, ranked
+
+
+def cluster_frame(fact, year):
+    """Total per wilayah satu tahun dengan label klaster (input grafik tab Klastering)."""
+    totals = (
+        fact[fact['Tahun'] == year]
+        .groupby([ID_COLUMN, 'Kabupaten_Kota'], observed=True)[['Produksi_Kg', 'Luas_Panen']].sum()
+        .rename(columns={'Produksi_Kg': 'Produksi_Total', 'Luas_Panen': 'LuasPanen_Total'})
+        .reset_index()
+    )
+    labels, _ = kmeans_numpy(standardize(totals[['Produksi_Total', 'LuasPanen_Total']]), 3,
+                             order_by=totals['Produksi_Total'].to_numpy())
+    return totals.assign(Tahun=year, Cluster=labels)
+
+
+def build_figures(df_trend, df_forecast, komoditas, df_compare, df_cluster_year, year, year_range):
+    """Membangun dan menserialisasi figur seperti yang disimpan ``FigureCache``."""
+    figs = [
+        trend_figure(df_trend, komoditas, year_range, TEMPLATE, df_forecast),
+        efficiency_figure(df_compare, year, TEMPLATE),
+        cluster_scatter_figure(df_cluster_year, TEMPLATE),
+        cluster_box_figure(df_cluster_year, TEMPLATE),
+    ]
+    return [fig.to_json() for fig in figs]
+
+
+def run_pipeline(data_dir, repeat):
+    """Mengukur semua tahap untuk CSV di ``data_dir``; mengembalikan (stages, info)."""
+    stages = {}
+
+    def stage(name, func):
+        seconds, peak_mb, result = measure(func, repeat)
+        stages[name] = {'seconds': round(seconds, 6), 'peak_mb': round(peak_mb, 3)}
+        return result
+
+    with tempfile.TemporaryDirectory(prefix='bench_snapshot_') as cache_dir:
+        stage('load_csv', lambda: read_sources(data_dir))
+        load_snapshot(data_dir, cache_dir)  # membangun snapshot; pengukuran berikutnya = pemuatan hangat
+        data = stage('load_data', lambda: load_snapshot(data_dir, cache_dir)[0])
+
+    raw_columns = list(pd.read_csv(Path(data_dir) / DATASET_FINAL, nrows=0).columns)
+    stage('clean_column_name', lambda: [clean_column_name(col) for col in raw_columns])
+
+    df_final = drop_junk_rows(data['dataset_final'])
+    fact = stage('preprocess_biofarmaka_data', lambda: build_fact_table(df_final, data['regions']))
+    cube = stage('build_cube', lambda: AggregateCube(build_cube(fact)))
+    rankings = stage('build_rankings', lambda: RankingIndex(cube.cube))
+    forecast = stage('fit_forecast', lambda: Forecast(fit_forecasts(cube.cube)))
+
+    years = cube.years
+    year = years[-1]
+    regions = sorted(fact['Kode_Wilayah'].unique())
+    komoditas = sorted(fact['Komoditas'].unique())[0]
+    # Default sidebar: dua wilayah pertama untuk tren
+    df_trend = stage('tab1_aggregations', lambda: tab1_aggregations(cube, regions[:2], komoditas))[-1]
+    df_forecast = forecast.trend(komoditas, regions[:2])
+    df_compare, _ = stage('tab3_aggregations', lambda: tab3_aggregations(cube, rankings, year, regions[0], komoditas))
+
+    df_cluster_year = cluster_frame(fact, year)
+    df_cluster_all = pd.concat([cluster_frame(fact, y) for y in years], ignore_index=True)
+    stage('cluster_stability', lambda: ClusterStability(df_cluster_all))
+    year_range = f"{years[0]}-{years[-1]}"
+    stage('figures', lambda: build_figures(df_trend, df_forecast, komoditas, df_compare, df_cluster_year, year, year_range))
+
+    info = {
+        'n_rows_final': len(df_final),
+        'n_rows_fact': len(fact),
+        'n_regions': len(regions),
+        'n_komoditas': fact['Komoditas'].nunique(),
+        'n_years': len(years),
+    }
+    return stages, info
+
+
+def run_synthetic(n_regions, n_komoditas, n_years, repeat):
+    years = range(LAST_YEAR - n_years + 1, LAST_YEAR + 1)
+    df = to_raw_columns(make_synthetic_final(n_regions, n_komoditas, years))
+    with tempfile.TemporaryDirectory(prefix='bench_data_') as data_dir:
+        df.to_csv(Path(data_dir) / DATASET_FINAL, index=False)
+        del df
+        return run_pipeline(data_dir, repeat)
+
+
+def scenarios(regions, komoditas, years):
+    """Skenario sintetis: setiap sumbu diperbesar sendiri, sumbu lain tetap di ukuran dasar."""
+    seen = set()
+    for axis, values in (('wilayah', regions), ('komoditas', komoditas), ('tahun', years)):
+        for value in values:
+            shape = {
+                'n_regions': value if axis == 'wilayah' else BASE_REGIONS,
+                'n_komoditas': value if axis == 'komoditas' else BASE_KOMODITAS,
+                'n_years': value if axis == 'tahun' else BASE_YEARS,
+            }
+            key = tuple(shape.values())
+            if key in seen:
+                continue
+            seen.add(key)
+            label = 'sintetis_dasar' if key == (BASE_REGIONS, BASE_KOMODITAS, BASE_YEARS) else f"sintetis_{axis}={value}"
+            yield label, shape
+
+
+def compare(report, baseline, tolerance):
+    """Daftar regresi waktu (tahap lebih lambat dari baseline x (1 + tolerance))."""
+    previous = {run['label']: run['stages'] for run in baseline.get('runs', [])}
+    regressions = []
+    for run in report['runs']:
+        for name, result in run['stages'].items():
+            old = previous.get(run['label'], {}).get(name)
+            if old is None:
+                continue
+            limit = old['seconds'] * (1 + tolerance)
+            if result['seconds'] > limit and result['seconds'] - old['seconds'] > MIN_SECONDS:
+                regressions.append(
+                    f"{run['label']}/{name}: {old['seconds'] * 1000:.1f} ms -> {result['seconds'] * 1000:.1f} ms"
+                )
+    return regressions
+
+
+def _int_list(text):
+    return [int(value) for value in text.split(',') if value]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--data-dir', default=str(Path(__file__).resolve().parent.parent),
+                        help='folder berisi dataset_final.csv dan cluster_YYYY.csv')
+    parser.add_argument('--regions', type=_int_list, default=[27, 270, 1000, 5000],
+                        help='jumlah wilayah sintetis, dipisah koma (default: 27,270,1000,5000)')
+    parser.add_argument('--komoditas', type=_int_list, default=[16, 64, 256],
+                        help='jumlah komoditas sintetis, dipisah koma (default: 16,64,256)')
+    parser.add_argument('--years', type=_int_list, default=[3, 10, 30],
+                        help='jumlah tahun sintetis, dipisah koma (default: 3,10,30)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-synthetic', action='store_true', help='hanya ukur CSV bawaan')
+    parser.add_argument('--output', default='bench_report.json', help='path laporan JSON')
+    parser.add_argument('--baseline', default=None, help='laporan JSON lama sebagai pembanding')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='batas perlambatan relatif sebelum dianggap regresi (default: 0.25)')
+    args = parser.parse_args(argv)
+
+    runs = []
+
+    def record(label, shape, stages, info):
+        runs.append({'label': label, 'shape': shape, **info, 'stages': stages})
+        total = sum(result['seconds'] for result in stages.values())
+        peak = max(result['peak_mb'] for result in stages.values())
+        print(f"{label:<26} {info['n_rows_fact']:>12,d} baris fakta {total * 1000:>10.1f} ms {peak:>9.1f} MB")
+        for name, result in stages.items():
+            print(f"    {name:<28} {result['seconds'] * 1000:>10.2f} ms {result['peak_mb']:>9.2f} MB")
+
+    stages, info = run_pipeline(args.data_dir, args.repeat)
+    record(DATASET_FINAL, None, stages, info)
+
+    if not args.no_synthetic:
+        for label, shape in scenarios(args.regions, args.komoditas, args.years):
+            stages, info = run_synthetic(repeat=args.repeat, **shape)
+            record(label, shape, stages, info)
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plotly': plotly.__version__,
+        },
+        'repeat': args.repeat,
+        'runs': runs,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Laporan ditulis ke {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("Regresi terdeteksi:", *regressions, sep='\n  ')
+            return 1
+        print("Tidak ada regresi dibanding baseline.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Generator ``dataset_final`` dan file BPS mentah sintetis untuk benchmark pada skala besar."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_YEARS = (2022, 2023, 2024)
+
+
+def make_synthetic_final(n_regions=27, n_komoditas=16, years=DEFAULT_YEARS, seed=42):
+    """Membuat dataset_final berformat lebar dengan nama kolom yang sudah dibersihkan.
+
+    Bentuknya sama dengan hasil ``load_data()``: satu baris per (wilayah, tahun),
+    pasangan kolom ``Produksi_<komoditas>`` dan ``Luas_Panen_<komoditas>``, dan
+    sekitar sepertiga sel bernilai nol seperti data BPS asli.
+    """
+    rng = np.random.default_rng(seed)
+    years = list(years)
+    n_rows = n_regions * len(years)
+    komoditas = [f"Komoditas_{i:05d}" for i in range(n_komoditas)]
+
+    luas = rng.lognormal(mean=10, sigma=2, size=(n_rows, n_komoditas)).round()
+    luas[rng.random((n_rows, n_komoditas)) < 0.33] = 0
+    produksi = (luas * rng.lognormal(mean=1, sigma=0.8, size=(n_rows, n_komoditas))).round()
+
+    regions = np.array([f"Wilayah {i:05d}" for i in range(n_regions)], dtype=object)
+    ids = pd.DataFrame({
+        'Kabupaten_Kota': np.tile(regions, len(years)),
+        'Tahun': np.repeat(np.array(years, dtype=np.int64), n_regions),
+    })
+    prod_df = pd.DataFrame(produksi, columns=[f"Produksi_{k}" for k in komoditas])
+    luas_df = pd.DataFrame(luas, columns=[f"Luas_Panen_{k}" for k in komoditas])
+    # Urutan kolom mengikuti dataset_final: Kabupaten_Kota, Produksi_*, Tahun, Luas_Panen_*
+    return pd.concat([ids[['Kabupaten_Kota']], prod_df, ids[['Tahun']], luas_df], axis=1)
+
+
+def to_raw_columns(df_final):
+    """Salinan dengan nama kolom bergaya header CSV BPS (sebelum ``clean_column_name``)."""
+    def raw_name(col):
+        if col == 'Kabupaten_Kota':
+            return 'Kabupaten/Kota'
+        if col.startswith('Produksi_'):
+            return f"Produksi {col[len('Produksi_'):].replace('_', ' ')} (kilogram) (Kg)"
+        if col.startswith('Luas_Panen_'):
+            return f"Luas Panen {col[len('Luas_Panen_'):].replace('_', ' ')} (meter persegi) (M2)"
+        return col
+    return df_final.rename(columns=raw_name)
+
+
+def write_synthetic_bps_year(data_dir, year, n_regions=27, n_komoditas=16, seed=42, status="Angka sementara"):
+    """Menulis pasangan ``produksibio_YY.csv`` / ``biofarmaka_YYYY.csv`` mentah bergaya BPS.
+
+    Keanehan file BPS ikut ditiru sehingga jalur parsing ingest penuh teruji:
+    sel ``...`` dan kosong tersebar acak, sebagian angka memakai pemisah
+    ribuan (``"1,234,567"``), baris total provinsi, lalu baris kosong dan
+    catatan kaki (``Catatan`` / ``status``, mis. ``Angka sementara``).
+    """
+    rng = np.random.default_rng(seed + year)
+    regions = [f"Wilayah {i:05d}" for i in range(n_regions)]
+    komoditas = [f"Komoditas {i:05d}" for i in range(n_komoditas)]
+    footer = ["", "Catatan", status]
+
+    def write(path, header, values):
+        values = np.vstack([values, values.sum(axis=0)])
+        cells = values.astype(np.int64).astype(str).astype(object)
+        noise = rng.random(values.shape)
+        grouped = noise >= 0.7
+        cells[grouped] = [f"{value:,d}" for value in values[grouped].astype(np.int64)]
+        cells[noise < 0.05] = "..."
+        cells[(noise >= 0.05) & (noise < 0.15)] = ""
+        body = pd.DataFrame(cells, columns=header[1:])
+        body.insert(0, header[0], regions + ["Jawa Barat"])
+        tail = pd.DataFrame([[name] + [""] * len(komoditas) for name in footer], columns=header)
+        pd.concat([body, tail], ignore_index=True).to_csv(path, index=False, lineterminator='\r\n')
+
+    luas = rng.lognormal(mean=10, sigma=2, size=(n_regions, n_komoditas)).round()
+    produksi = (luas * rng.lognormal(mean=1, sigma=0.8, size=luas.shape)).round()
+    write(Path(data_dir) / f"produksibio_{year % 100:02d}.csv",
+          ["Kabupaten/Kota"] + [f"Produksi {k} (kilogram) (Kg)" for k in komoditas], produksi)
+    write(Path(data_dir) / f"biofarmaka_{year}.csv",
+          ["Kabupaten/Kota"] + [f"Luas Panen {k} (meter persegi) (M2)" for k in komoditas], luas)
@@ -0,0 +1,123 @@
+"""Penetapan klaster on-demand untuk dashboard memakai centroid tersimpan.
+
+Model dari ``clustering.py`` dimuat sekali per proses. Penetapan klaster untuk
+subset wilayah mana pun atau k pilihan pengguna cukup berupa perhitungan jarak
+ke centroid dengan NumPy, tanpa ``fit`` scikit-learn. Untuk set fitur yang
+tidak punya model tersimpan (mis. produksi per komoditas) tersedia K-Means
+NumPy kecil yang tervektorisasi.
+"""
+import numpy as np
+
+from clustering import DEFAULT_K, FEATURES, MODEL_DIR, RANDOM_STATE, load_models
+from data_model import INTEGER_COLUMNS
+
+
+def nearest_centroid(X, centroids):
+    """Indeks centroid terdekat (jarak Euclid kuadrat) untuk setiap baris X."""
+    distances = (
+        np.einsum('ij,ij->i', X, X)[:, None]
+        - 2.0 * X @ centroids.T
+        + np.einsum('ij,ij->i', centroids, centroids)[None, :]
+    )
+    return distances.argmin(axis=1)
+
+
+def standardize(X):
+    """Standardisasi per kolom; kolom tanpa variasi dibiarkan bernilai 0."""
+    X = np.asarray(X, dtype=float)
+    std = X.std(axis=0)
+    std[std == 0] = 1.0
+    return (X - X.mean(axis=0)) / std
+
+
+def _kmeans_plusplus(X, k, rng):
+    centroids = np.empty((k, X.shape[1]))
+    centroids[0] = X[rng.integers(len(X))]
+    closest = ((X - centroids[0]) ** 2).sum(axis=1)
+    for i in range(1, k):
+        total = closest.sum()
+        idx = rng.choice(len(X), p=closest / total) if total > 0 else rng.integers(len(X))
+        centroids[i] = X[idx]
+        closest = np.minimum(closest, ((X - centroids[i]) ** 2).sum(axis=1))
+    return centroids
+
+
+def kmeans_numpy(X, k, max_iter=100, seed=RANDOM_STATE, order_by=None):
+    """K-Means (Lloyd) tervektorisasi untuk set fitur tanpa model tersimpan.
+
+    Id klaster diurutkan naik menurut ``order_by`` (default: jumlah fitur per
+    centroid) agar tetap bermakna 0=Rendah .. k-1=Tinggi.
+
+    Mengembalikan tuple ``(labels, centroids)``. ``ValueError`` bila baris
+    lebih sedikit dari ``k`` (seperti ``sklearn.cluster.KMeans``).
+    """
+    X = np.asarray(X, dtype=float)
+    if len(X) < k:
+        raise ValueError(f"Jumlah data ({len(X)}) lebih sedikit dari jumlah klaster k={k}")
+    rng = np.random.default_rng(seed)
+    centroids = _kmeans_plusplus(X, k, rng)
+    labels = None
+    for _ in range(max_iter):
+        new_labels = nearest_centroid(X, centroids)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        onehot = np.zeros((len(X), k))
+        onehot[np.arange(len(X)), labels] = 1.0
+        counts = onehot.sum(axis=0)
+        filled = counts > 0
+        # Klaster kosong mempertahankan centroid sebelumnya
+        centroids[filled] = (onehot.T @ X)[filled] / counts[filled, None]
+
+    if order_by is None:
+        score = centroids.sum(axis=1)
+    else:
+        counts = np.bincount(labels, minlength=k)
+        score = np.bincount(labels, weights=order_by, minlength=k) / np.maximum(counts, 1)
+    order = np.argsort(score, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(k)
+    return rank[labels], centroids[order]
+
+
+class ClusterPredictor:
+    """Centroid dan parameter scaler per (tahun, k) dalam bentuk array NumPy."""
+
+    def __init__(self, models):
+        self._scalers = {}
+        self._centroids = {}
+        for year, model in models.items():
+            scaler = model['scaler']
+            self._scalers[year] = (scaler.mean_, scaler.scale_)
+            for k, result in model['models'].items():
+                self._centroids[(year, k)] = result['centroids_scaled']
+
+    @classmethod
+    def from_store(cls, model_dir=MODEL_DIR):
+        return cls(load_models(model_dir))
+
+    @property
+    def years(self):
+        return sorted(self._scalers)
+
+    def k_values(self, year=None):
+        return sorted({k for (y, k) in self._centroids if year is None or y == year})
+
+    def covers(self, years):
+        return set(years) <= set(self._scalers)
+
+    def assign(self, year, X, k=DEFAULT_K):
+        """Label klaster untuk baris X (kolom sesuai ``FEATURES``) pada tahun dan k tertentu."""
+        mean, scale = self._scalers[year]
+        X_scaled = (np.asarray(X, dtype=float) - mean) / scale
+        return nearest_centroid(X_scaled, self._centroids[(year, k)])
+
+    def assign_frame(self, df, k=DEFAULT_K):
+        """Salinan ``df`` (kolom Tahun + FEATURES) dengan kolom Cluster untuk k pilihan."""
+        labels = np.zeros(len(df), dtype=INTEGER_COLUMNS['Cluster'])
+        years = df['Tahun'].to_numpy()
+        X = df[FEATURES].to_numpy(dtype=float)
+        for year in np.unique(years):
+            mask = years == year
+            labels[mask] = self.assign(int(year), X[mask], k)
+        return df.assign(Cluster=labels)
@@ -0,0 +1,337 @@
+"""Stabilitas klaster tahunan: keyakinan keanggotaan, silhouette, transisi, dan what-if.
+
+Label di ``cluster_YYYY.csv`` berasal dari satu kali K-Means per tahun. Modul
+ini mengulang klastering pada ``n_resamples`` replikasi per tahun; setiap
+replikasi memakai sampel bootstrap wilayah dan inisialisasi k-means++ dengan
+seed sendiri. Semua replikasi satu tahun difit sekaligus sebagai satu batch
+array NumPy (replikasi x wilayah x fitur), tanpa loop per replikasi.
+
+- Fitur sama dengan model tersimpan (``FEATURES``), distandardisasi per tahun
+  dengan mean/std semua wilayah tahun itu (seperti ``StandardScaler``).
+- Label referensi: kolom ``Cluster`` untuk k default, centroid tersimpan
+  (``ClusterPredictor``) untuk k lain, atau fit terbaik dari beberapa seed.
+- Id klaster setiap replikasi dicocokkan ke label referensi (assignment
+  Hungaria pada tabel kontingensi), jadi 0=Rendah .. k-1=Tinggi tetap berlaku.
+- Keyakinan = porsi replikasi yang menempatkan wilayah di klaster
+  referensinya; peluang berubah antar tahun dihitung dari peluang keanggotaan
+  kedua tahun.
+
+Skenario what-if (produksi/luas panen satu wilayah diubah sekian persen)
+hanya berupa perhitungan jarak ke centroid referensi dan centroid semua
+replikasi, sehingga cukup cepat untuk slider interaktif.
+"""
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+
+from clustering import DEFAULT_K, FEATURES, RANDOM_STATE
+from regions import ID_COLUMN
+
+N_RESAMPLES = 200
+N_REFERENCE_SEEDS = 10
+MAX_ITER = 100
+# Wilayah dengan keyakinan di bawah ambang ini dianggap tidak stabil
+STABLE_THRESHOLD = 0.8
+
+# Silhouette replikasi dihitung pada subset wilayah sebesar ini (seperti sample_size sklearn)
+SILHOUETTE_SAMPLE = 300
+# Batas elemen array sementara per blok perhitungan jarak
+BLOCK_ELEMENTS = 1 << 22
+
+PROBABILITY_PREFIX = 'Peluang_'
+
+
+def batched_kmeans_plusplus(X, k, rng):
+    """Centroid awal k-means++ untuk setiap batch ``X`` (B x m x d) sekaligus."""
+    B, m, _ = X.shape
+    batch = np.arange(B)
+    centroids = np.empty((B, k, X.shape[2]))
+    centroids[:, 0] = X[batch, rng.integers(m, size=B)]
+    closest = ((X - centroids[:, :1]) ** 2).sum(axis=2)
+    for i in range(1, k):
+        total = closest.sum(axis=1, keepdims=True)
+        # Batch tanpa jarak tersisa (semua titik sama) memilih titik secara seragam
+        weights = np.where(total > 0, closest / np.where(total > 0, total, 1.0), 1.0 / m)
+        cumulative = np.cumsum(weights, axis=1)
+        idx = (cumulative < rng.random((B, 1)) * cumulative[:, -1:]).sum(axis=1).clip(max=m - 1)
+        centroids[:, i] = X[batch, idx]
+        closest = np.minimum(closest, ((X - centroids[:, i:i + 1]) ** 2).sum(axis=2))
+    return centroids
+
+
+def _assign(X, centroids):
+    """Label centroid terdekat: X (B x m x d), centroid (B x k x d) -> (B x m).
+
+    ``|x|^2`` sama untuk semua centroid sehingga tidak ikut dihitung.
+    """
+    distances = np.einsum('bkd,bkd->bk', centroids, centroids)[:, None, :] - 2.0 * X @ centroids.transpose(0, 2, 1)
+    return distances.argmin(axis=2)
+
+
+def _cluster_sums(X, labels, k):
+    """Jumlah anggota (B x k) dan jumlah fitur (B x k x d) per klaster lewat satu bincount per fitur."""
+    B, _, d = X.shape
+    flat = (labels + k * np.arange(B)[:, None]).ravel()
+    counts = np.bincount(flat, minlength=B * k).reshape(B, k)
+    sums = np.stack([np.bincount(flat, weights=X[:, :, j].ravel(), minlength=B * k) for j in range(d)], axis=1)
+    return counts, sums.reshape(B, k, d)
+
+
+def batched_kmeans(X, centroids, max_iter=MAX_ITER):
+    """Lloyd untuk semua batch sekaligus; mengembalikan ``(centroids, labels, inertia)`` per batch.
+
+    Batch yang labelnya sudah tidak berubah dikeluarkan dari iterasi berikutnya.
+    """
+    k = centroids.shape[1]
+    centroids = centroids.copy()
+    labels = _assign(X, centroids)
+    active = np.arange(len(X))
+    for _ in range(max_iter):
+        X_active = X[active]
+        counts, sums = _cluster_sums(X_active, labels[active], k)
+        block = centroids[active]
+        filled = counts > 0
+        # Klaster kosong mempertahankan centroid sebelumnya
+        block[filled] = sums[filled] / counts[filled][:, None]
+        centroids[active] = block
+        new_labels = _assign(X_active, block)
+        changed = (new_labels != labels[active]).any(axis=1)
+        labels[active] = new_labels
+        active = active[changed]
+        if not len(active):
+            break
+    inertia = ((X - np.take_along_axis(centroids, labels[:, :, None], axis=1)) ** 2).sum(axis=(1, 2))
+    return centroids, labels, inertia
+
+
+def silhouette_samples(X, labels, k):
+    """Silhouette per titik untuk batch ``X`` (B x n x d) dan ``labels`` (B x n).
+
+    Sama dengan ``sklearn.metrics.silhouette_samples``: titik di klaster
+    beranggota satu bernilai 0; NaN bila hanya ada satu klaster terisi.
+    Matriks jarak dihitung per blok baris agar memori tidak tumbuh n^2 x B.
+    """
+    B, n, d = X.shape
+    onehot = labels[:, :, None] == np.arange(k)
+    weights = onehot.astype(np.float64)
+    sums = np.empty((B, n, k))
+    step = max(1, BLOCK_ELEMENTS // (B * n * d))
+    for start in range(0, n, step):
+        block = slice(start, start + step)
+        D = np.sqrt(((X[:, block, None, :] - X[:, None, :, :]) ** 2).sum(axis=3))
+        sums[:, block] = D @ weights
+    counts = onehot.sum(axis=1)
+    own_count = np.take_along_axis(counts, labels, axis=1)
+    own_sum = np.take_along_axis(sums, labels[:, :, None], axis=2)[:, :, 0]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        a = np.where(own_count > 1, own_sum / (own_count - 1), 0.0)
+        mean_other = np.where(onehot | (counts[:, None, :] == 0), np.inf, sums / counts[:, None, :])
+        b = mean_other.min(axis=2)
+        s = np.where(own_count > 1, (b - a) / np.maximum(a, b), 0.0)
+    return np.where(((counts > 0).sum(axis=1) > 1)[:, None], s, np.nan)
+
+
+def align_labels(labels, reference, k):
+    """Permutasi id klaster setiap batch agar paling banyak sama dengan ``reference``.
+
+    Mengembalikan array (B x k): id lama -> id referensi.
+    """
+    B = len(labels)
+    contingency = np.zeros((B, k, k))
+    np.add.at(contingency, (np.repeat(np.arange(B), labels.shape[1]), labels.ravel(), np.tile(reference, B)), 1)
+    mapping = np.empty((B, k), dtype=np.intp)
+    for b in range(B):
+        rows, cols = linear_sum_assignment(contingency[b], maximize=True)
+        mapping[b, rows] = cols
+    return mapping
+
+
+def _standardize(X):
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    return mean, scale
+
+
+class _YearModel:
+    """Hasil resampling satu tahun (fitur terstandardisasi, label dan centroid teralign)."""
+
+    def __init__(self, X_raw, reference, k, n_resamples, rng):
+        self.mean, self.scale = _standardize(X_raw)
+        X = (X_raw - self.mean) / self.scale
+        n = len(X)
+        self.k = k
+        self.reference = reference
+        self.reference_centroids = np.stack([
+            X[reference == cls].mean(axis=0) if (reference == cls).any() else np.full(X.shape[1], np.inf)
+            for cls in range(k)
+        ])
+
+        # Setiap replikasi: sampel bootstrap wilayah + seed k-means++ sendiri
+        sample = rng.integers(n, size=(n_resamples, n))
+        X_sample = X[sample]
+        centroids, _, _ = batched_kmeans(X_sample, batched_kmeans_plusplus(X_sample, k, rng))
+        # Semua wilayah (termasuk yang tidak terambil) ditetapkan ke centroid replikasi
+        X_all = np.broadcast_to(X, (n_resamples,) + X.shape)
+        labels = _assign(X_all, centroids)
+        mapping = align_labels(labels, reference, k)
+        self.labels = np.take_along_axis(mapping, labels, axis=1)
+        aligned = np.empty_like(centroids)
+        np.put_along_axis(aligned, mapping[:, :, None], centroids, axis=1)
+        self.centroids = aligned
+
+        self.probabilities = (self.labels[:, :, None] == np.arange(k)).mean(axis=0)
+        self.silhouette = silhouette_samples(X[None], reference[None], k)[0]
+        if k > 1:
+            subset = np.sort(rng.choice(n, SILHOUETTE_SAMPLE, replace=False)) if n > SILHOUETTE_SAMPLE else np.arange(n)
+            silhouette = silhouette_samples(X_all[:, subset], self.labels[:, subset], k)
+            # Replikasi yang hanya mengisi satu klaster tidak punya silhouette (NaN)
+            self.resample_silhouette = silhouette.mean(axis=1)
+        else:
+            self.resample_silhouette = np.full(n_resamples, np.nan)
+
+    def classify(self, x_raw):
+        """Label referensi dan peluang per klaster (dari semua replikasi) untuk satu titik."""
+        x = (np.asarray(x_raw, dtype=np.float64) - self.mean) / self.scale
+        label = int(((self.reference_centroids - x) ** 2).sum(axis=1).argmin())
+        nearest = ((self.centroids - x) ** 2).sum(axis=2).argmin(axis=1)
+        return label, np.bincount(nearest, minlength=self.k) / len(nearest)
+
+
+class ClusterStability:
+    """Analisis stabilitas klaster semua tahun untuk satu nilai k."""
+
+    def __init__(self, cluster_all, k=DEFAULT_K, predictor=None, n_resamples=N_RESAMPLES, seed=RANDOM_STATE):
+        self.k = k
+        self.n_resamples = n_resamples
+        rng = np.random.default_rng(seed)
+        frame = cluster_all.sort_values(['Tahun', ID_COLUMN], ignore_index=True)
+        self._models = {}
+        self._frames = {}
+        for year, rows in frame.groupby('Tahun', sort=True):
+            year = int(year)
+            rows = rows.reset_index(drop=True)
+            X_raw = rows[FEATURES].to_numpy(dtype=np.float64)
+            if len(X_raw) < k:
+                raise ValueError(f"Tahun {year}: jumlah wilayah ({len(X_raw)}) lebih sedikit dari jumlah klaster k={k}")
+            reference = self._reference_labels(year, rows, X_raw, predictor, rng)
+            self._models[year] = _YearModel(X_raw, reference, k, n_resamples, rng)
+            self._frames[year] = rows
+        self.membership = self._membership()
+
+    def _reference_labels(self, year, rows, X_raw, predictor, rng):
+        if self.k == DEFAULT_K and 'Cluster' in rows.columns:
+            return rows['Cluster'].to_numpy(dtype=np.intp)
+        if predictor is not None and year in predictor.years and self.k in predictor.k_values(year):
+            return predictor.assign(year, X_raw, self.k).astype(np.intp)
+        # Tanpa model tersimpan: fit terbaik dari beberapa seed pada data lengkap
+        mean, scale = _standardize(X_raw)
+        X = np.broadcast_to((X_raw - mean) / scale, (N_REFERENCE_SEEDS,) + X_raw.shape)
+        k = self.k
+        centroids, labels, inertia = batched_kmeans(X, batched_kmeans_plusplus(X, k, rng))
+        best = int(inertia.argmin())
+        order = np.argsort(centroids[best, :, 0], kind='stable')
+        rank = np.empty_like(order)
+        rank[order] = np.arange(k)
+        return rank[labels[best]]
+
+    @property
+    def years(self):
+        return sorted(self._models)
+
+    def _membership(self):
+        frames = []
+        previous = None
+        for year in self.years:
+            model, rows = self._models[year], self._frames[year]
+            codes = rows[ID_COLUMN].to_numpy()
+            probabilities = model.probabilities
+            frame = pd.DataFrame({
+                'Tahun': year,
+                ID_COLUMN: codes,
+                'Kabupaten_Kota': rows['Kabupaten_Kota'].astype(str).to_numpy(),
+                'Cluster': model.reference,
+                'Keyakinan': probabilities[np.arange(len(codes)), model.reference],
+                'Silhouette': model.silhouette,
+                **{f'{PROBABILITY_PREFIX}{cls}': probabilities[:, cls] for cls in range(self.k)},
+            })
+            # Peluang berubah dari tahun sebelumnya: 1 - sum_c P_lalu(c) * P_kini(c)
+            change = np.full(len(codes), np.nan)
+            if previous is not None:
+                prev_codes, prev_probabilities = previous
+                position = pd.Index(prev_codes).get_indexer(codes)
+                found = position >= 0
+                prev = np.zeros((len(codes), self.k))
+                width = min(prev_probabilities.shape[1], probabilities.shape[1])
+                prev[found, :width] = prev_probabilities[position[found], :width]
+                change[found] = 1.0 - (prev[found, :probabilities.shape[1]] * probabilities[found]).sum(axis=1)
+            frame['Peluang_Berubah'] = change
+            frames.append(frame)
+            previous = (codes, probabilities)
+        return pd.concat(frames, ignore_index=True)
+
+    def year_membership(self, year):
+        """Keanggotaan satu tahun, wilayah paling tidak yakin lebih dulu."""
+        rows = self.membership[self.membership['Tahun'] == year]
+        return rows.sort_values(['Keyakinan', 'Kabupaten_Kota'], ignore_index=True)
+
+    def summary(self):
+        """Per tahun: silhouette referensi, sebaran silhouette replikasi, dan keyakinan."""
+        rows = []
+        for year in self.years:
+            model = self._models[year]
+            confidence = self.membership.loc[self.membership['Tahun'] == year, 'Keyakinan']
+            resample = model.resample_silhouette
+            rows.append({
+                'Tahun': year,
+                'Silhouette': float(np.nanmean(model.silhouette)) if self.k > 1 else np.nan,
+                'Silhouette_P10': float(np.nanpercentile(resample, 10)) if self.k > 1 else np.nan,
+                'Silhouette_P90': float(np.nanpercentile(resample, 90)) if self.k > 1 else np.nan,
+                'Keyakinan_Rata_rata': float(confidence.mean()),
+                'Wilayah_Tidak_Stabil': int((confidence < STABLE_THRESHOLD).sum()),
+            })
+        return pd.DataFrame(rows)
+
+    def transitions(self):
+        """Jumlah wilayah per perpindahan klaster referensi antar tahun berurutan."""
+        columns = ['Dari_Tahun', 'Ke_Tahun', 'Dari_Cluster', 'Ke_Cluster', 'Jumlah']
+        labels = self.membership.pivot(index=ID_COLUMN, columns='Tahun', values='Cluster')
+        frames = []
+        for before, after in zip(self.years, self.years[1:]):
+            pairs = labels[[before, after]].dropna().astype(int)
+            counts = pairs.groupby([before, after]).size().reset_index(name='Jumlah')
+            counts.columns = ['Dari_Cluster', 'Ke_Cluster', 'Jumlah']
+            frames.append(counts.assign(Dari_Tahun=before, Ke_Tahun=after))
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)[columns]
+
+    def what_if(self, year, region_code, produksi_pct=0.0, luas_pct=0.0):
+        """Klaster satu wilayah bila produksi/luas panennya diubah sekian persen.
+
+        Wilayah lain dan skala standardisasi tahun itu tidak berubah. Mengembalikan
+        dict berisi nilai awal/baru, klaster awal/baru, dan peluang per klaster
+        dari semua replikasi.
+        """
+        if year not in self._models:
+            raise KeyError(f"Tahun {year} tidak ada di data klaster")
+        rows = self._frames[year]
+        matches = np.flatnonzero(rows[ID_COLUMN].to_numpy() == int(region_code))
+        if not len(matches):
+            raise KeyError(f"Wilayah {region_code} tidak ada di data klaster tahun {year}")
+        row = matches[0]
+        model = self._models[year]
+        x_raw = rows.loc[row, FEATURES].to_numpy(dtype=np.float64)
+        change = {'Produksi_Total': produksi_pct, 'LuasPanen_Total': luas_pct}
+        x_new = x_raw * np.array([1 + change[feature] / 100 for feature in FEATURES])
+        label, probabilities = model.classify(x_new)
+        return {
+            'Tahun': year,
+            ID_COLUMN: int(region_code),
+            'Kabupaten_Kota': str(rows.loc[row, 'Kabupaten_Kota']),
+            'Nilai_Awal': dict(zip(FEATURES, x_raw.tolist())),
+            'Nilai_Baru': dict(zip(FEATURES, x_new.tolist())),
+            'Cluster_Awal': int(model.reference[row]),
+            'Cluster_Baru': label,
+            'Peluang': probabilities,
+        }
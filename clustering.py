@@ -0,0 +1,210 @@
+"""Mesin klastering K-Means tahunan dengan model tersimpan.
+
+Menggantikan ``clustering_tahunan`` dan ``elbow_plot`` di notebook:
+
+- semua tahun dan semua nilai k (default 1..9) difit dalam satu kali jalan,
+  paralel per nilai k memakai joblib;
+- tahun pertama difit dari awal (``random_state=42`` seperti notebook) lalu id
+  klaster diurutkan naik menurut centroid produksi (0=Rendah, k-1=Tinggi);
+- tahun berikutnya di-warm-start dari centroid tahun sebelumnya sehingga id
+  klaster tetap bermakna sama antar tahun;
+- scaler dan centroid setiap tahun disimpan dengan joblib di ``models/``.
+
+Contoh::
+
+    python clustering.py             # fit semua tahun, simpan model
+    python clustering.py --export    # sekaligus tulis ulang cluster_YYYY.csv (k=3)
+"""
+import argparse
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+BASE_DIR = Path(__file__).resolve().parent
+MODEL_DIR = BASE_DIR / "models"
+DATASET_PATTERN = re.compile(r'^dataset_(\d{4})\.csv$')
+MODEL_TEMPLATE = "kmeans_{year}.joblib"
+FEATURES = ["Produksi_Total", "LuasPanen_Total"]
+K_VALUES = range(1, 10)
+DEFAULT_K = 3
+RANDOM_STATE = 42
+
+
+def load_yearly_datasets(data_dir=BASE_DIR):
+    """Mapping tahun -> dataset_YYYY.csv (Tahun, Kabupaten/Kota, Produksi_Total, LuasPanen_Total)."""
+    datasets = {}
+    for path in sorted(Path(data_dir).glob('dataset_*.csv')):
+        match = DATASET_PATTERN.match(path.name)
+        if match:
+            datasets[int(match.group(1))] = pd.read_csv(path)
+    return datasets
+
+
+def _relabel(km, order):
+    """Id baru i = id lama order[i]."""
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return km.cluster_centers_[order], rank[km.labels_]
+
+
+def _fit_chain(k, years, scaled, scalers, init_centroids=None):
+    """Fit satu nilai k untuk deret tahun berurutan, warm-start antar tahun."""
+    results = {}
+    previous = init_centroids
+    for year in years:
+        X_scaled = scaled[year]
+        if k > len(X_scaled):
+            break
+        if previous is None:
+            km = KMeans(n_clusters=k, random_state=RANDOM_STATE).fit(X_scaled)
+            centroids = scalers[year].inverse_transform(km.cluster_centers_)
+            order = np.argsort(centroids[:, 0], kind='stable')
+        else:
+            # Centroid tahun lalu (satuan asli) dipetakan ke skala tahun ini
+            init = scalers[year].transform(previous)
+            km = KMeans(n_clusters=k, init=init, n_init=1, random_state=RANDOM_STATE).fit(X_scaled)
+            order = np.arange(k)
+        centroids_scaled, labels = _relabel(km, order)
+        centroids = scalers[year].inverse_transform(centroids_scaled)
+        results[year] = {
+            'centroids': centroids,
+            'centroids_scaled': centroids_scaled,
+            'labels': labels,
+            'inertia': float(km.inertia_),
+        }
+        previous = centroids
+    return k, results
+
+
+def fit_all(datasets, k_values=K_VALUES, previous_models=None, n_jobs=-1):
+    """Fit semua tahun dan semua k dalam satu batch.
+
+    ``previous_models`` (hasil ``load_models``) dipakai sebagai titik awal
+    warm-start untuk tahun pertama di ``datasets``; ini dipakai ingest agar
+    tahun baru melanjutkan id klaster tahun sebelumnya.
+
+    Mengembalikan mapping tahun -> model (dict berisi scaler dan hasil per k).
+    """
+    years = sorted(datasets)
+    if not years:
+        return {}
+    scalers = {}
+    scaled = {}
+    for year in years:
+        X = datasets[year][FEATURES].to_numpy(dtype=float)
+        scalers[year] = StandardScaler().fit(X)
+        scaled[year] = scalers[year].transform(X)
+
+    warm = {}
+    if previous_models:
+        prior = [y for y in previous_models if y < years[0]]
+        if prior:
+            warm = {k: r['centroids'] for k, r in previous_models[max(prior)]['models'].items()}
+
+    fitted = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_chain)(k, years, scaled, scalers, warm.get(k)) for k in k_values
+    )
+
+    models = {
+        year: {
+            'year': year,
+            'features': list(FEATURES),
+            'scaler': scalers[year],
+            'regions': datasets[year]['Kabupaten/Kota'].astype(str).tolist(),
+            'models': {},
+        }
+        for year in years
+    }
+    for k, results in fitted:
+        for year, result in results.items():
+            models[year]['models'][k] = result
+    return models
+
+
+def save_models(models, model_dir=MODEL_DIR):
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    for year, model in models.items():
+        joblib.dump(model, model_dir / MODEL_TEMPLATE.format(year=year))
+
+
+def load_models(model_dir=MODEL_DIR):
+    """Mapping tahun -> model tersimpan; kosong bila belum pernah difit."""
+    models = {}
+    for path in sorted(Path(model_dir).glob(MODEL_TEMPLATE.format(year='*'))):
+        model = joblib.load(path)
+        models[model['year']] = model
+    return models
+
+
+def model_fingerprint(model_dir=MODEL_DIR):
+    """Sidik jari model tersimpan dari nama, ukuran, dan mtime file; berubah bila model difit ulang."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(model_dir).glob(MODEL_TEMPLATE.format(year='*'))):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()[:12]
+
+
+def elbow_table(models):
+    """Inersia per (Tahun, k), pengganti elbow_plot di notebook."""
+    rows = [
+        {'Tahun': year, 'k': k, 'Inertia': result['inertia']}
+        for year, model in sorted(models.items())
+        for k, result in sorted(model['models'].items())
+    ]
+    return pd.DataFrame(rows, columns=['Tahun', 'k', 'Inertia'])
+
+
+def clustered_dataset(dataset, model, k=DEFAULT_K):
+    """dataset_YYYY dengan kolom Cluster_YYYY dari model tersimpan (format cluster_YYYY.csv)."""
+    clustered = dataset.copy()
+    clustered[f"Cluster_{model['year']}"] = model['models'][k]['labels']
+    return clustered
+
+
+def export_clusters(datasets, models, data_dir=BASE_DIR, k=DEFAULT_K):
+    for year, dataset in datasets.items():
+        clustered_dataset(dataset, models[year], k).to_csv(
+            Path(data_dir) / f"cluster_{year}.csv", index=False, lineterminator='\r\n'
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit K-Means tahunan dan simpan modelnya.")
+    parser.add_argument('--data-dir', default=str(BASE_DIR))
+    parser.add_argument('--model-dir', default=None, help='default: <data-dir>/models')
+    parser.add_argument('--k-max', type=int, default=max(K_VALUES))
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--export', action='store_true', help=f'tulis ulang cluster_YYYY.csv dengan k={DEFAULT_K}')
+    args = parser.parse_args(argv)
+
+    data_dir = Path(args.data_dir)
+    model_dir = Path(args.model_dir) if args.model_dir else data_dir / 'models'
+    datasets = load_yearly_datasets(data_dir)
+    if not datasets:
+        print("Tidak ada file dataset_YYYY.csv.", file=sys.stderr)
+        return 1
+
+    models = fit_all(datasets, range(1, args.k_max + 1), n_jobs=args.n_jobs)
+    save_models(models, model_dir)
+    print(elbow_table(models).pivot(index='k', columns='Tahun', values='Inertia').round(3).to_string())
+    if args.export:
+        export_clusters(datasets, models, data_dir)
+        print(f"cluster_YYYY.csv ditulis ulang untuk tahun {', '.join(map(str, sorted(datasets)))}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Tata letak memori ringkas untuk frame dashboard.
+
+Semua frame yang dimuat (dataset_final, cluster_all, tabel fakta, kubus)
+melewati ``compact_frame``:
+
+- dimensi ``Kabupaten_Kota``/``Komoditas`` menjadi kategori dengan kategori
+  terurut, sehingga nama wilayah/komoditas hanya disimpan sekali;
+- ``Tahun`` menjadi int16 dan ``Cluster`` int8, kolom bilangan bulat lain
+  di-downcast ke integer terkecil yang cukup;
+- kolom float menjadi float32 hanya bila semua nilainya dapat diwakili
+  tepat (bilangan bulat s.d. 2**24 selalu aman); bila tidak, tetap float64.
+
+Filter pada kolom kategori dijalankan atas kode integer (``isin_mask``,
+``eq_mask``), bukan perbandingan string per baris.
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLUMNS = ['Kabupaten_Kota', 'Komoditas']
+INTEGER_COLUMNS = {'Tahun': np.int16, 'Cluster': np.int8}
+FLOAT32_EXACT_LIMIT = 2 ** 24
+
+
+def as_category(series):
+    """Kolom kategori dengan kategori terurut tanpa kategori yang tidak terpakai."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.cat.remove_unused_categories()
+        categories = series.cat.categories
+        if not categories.is_monotonic_increasing:
+            series = series.cat.reorder_categories(categories.sort_values())
+        return series
+    values = series.astype(str)
+    return pd.Series(pd.Categorical(values, categories=sorted(values.unique())), index=series.index, name=series.name)
+
+
+def fits_float32(values):
+    """True bila semua nilai hingga dapat disimpan sebagai float32 tanpa perubahan."""
+    values = np.asarray(values, dtype=np.float64)
+    finite = values[np.isfinite(values)]
+    if finite.size == 0 or np.abs(finite).max() <= FLOAT32_EXACT_LIMIT and np.all(finite == np.round(finite)):
+        return True
+    return np.array_equal(finite.astype(np.float32).astype(np.float64), finite)
+
+
+def _fits_integer(series, dtype):
+    info = np.iinfo(dtype)
+    return series.notna().all() and (series.empty or (info.min <= series.min() and series.max() <= info.max))
+
+
+def compact_column(name, series):
+    if name in CATEGORY_COLUMNS:
+        return as_category(series)
+    if name in INTEGER_COLUMNS and pd.api.types.is_numeric_dtype(series) and _fits_integer(series, INTEGER_COLUMNS[name]):
+        return series.astype(INTEGER_COLUMNS[name])
+    if pd.api.types.is_float_dtype(series) and series.dtype != np.float32 and fits_float32(series):
+        return series.astype(np.float32)
+    if pd.api.types.is_integer_dtype(series) and not isinstance(series.dtype, pd.CategoricalDtype):
+        return pd.to_numeric(series, downcast='integer')
+    return series
+
+
+def compact_frame(df):
+    """Salinan ``df`` dengan tipe kolom seringkas mungkin tanpa mengubah nilainya."""
+    return pd.DataFrame({col: compact_column(col, df[col]) for col in df.columns}, index=df.index)
+
+
+def category_codes(categories, values):
+    """Kode integer untuk ``values`` pada ``categories``; nilai yang tidak ada diabaikan."""
+    codes = pd.Index(categories).get_indexer(list(values))
+    return codes[codes >= 0]
+
+
+def isin_mask(values, wanted):
+    """Mask boolean ``values in wanted``; untuk kategori dibandingkan lewat kodenya."""
+    if isinstance(values, pd.Series):
+        values = values.array
+    if isinstance(values, (pd.Categorical, pd.CategoricalIndex)):
+        return np.isin(np.asarray(values.codes), category_codes(values.categories, wanted))
+    return pd.Index(values).isin(list(wanted))
+
+
+def eq_mask(values, value):
+    """Mask boolean ``values == value`` (kode kategori bila berlaku)."""
+    return isin_mask(values, [value])
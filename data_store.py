@@ -0,0 +1,378 @@
+"""Pemuatan data dashboard dengan snapshot kolumnar di disk.
+
+File CSV tetap menjadi sumber kebenaran. Hasil parsing dan pembersihan nama
+kolom disimpan sebagai file Feather (Arrow IPC, tanpa kompresi) di
+``.cache/snapshot/<versi>/`` sehingga proses Streamlit baru cukup
+me-memory-map snapshot tersebut. Versi data diturunkan dari hash isi CSV;
+mtime dan ukuran file hanya dipakai sebagai jalan pintas agar hash tidak
+dihitung ulang selama file tidak berubah.
+
+Kolom numerik dibaca tanpa salinan (``split_blocks``), sehingga datanya
+tetap berupa halaman file yang di-mmap dan dibagi semua proses worker lewat
+page cache. Bila ``loader.py`` berjalan, ia menerbitkan versi aktif di file
+``CURRENT`` (diganti secara atomik); worker cukup membaca penunjuk itu
+(``active_version``) tanpa meng-hash CSV maupun membangun snapshot sendiri.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from data_model import compact_frame
+from regions import ID_COLUMN, NAME_COLUMN, REGIONS_FILE, RegionIndex, load_region_table
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow opsional
+    feather = None
+
+BASE_DIR = Path(__file__).resolve().parent
+CACHE_DIR = BASE_DIR / ".cache" / "snapshot"
+MANIFEST_NAME = "manifest.json"
+CURRENT_NAME = "CURRENT"
+# Dinaikkan bila tata letak kolom snapshot berubah agar snapshot lama tidak terbaca
+SNAPSHOT_FORMAT = 3
+KEEP_SNAPSHOTS = 2
+
+DATASET_FINAL = 'dataset_final.csv'
+CLUSTER_PATTERN = 'cluster_[0-9][0-9][0-9][0-9].csv'
+
+
+class SnapshotUnavailable(LookupError):
+    """Snapshot versi yang diminta tidak ada dan CSV saat ini menghasilkan versi lain.
+
+    ``loaded`` adalah versi yang dibangun dari CSV saat ini; pemanggil
+    sebaiknya membaca ulang ``active_version()`` lalu memuat versi itu.
+    """
+
+    def __init__(self, version, loaded):
+        super().__init__(f"Snapshot versi {version} tidak ada (CSV saat ini: versi {loaded})")
+        self.version = version
+        self.loaded = loaded
+
+
+def clean_column_name(col_name):
+    col_name = str(col_name).strip()
+    col_name = col_name.replace(' ', '_').replace('/', '_').replace('(', '').replace(')', '')
+    col_name = col_name.replace('_kilogram', '').replace('_Kg', '').replace('_meter_persegi', '').replace('_M2', '').replace('_pohon', '').replace('_Pohon', '').replace('__', '_')
+    return col_name
+
+
+def discover_data_files(base_dir=BASE_DIR):
+    """Mapping nama data -> file CSV; tahun klaster dibaca dari nama file."""
+    data_files = {'dataset_final': DATASET_FINAL}
+    if (Path(base_dir) / REGIONS_FILE).exists():
+        data_files['regions'] = REGIONS_FILE
+    for path in sorted(Path(base_dir).glob(CLUSTER_PATTERN)):
+        data_files[path.stem] = path.name
+    return data_files
+
+
+def prepare_cluster_frame(df_cluster_temp):
+    """Membersihkan satu file cluster_YYYY: nama kolom, kolom Cluster, dan tipe angka."""
+    df_cluster_temp = df_cluster_temp.copy()
+    df_cluster_temp.columns = [clean_column_name(col) for col in df_cluster_temp.columns]
+
+    # Menemukan kolom klaster yang benar (Cluster_YYYY)
+    cluster_col_name = [col for col in df_cluster_temp.columns if 'Cluster' in col and df_cluster_temp.columns.get_loc(col) == df_cluster_temp.shape[1]-1][0]
+    df_cluster_temp = df_cluster_temp.rename(columns={cluster_col_name: 'Cluster'})
+
+    for col in ['Produksi_Total', 'LuasPanen_Total', 'Cluster']:
+        if col in df_cluster_temp.columns:
+            df_cluster_temp[col] = pd.to_numeric(df_cluster_temp[col], errors='coerce').fillna(0).astype(int)
+    return df_cluster_temp
+
+
+def read_sources(base_dir=BASE_DIR):
+    """Membaca CSV sumber dan membersihkan nama kolom (tanpa snapshot)."""
+    base_dir = Path(base_dir)
+    data_files = discover_data_files(base_dir)
+    data = {}
+
+    # dataset_final wajib ada; error diteruskan ke pemanggil
+    df_final = pd.read_csv(base_dir / data_files['dataset_final'])
+    df_final.columns = [clean_column_name(col) for col in df_final.columns]
+    data['dataset_final'] = compact_frame(df_final)
+
+    # Load and combine cluster data
+    cluster_dfs = []
+    for name, file in data_files.items():
+        if not name.startswith('cluster_'):
+            continue
+        try:
+            cluster_dfs.append(prepare_cluster_frame(pd.read_csv(base_dir / file)))
+        except Exception:
+            pass
+
+    if cluster_dfs:
+        data['cluster_all'] = compact_frame(pd.concat(cluster_dfs, ignore_index=True))
+
+    return attach_regions(data, base_dir)
+
+
+def attach_regions(data, base_dir=BASE_DIR):
+    """Menambahkan tabel wilayah (``regions``) dan kolom ``Kode_Wilayah`` ke setiap frame.
+
+    Kode ``-1`` menandai baris sampah; frame yang sudah punya kolom kode
+    dihitung ulang sehingga aman dipanggil untuk data gabungan.
+    """
+    table = load_region_table(base_dir, data['dataset_final'][NAME_COLUMN].unique())
+    index = RegionIndex(table)
+    data['regions'] = table
+    for name in ('dataset_final', 'cluster_all'):
+        if name in data:
+            df = data[name].drop(columns=ID_COLUMN, errors='ignore')
+            df.insert(0, ID_COLUMN, index.codes(df[NAME_COLUMN]))
+            data[name] = df
+    return data
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(Path(cache_dir) / MANIFEST_NAME) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json_atomic(path, payload):
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, 'w') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _remember_fingerprint(cache_dir, version, fingerprint):
+    """Menyimpan sidik jari terakhir agar rerun berikutnya tidak menghitung hash."""
+    if _read_manifest(cache_dir).get('files') == fingerprint:
+        return
+    try:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        _write_json_atomic(Path(cache_dir) / MANIFEST_NAME, {'version': version, 'files': fingerprint})
+    except OSError:
+        pass
+
+
+def source_fingerprint(base_dir=BASE_DIR, cache_dir=CACHE_DIR):
+    """Sidik jari CSV sumber: mtime, ukuran, dan sha256 per file.
+
+    Hash lama dipakai ulang bila mtime dan ukuran file tidak berubah.
+    """
+    base_dir = Path(base_dir)
+    known = _read_manifest(cache_dir).get('files', {})
+    files = {}
+    for name in sorted(discover_data_files(base_dir).values()):
+        path = base_dir / name
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        entry = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+        previous = known.get(name)
+        if previous and all(previous.get(k) == v for k, v in entry.items()):
+            entry['sha256'] = previous['sha256']
+        else:
+            entry['sha256'] = _file_digest(path)
+        files[name] = entry
+    return files
+
+
+def data_version(fingerprint):
+    """Versi data: hash gabungan dari hash isi setiap CSV dan format snapshot."""
+    digest = hashlib.sha256(f"format:{SNAPSHOT_FORMAT}\n".encode())
+    for name in sorted(fingerprint):
+        digest.update(f"{name}:{fingerprint[name]['sha256']}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def current_data_version(base_dir=BASE_DIR, cache_dir=CACHE_DIR):
+    """Versi data saat ini; murah dipanggil pada setiap rerun."""
+    fingerprint = source_fingerprint(base_dir, cache_dir)
+    version = data_version(fingerprint)
+    _remember_fingerprint(cache_dir, version, fingerprint)
+    return version
+
+
+def _read_feather(path):
+    # split_blocks: kolom numerik tanpa null menjadi view read-only ke file yang di-mmap
+    return feather.read_table(path, memory_map=True).to_pandas(split_blocks=True)
+
+
+def _write_feather_atomic(df, path):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    os.close(fd)
+    try:
+        # Tanpa kompresi agar bisa di-memory-map langsung
+        feather.write_feather(df, tmp, compression='uncompressed')
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def read_snapshot(version, cache_dir=CACHE_DIR):
+    """Data snapshot satu versi, atau None bila snapshot belum/tidak ada."""
+    snapshot_dir = Path(cache_dir) / version
+    if feather is None or not (snapshot_dir / MANIFEST_NAME).exists():
+        return None
+    return {path.stem: _read_feather(path) for path in sorted(snapshot_dir.glob('*.feather'))}
+
+
+def _prune_snapshots(cache_dir, keep=KEEP_SNAPSHOTS):
+    """Menghapus snapshot lama; file yang sedang di-mmap tetap aman di POSIX.
+
+    Versi yang diterbitkan di ``CURRENT`` tidak pernah dihapus.
+    """
+    published = published_version(cache_dir)
+    snapshots = sorted(
+        (p for p in cache_dir.iterdir() if p.is_dir() and not p.name.startswith('.') and p.name != published),
+        key=lambda p: p.stat().st_mtime, reverse=True,
+    )
+    for old in snapshots[keep - (published is not None):]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _write_snapshot(data, cache_dir, version, fingerprint):
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(dir=cache_dir, prefix=f".{version}."))
+    try:
+        for name, df in data.items():
+            # Tanpa kompresi agar bisa di-memory-map langsung
+            feather.write_feather(df, tmp_dir / f"{name}.feather", compression='uncompressed')
+        _write_json_atomic(tmp_dir / MANIFEST_NAME, {'version': version, 'files': fingerprint})
+        os.replace(tmp_dir, cache_dir / version)
+        _prune_snapshots(cache_dir)
+    except OSError:
+        # Worker lain sudah menulis versi yang sama lebih dulu
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not (cache_dir / version / MANIFEST_NAME).exists():
+            raise
+
+
+def write_snapshot(data, base_dir=BASE_DIR, cache_dir=CACHE_DIR):
+    """Menyimpan ``data`` sebagai snapshot untuk versi CSV saat ini.
+
+    Dipakai oleh ingest agar snapshot versi baru dapat disusun dari snapshot
+    lama ditambah tahun baru, tanpa mem-parsing ulang seluruh CSV.
+    """
+    cache_dir = Path(cache_dir)
+    fingerprint = source_fingerprint(base_dir, cache_dir)
+    version = data_version(fingerprint)
+    if feather is not None and not (cache_dir / version / MANIFEST_NAME).exists():
+        _write_snapshot(data, cache_dir, version, fingerprint)
+        _remember_fingerprint(cache_dir, version, fingerprint)
+    return version
+
+
+def read_derived(version, name, cache_dir=CACHE_DIR):
+    """Turunan data satu versi yang sudah tersimpan, atau None."""
+    path = Path(cache_dir) / version / 'derived' / f"{name}.feather"
+    if feather is None or not path.exists():
+        return None
+    return _read_feather(path)
+
+
+def write_derived(version, name, df, cache_dir=CACHE_DIR):
+    """Menyimpan turunan data bila snapshot versinya ada; error I/O diabaikan."""
+    snapshot_dir = Path(cache_dir) / version
+    if feather is None or not snapshot_dir.exists():
+        return
+    try:
+        (snapshot_dir / 'derived').mkdir(exist_ok=True)
+        _write_feather_atomic(df, snapshot_dir / 'derived' / f"{name}.feather")
+    except OSError:
+        pass
+
+
+def load_derived(version, name, build, cache_dir=CACHE_DIR):
+    """Memuat turunan data (tabel fakta, agregat) milik satu versi snapshot.
+
+    ``build`` dipanggil sekali bila turunan belum ada di disk; hasilnya
+    disimpan di ``<snapshot>/derived/<name>.feather`` untuk proses berikutnya.
+    """
+    df = read_derived(version, name, cache_dir)
+    if df is None:
+        df = build()
+        write_derived(version, name, df, cache_dir)
+    return df
+
+
+def published_version(cache_dir=CACHE_DIR):
+    """Versi yang diterbitkan ``loader.py`` di ``CURRENT``, atau None."""
+    try:
+        version = (Path(cache_dir) / CURRENT_NAME).read_text().strip()
+    except OSError:
+        return None
+    return version or None
+
+
+def publish_version(version, cache_dir=CACHE_DIR):
+    """Menjadikan ``version`` versi aktif semua worker (penggantian file atomik)."""
+    cache_dir = Path(cache_dir)
+    if not (cache_dir / version / MANIFEST_NAME).exists():
+        raise FileNotFoundError(f"Snapshot versi {version} tidak ada di {cache_dir}")
+    path = cache_dir / CURRENT_NAME
+    fd, tmp = tempfile.mkstemp(dir=cache_dir, prefix=f".{CURRENT_NAME}.")
+    with os.fdopen(fd, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp, path)
+
+
+def active_version(base_dir=BASE_DIR, cache_dir=CACHE_DIR):
+    """Versi yang dipakai dashboard: versi terbitan bila ada, selain itu versi CSV saat ini."""
+    version = published_version(cache_dir)
+    if version is not None and (Path(cache_dir) / version / MANIFEST_NAME).exists():
+        return version
+    return current_data_version(base_dir, cache_dir)
+
+
+def load_version(version, base_dir=BASE_DIR, cache_dir=CACHE_DIR):
+    """Data snapshot ``version``; bila belum ada, snapshot CSV saat ini dibangun dan dimuat.
+
+    Bila CSV saat ini menghasilkan versi lain (snapshot terbitan sudah
+    dipangkas, atau CSV berubah), ``SnapshotUnavailable`` dilempar agar data
+    tidak disimpan di bawah kunci versi yang salah.
+    """
+    data = read_snapshot(version, cache_dir)
+    if data is None:
+        data, loaded = load_snapshot(base_dir, cache_dir)
+        if loaded != version:
+            raise SnapshotUnavailable(version, loaded)
+    return data
+
+
+def load_snapshot(base_dir=BASE_DIR, cache_dir=CACHE_DIR):
+    """Memuat data dari snapshot Feather, membangunnya ulang bila CSV berubah.
+
+    Mengembalikan tuple ``(data, version)``. Tanpa pyarrow, atau bila
+    direktori cache tidak dapat ditulis, data dibaca langsung dari CSV.
+    """
+    cache_dir = Path(cache_dir)
+    fingerprint = source_fingerprint(base_dir, cache_dir)
+    version = data_version(fingerprint)
+    if feather is None:
+        return read_sources(base_dir), version
+
+    data = read_snapshot(version, cache_dir)
+    if data is None:
+        data = read_sources(base_dir)
+        try:
+            _write_snapshot(data, cache_dir, version, fingerprint)
+        except OSError:
+            return data, version
+
+    _remember_fingerprint(cache_dir, version, fingerprint)
+    return data, version
@@ -0,0 +1,228 @@
+"""Tabel fakta format long dan kubus agregat per versi data.
+
+Tabel fakta berisi satu baris per (Tahun, Kabupaten_Kota, Komoditas) untuk
+kabupaten/kota saja (baris sampah dan total provinsi tidak ikut), dengan
+kode wilayah ``Kode_Wilayah`` dari ``regions.py`` dan dimensi bertipe kategori. Kubus agregat menyimpan jumlah dan rata-rata pada
+tingkat (Tahun, Kabupaten_Kota, Komoditas) beserta rollup per tahun dan per
+(Tahun, Komoditas), sehingga metrik di setiap tab cukup berupa lookup.
+"""
+import numpy as np
+import pandas as pd
+
+from data_model import as_category, compact_frame
+from regions import ID_COLUMN, RegionIndex, derive_region_table, is_junk
+
+DIMENSIONS = ['Tahun', 'Kabupaten_Kota', 'Komoditas']
+COMPARE_COLUMNS = ['Komoditas', 'Total_Produksi_Kg', 'Total_Luas_Panen', 'Rata_rata_Efisiensi']
+
+
+def drop_junk_rows(df_final):
+    """Membuang baris "sampah" (Angka sementara, dll) dari dataset_final."""
+    if ID_COLUMN in df_final.columns:
+        return df_final[df_final[ID_COLUMN].to_numpy() >= 0]
+    names = df_final['Kabupaten_Kota']
+    return df_final[~names.map(is_junk).to_numpy(dtype=bool)]
+
+
+def _numeric_block(df, cols):
+    """Blok float64 (baris x kolom) dengan nilai non-numerik/NaN menjadi 0."""
+    block = df[cols]
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in block.dtypes):
+        block = block.apply(pd.to_numeric, errors='coerce')
+    values = block.to_numpy(dtype=np.float64)
+    # np.where membuat salinan sehingga df_final tidak ikut berubah
+    return np.where(np.isnan(values), 0.0, values)
+
+
+def preprocess_biofarmaka_data(df_final):
+    """Melakukan pivoting dan pembersihan untuk data komoditas, termasuk menghitung efisiensi.
+
+    Kolom ``Produksi_*`` dan ``Luas_Panen_*`` dipasangkan per komoditas lalu
+    kedua blok NumPy-nya ditumpuk sekaligus; karena keduanya sudah sejajar
+    per baris, tidak perlu melt terpisah maupun join.
+    """
+    prod_map = {col.replace('Produksi_', ''): col for col in df_final.columns if 'Produksi_' in col}
+    luas_map = {col.replace('Luas_Panen_', ''): col for col in df_final.columns if 'Luas_Panen_' in col}
+    common_komoditas = sorted(set(prod_map) & set(luas_map))
+
+    n_rows, n_komoditas = len(df_final), len(common_komoditas)
+    produksi = _numeric_block(df_final, [prod_map[k] for k in common_komoditas])
+    luas = _numeric_block(df_final, [luas_map[k] for k in common_komoditas])
+
+    # Urutan kolom-mayor (per komoditas), sama seperti hasil melt
+    produksi = produksi.ravel(order='F')
+    luas = luas.ravel(order='F')
+
+    # HITUNG METRIK BARU: Efisiensi Produksi (Kg/M2)
+    efisiensi = np.zeros_like(produksi)
+    np.divide(produksi, luas, out=efisiensi, where=luas > 0)
+
+    kabupaten_kota = df_final['Kabupaten_Kota']
+    if isinstance(kabupaten_kota.dtype, pd.CategoricalDtype):
+        # Ulangi kode integernya saja, bukan string nama wilayah
+        kabupaten_kota = pd.Categorical.from_codes(
+            np.tile(kabupaten_kota.cat.codes.to_numpy(), n_komoditas), dtype=kabupaten_kota.dtype
+        )
+    else:
+        kabupaten_kota = np.tile(kabupaten_kota.to_numpy(), n_komoditas)
+
+    columns = {}
+    if ID_COLUMN in df_final.columns:
+        columns[ID_COLUMN] = np.tile(df_final[ID_COLUMN].to_numpy(), n_komoditas)
+    return pd.DataFrame({
+        **columns,
+        'Kabupaten_Kota': kabupaten_kota,
+        'Tahun': np.tile(df_final['Tahun'].to_numpy(), n_komoditas),
+        'Komoditas': pd.Categorical.from_codes(
+            np.repeat(np.arange(n_komoditas), n_rows), categories=common_komoditas
+        ),
+        'Produksi_Kg': produksi,
+        'Luas_Panen': luas,
+        'Efisiensi_Kg_per_M2': efisiensi,
+    })
+
+
+def _categorize_dimensions(df):
+    """Dimensi kategori terurut dan tipe ringkas (``data_model``), baris terurut per dimensi."""
+    for col in ['Kabupaten_Kota', 'Komoditas']:
+        df[col] = as_category(df[col])
+    return compact_frame(df.sort_values(DIMENSIONS, ignore_index=True))
+
+
+def build_fact_table(df_final, regions=None):
+    """Tabel fakta long untuk kabupaten/kota, berkode wilayah dan berdimensi kategori.
+
+    ``regions`` adalah tabel wilayah (``regions.py``); tanpa tabel, dimensi
+    wilayah diturunkan dari nama di ``df_final``. Nama wilayah diganti nama
+    kanoniknya sehingga ejaan berbeda untuk kode yang sama tergabung.
+    """
+    if regions is None:
+        regions = derive_region_table(df_final['Kabupaten_Kota'].unique())
+    index = RegionIndex(regions)
+    codes = index.codes(df_final['Kabupaten_Kota'])
+    keep = np.isin(codes, index.region_codes)
+    df_regions = df_final[keep].drop(columns=ID_COLUMN, errors='ignore')
+    df_regions.insert(0, ID_COLUMN, codes[keep])
+    df_regions['Kabupaten_Kota'] = index.names_for(codes[keep])
+    return _categorize_dimensions(preprocess_biofarmaka_data(df_regions))
+
+
+def concat_partitions(frames):
+    """Menggabungkan partisi tabel fakta atau kubus yang berbeda tahun.
+
+    Semua baris fakta maupun kubus hanya bergantung pada tahunnya sendiri,
+    sehingga menambah satu tahun cukup dengan menyambung partisinya.
+    """
+    return _categorize_dimensions(pd.concat(frames, ignore_index=True))
+
+
+def build_cube(fact):
+    """Jumlah dan rata-rata per (Tahun, Kabupaten_Kota, Komoditas).
+
+    Rata-rata efisiensi disimpan sebagai jumlah dan cacah baris supaya dapat
+    digabung ulang dengan benar pada rollup yang lebih kasar.
+    """
+    # Penjumlahan dalam float64 agar total tidak kehilangan presisi float32
+    measures = fact[['Produksi_Kg', 'Luas_Panen', 'Efisiensi_Kg_per_M2']].astype(np.float64)
+    keys = [fact[col] for col in DIMENSIONS] + [fact[ID_COLUMN]]
+    cube = measures.groupby(keys, observed=True, sort=True).agg(
+        Produksi_Kg=('Produksi_Kg', 'sum'),
+        Luas_Panen=('Luas_Panen', 'sum'),
+        Efisiensi_Sum=('Efisiensi_Kg_per_M2', 'sum'),
+        N=('Efisiensi_Kg_per_M2', 'size'),
+    ).reset_index()
+    cube['Efisiensi_Mean'] = cube['Efisiensi_Sum'] / cube['N']
+    return compact_frame(cube)
+
+
+def _rollup(cube, keys):
+    measures = cube[['Produksi_Kg', 'Luas_Panen', 'Efisiensi_Sum', 'N']].astype(np.float64)
+    rolled = measures.groupby([cube[key] for key in keys], observed=True, sort=True).sum()
+    rolled['Efisiensi_Mean'] = rolled['Efisiensi_Sum'] / rolled['N']
+    return rolled
+
+
+def _as_compare(frame):
+    """Mengubah potongan kubus ke bentuk tabel perbandingan komoditas (df_compare)."""
+    return pd.DataFrame({
+        'Komoditas': frame['Komoditas'].astype(str).to_numpy(),
+        'Total_Produksi_Kg': frame['Produksi_Kg'].to_numpy(dtype=np.float64),
+        'Total_Luas_Panen': frame['Luas_Panen'].to_numpy(dtype=np.float64),
+        'Rata_rata_Efisiensi': frame['Efisiensi_Mean'].to_numpy(dtype=np.float64),
+    }, columns=COMPARE_COLUMNS)
+
+
+class AggregateCube:
+    """Lookup metrik tab dari kubus agregat yang sudah dihitung."""
+
+    def __init__(self, cube):
+        self.cube = cube
+        # Lookup per wilayah memakai indeks kode wilayah, bukan perbandingan nama
+        self._cells = cube.set_index(['Tahun', ID_COLUMN]).sort_index()
+        self._year = _rollup(cube, ['Tahun'])
+        self._year_komoditas = {
+            year: _as_compare(frame.reset_index())
+            for year, frame in _rollup(cube, ['Tahun', 'Komoditas']).groupby(level='Tahun', sort=True)
+        }
+        self._trend = cube.set_index(['Komoditas', ID_COLUMN]).sort_index()
+        self._year_region = _rollup(cube, ['Tahun', ID_COLUMN, 'Kabupaten_Kota'])
+
+    @property
+    def years(self):
+        return self._year.index.tolist()
+
+    def year_totals(self, year):
+        """Total produksi, total luas panen, dan rata-rata efisiensi satu tahun."""
+        if year not in self._year.index:
+            return {'total_produksi': 0.0, 'total_luas_panen': 0.0, 'avg_efficiency': np.nan}
+        row = self._year.loc[year]
+        return {
+            'total_produksi': row['Produksi_Kg'],
+            'total_luas_panen': row['Luas_Panen'],
+            'avg_efficiency': row['Efisiensi_Mean'],
+        }
+
+    def year_summary(self, year):
+        """``year_totals`` ditambah pertumbuhan produksi YoY (%) terhadap tahun sebelumnya."""
+        summary = self.year_totals(year)
+        prev_production = self.year_totals(year - 1)['total_produksi']
+        summary['prev_total_produksi'] = prev_production
+        summary['produksi_yoy'] = (
+            (summary['total_produksi'] - prev_production) / prev_production * 100 if prev_production else 0.0
+        )
+        return summary
+
+    def commodity_summary(self, year, region_code=None):
+        """Tabel per komoditas untuk satu tahun, opsional untuk satu kode wilayah."""
+        if region_code is None:
+            summary = self._year_komoditas.get(year)
+            return summary.copy() if summary is not None else _as_compare(self.cube.iloc[:0])
+        try:
+            # Daftar kunci: tetap DataFrame walau wilayah hanya punya satu baris komoditas
+            cells = self._cells.loc[[(year, region_code)]]
+        except KeyError:
+            return _as_compare(self.cube.iloc[:0])
+        return _as_compare(cells)
+
+    def region_summary(self, year):
+        """Total produksi, luas panen, dan rata-rata efisiensi per kode wilayah untuk satu tahun."""
+        columns = [ID_COLUMN, 'Kabupaten_Kota', 'Total_Produksi_Kg', 'Total_Luas_Panen', 'Rata_rata_Efisiensi']
+        if year not in self._year_region.index.get_level_values('Tahun'):
+            return pd.DataFrame(columns=columns)
+        rows = self._year_region.loc[year].reset_index()
+        return pd.DataFrame({
+            ID_COLUMN: rows[ID_COLUMN].to_numpy(),
+            'Kabupaten_Kota': rows['Kabupaten_Kota'].astype(str).to_numpy(),
+            'Total_Produksi_Kg': rows['Produksi_Kg'].to_numpy(dtype=np.float64),
+            'Total_Luas_Panen': rows['Luas_Panen'].to_numpy(dtype=np.float64),
+            'Rata_rata_Efisiensi': rows['Efisiensi_Mean'].to_numpy(dtype=np.float64),
+        }, columns=columns)
+
+    def trend(self, komoditas, region_codes):
+        """Produksi per (Tahun, Kabupaten_Kota) untuk satu komoditas dan beberapa kode wilayah."""
+        try:
+            rows = self._trend.loc[komoditas]
+        except KeyError:
+            return pd.DataFrame(columns=['Tahun', 'Kabupaten_Kota', 'Produksi_Kg'])
+        rows = rows[rows.index.isin(list(region_codes))]
+        return rows.reset_index()[['Tahun', 'Kabupaten_Kota', 'Produksi_Kg']].sort_values(['Tahun', 'Kabupaten_Kota'], ignore_index=True)
@@ -0,0 +1,218 @@
+"""Pembuat figur Plotly dashboard dan cache LRU untuk figur terserialisasi.
+
+Kunci cache terdiri dari jenis grafik, versi data, template tema, dan nilai
+filter yang relevan untuk grafik tersebut. Figur disimpan sebagai JSON
+sehingga satu entri aman dipakai bersama oleh banyak sesi.
+"""
+import threading
+from collections import OrderedDict
+
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+
+import perf
+from regions import ID_COLUMN
+
+DEFAULT_MAXSIZE = 256
+
+
+def figure_key(kind, data_version, template, **filters):
+    """Kunci cache yang hashable; list/set pada filter diubah menjadi tuple."""
+    normalized = tuple(
+        (name, tuple(value) if isinstance(value, (list, set, tuple)) else value)
+        for name, value in sorted(filters.items())
+    )
+    return (kind, data_version, template, normalized)
+
+
+class FigureCache:
+    """Cache LRU berbatas untuk JSON figur Plotly, dengan penghitung hit/miss."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Kunci yang sedang dibangun -> Event, agar satu figur tidak dibangun dua kali bersamaan
+        self._building = {}
+        self._lock = threading.Lock()
+
+    def get_json(self, key, build):
+        """JSON figur untuk ``key``; ``build()`` dipanggil hanya saat miss."""
+        with perf.stage(f"figure:{key[0]}", cache=True):
+            return self._get_json(key, build)
+
+    def _get_json(self, key, build):
+        while True:
+            with self._lock:
+                fig_json = self._entries.get(key)
+                if fig_json is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return fig_json
+                building = self._building.get(key)
+                if building is None:
+                    building = self._building[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # Figur yang sama sedang dibangun thread lain (mis. prefetch): tunggu hasilnya
+            building.wait()
+
+        try:
+            perf.mark_miss()
+            with perf.stage('plotly_build'):
+                fig = build()
+            with perf.stage('plotly_to_json'):
+                fig_json = fig.to_json()
+            with self._lock:
+                self._entries[key] = fig_json
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            return fig_json
+        finally:
+            with self._lock:
+                self._building.pop(key).set()
+
+    def contains(self, key):
+        """True bila ``key`` sudah ada di cache (tanpa mengubah urutan LRU maupun statistik)."""
+        with self._lock:
+            return key in self._entries
+
+    def get_figure(self, key, build):
+        fig_json = self.get_json(key, build)
+        with perf.stage('plotly_from_json'):
+            return pio.from_json(fig_json, skip_invalid=True)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def trend_figure(df_trend_agg, komoditas, year_range, template, df_forecast=None):
+    """Tren produksi per wilayah; ``df_forecast`` (``Forecast.trend``) menambah proyeksi dan intervalnya."""
+    title = f'Perkembangan Produksi {komoditas} ({year_range})'
+    if df_forecast is not None and not df_forecast.empty:
+        title = f'Perkembangan dan Proyeksi Produksi {komoditas} ({year_range}, proyeksi s.d. {df_forecast["Tahun"].max()})'
+    fig = px.line(
+        df_trend_agg, x='Tahun', y='Produksi_Kg', color='Kabupaten_Kota',
+        title=title,
+        labels={'Produksi_Kg': 'Produksi (Kg)', 'Tahun': 'Tahun'},
+        markers=True, template=template
+    )
+    if df_forecast is not None and not df_forecast.empty:
+        _add_forecast_traces(fig, df_trend_agg, df_forecast)
+    return fig
+
+
+def _add_forecast_traces(fig, df_trend_agg, df_forecast):
+    """Garis putus-putus dari titik aktual terakhir ke proyeksi, plus pita interval."""
+    colors = {trace.name: trace.line.color for trace in fig.data}
+    for name, df_region in df_forecast.groupby('Kabupaten_Kota', observed=True, sort=False):
+        color = colors.get(name)
+        if color is None:
+            continue
+        df_actual = df_trend_agg[df_trend_agg['Kabupaten_Kota'] == name].sort_values('Tahun')
+        # Pita dan garis proyeksi berawal dari titik aktual terakhir
+        last_year = df_actual['Tahun'].tolist()[-1:]
+        last_value = df_actual['Produksi_Kg'].tolist()[-1:]
+        years = last_year + df_region['Tahun'].tolist()
+        if df_region['Produksi_Kg_Atas'].notna().all():
+            lower = last_value + df_region['Produksi_Kg_Bawah'].tolist()
+            upper = last_value + df_region['Produksi_Kg_Atas'].tolist()
+            fig.add_trace(go.Scatter(
+                x=years + years[::-1], y=upper + lower[::-1], fill='toself', fillcolor=color, opacity=0.15,
+                line={'width': 0}, hoverinfo='skip', legendgroup=name, showlegend=False,
+            ))
+        fig.add_trace(go.Scatter(
+            x=years, y=last_value + df_region['Produksi_Kg'].tolist(),
+            mode='lines+markers', line={'color': color, 'dash': 'dash'}, marker={'symbol': 'circle-open'},
+            name=f'{name} (proyeksi)', legendgroup=name, showlegend=False,
+            hovertemplate='Proyeksi %{x}: %{y:,.0f} Kg<extra>' + name + '</extra>',
+        ))
+
+
+def cluster_scatter_figure(df_cluster_year, template):
+    return px.scatter(
+        df_cluster_year, x='LuasPanen_Total', y='Produksi_Total',
+        color='Cluster',
+        hover_data=['Kabupaten_Kota', 'Produksi_Total', 'LuasPanen_Total'],
+        title='Klastering Wilayah Biofarmaka',
+        labels={'LuasPanen_Total': 'Luas Panen Total (M2/Pohon)', 'Produksi_Total': 'Produksi Total (Kg)'},
+        color_continuous_scale=px.colors.qualitative.Antique,
+        template=template
+    )
+
+
+def cluster_box_figure(df_cluster_year, template):
+    return px.box(
+        df_cluster_year,
+        x='Cluster',
+        y='Produksi_Total',
+        color='Cluster',
+        title='Distribusi Produksi Total Berdasarkan Klaster',
+        labels={'Produksi_Total': 'Produksi Total (Kg)', 'Cluster': 'Kategori Klaster'},
+        template=template
+    )
+
+
+def cluster_history_figure(df_history, kabupaten_kota, year_range, k, template):
+    fig_history = px.line(
+        df_history, x='Tahun', y='Cluster',
+        title=f'Perubahan Kategori Klaster {kabupaten_kota} ({year_range})',
+        labels={'Cluster': f'Kategori Klaster (0=Rendah, {k - 1}=Tinggi)'},
+        markers=True, template=template
+    )
+    fig_history.update_yaxes(tick0=0, dtick=1, range=[-0.5, k - 0.5])
+    return fig_history
+
+
+def efficiency_figure(df_compare, year, template):
+    return px.scatter(
+        df_compare,
+        x='Total_Luas_Panen',
+        y='Rata_rata_Efisiensi',
+        color='Komoditas',
+        size='Total_Produksi_Kg',
+        hover_data=['Total_Produksi_Kg', 'Total_Luas_Panen'],
+        title=f'Perbandingan Efisiensi Produksi Komoditas ({year})',
+        labels={'Total_Luas_Panen': 'Total Luas Panen (Log Scale)', 'Rata_rata_Efisiensi': 'Rata-rata Efisiensi (Kg/M2)'},
+        log_x=True,
+        template=template
+    )
+
+
+def choropleth_figure(geojson, df_map, column, title, label, template, n_classes=None):
+    """Peta choropleth kabupaten/kota; id fitur ``geojson`` adalah ``Kode_Wilayah``.
+
+    Selalu satu trace, sehingga geometri hanya ada sekali di figur;
+    ``n_classes`` membuat skala warna bertingkat untuk nilai kelas 0..n-1
+    (klaster). Basemap Plotly dimatikan (``visible=False``) agar tidak ada
+    topojson yang diunduh.
+    """
+    trace = dict(
+        geojson=geojson, locations=df_map[ID_COLUMN], z=df_map[column],
+        text=df_map['Kabupaten_Kota'], hovertemplate=f'<b>%{{text}}</b><br>{label}: %{{z:,.3~f}}<extra></extra>',
+        marker_line_width=0.5, colorbar_title_text=label,
+    )
+    if n_classes:
+        colors = px.colors.qualitative.Antique
+        colorscale = []
+        for cls in range(n_classes):
+            color = colors[cls % len(colors)]
+            colorscale += [(cls / n_classes, color), ((cls + 1) / n_classes, color)]
+        trace.update(
+            colorscale=colorscale, zmin=-0.5, zmax=n_classes - 0.5,
+            colorbar_tickvals=list(range(n_classes)), hovertemplate=f'<b>%{{text}}</b><br>{label}: %{{z}}<extra></extra>',
+        )
+    else:
+        trace.update(colorscale='YlGn')
+    fig = go.Figure(go.Choropleth(**trace))
+    fig.update_geos(fitbounds='locations', visible=False)
+    fig.update_layout(title=title, template=template, margin=dict(l=0, r=0, t=50, b=0))
+    return fig
@@ -0,0 +1,118 @@
+"""Proyeksi produksi dan luas panen per (wilayah, komoditas).
+
+Setiap seri (Kode_Wilayah, Komoditas) untuk ``Produksi_Kg`` dan
+``Luas_Panen`` diberi tren linear (OLS terhadap tahun). Semua seri disusun
+sebagai satu matriks (seri x tahun) dan difit sekaligus dengan operasi
+NumPy, tanpa loop per seri. Tahun yang tidak ada di data untuk satu seri
+diabaikan (bukan dianggap 0).
+
+Interval proyeksi adalah interval prediksi OLS
+``t(df=n-2) * s * sqrt(1 + 1/n + (t0 - mean)^2 / Sxx)``; seri dengan kurang
+dari tiga tahun tidak punya interval, dan seri satu tahun diproyeksikan
+datar. Proyeksi dan batas bawahnya tidak pernah negatif.
+"""
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from data_model import compact_frame
+from regions import ID_COLUMN
+
+MEASURES = ['Produksi_Kg', 'Luas_Panen']
+HORIZON = 1
+CONFIDENCE = 0.8
+LOWER_SUFFIX = '_Bawah'
+UPPER_SUFFIX = '_Atas'
+
+
+def ols_trend(t, Y):
+    """Fit ``Y[i] ~ a[i] + b[i] * t`` untuk semua baris sekaligus; NaN diabaikan.
+
+    Mengembalikan dict berisi ``intercept``, ``slope``, ``n``, ``t_mean``,
+    ``sxx``, dan ``resid_var`` (NaN bila n < 3), masing-masing satu nilai per baris.
+    """
+    W = ~np.isnan(Y)
+    Yz = np.where(W, Y, 0.0)
+    T = np.where(W, t, 0.0)
+    n = W.sum(axis=1).astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t_mean = T.sum(axis=1) / n
+        y_mean = Yz.sum(axis=1) / n
+        dt = np.where(W, t - t_mean[:, None], 0.0)
+        sxx = (dt * dt).sum(axis=1)
+        sxy = (dt * (Yz - y_mean[:, None])).sum(axis=1)
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+        intercept = y_mean - slope * t_mean
+        resid = np.where(W, Yz - intercept[:, None] - slope[:, None] * t, 0.0)
+        resid_var = np.where(n > 2, (resid * resid).sum(axis=1) / (n - 2), np.nan)
+    return {'intercept': intercept, 'slope': slope, 'n': n, 't_mean': t_mean, 'sxx': sxx, 'resid_var': resid_var}
+
+
+def predict(fit, t0, confidence=CONFIDENCE):
+    """Nilai proyeksi dan setengah lebar interval prediksi di ``t0`` (satu nilai per seri)."""
+    mean = fit['intercept'] + fit['slope'] * t0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        leverage = 1 + 1 / fit['n'] + np.where(fit['sxx'] > 0, (t0 - fit['t_mean']) ** 2 / fit['sxx'], 0.0)
+        quantile = stats.t.ppf(0.5 + confidence / 2, np.maximum(fit['n'] - 2, 1))
+        half_width = np.where(fit['n'] > 2, quantile * np.sqrt(fit['resid_var'] * leverage), np.nan)
+    return mean, half_width
+
+
+def fit_forecasts(cube, horizon=HORIZON, confidence=CONFIDENCE):
+    """Tabel proyeksi ``horizon`` tahun setelah tahun terakhir untuk semua seri kubus.
+
+    Satu baris per (Kode_Wilayah, Komoditas, Tahun proyeksi) dengan kolom
+    ``<ukuran>``, ``<ukuran>_Bawah``, dan ``<ukuran>_Atas`` untuk setiap ukuran.
+    """
+    years = np.sort(cube['Tahun'].unique()).astype(np.int64)
+    komoditas = cube['Komoditas'].cat
+    # Kunci seri (kode wilayah, kode komoditas) digabung menjadi satu int64
+    series_key = cube[ID_COLUMN].to_numpy(dtype=np.int64) * len(komoditas.categories) + komoditas.codes.to_numpy()
+    series_id, keys = pd.factorize(series_key, sort=True)
+    first_row = np.unique(series_id, return_index=True)[1]
+    col = np.searchsorted(years, cube['Tahun'].to_numpy())
+
+    # Tahun relatif terhadap tahun terakhir agar fit stabil secara numerik
+    t = (years - years[-1]).astype(np.float64)
+    future = np.arange(1, horizon + 1)
+    n_series = len(keys)
+
+    columns = {
+        ID_COLUMN: np.repeat(cube[ID_COLUMN].to_numpy()[first_row], horizon),
+        'Kabupaten_Kota': cube['Kabupaten_Kota'].take(np.repeat(first_row, horizon)).to_numpy(),
+        'Komoditas': cube['Komoditas'].take(np.repeat(first_row, horizon)).to_numpy(),
+        'Tahun': np.tile(years[-1] + future, n_series),
+    }
+    for measure in MEASURES:
+        Y = np.full((n_series, len(years)), np.nan)
+        Y[series_id, col] = cube[measure].to_numpy(dtype=np.float64)
+        fit = ols_trend(t, Y)
+        mean, half_width = predict(fit, future[:, None].astype(np.float64), confidence)
+        # Bentuk (horizon x seri) -> urutan baris per seri lalu per tahun
+        mean, half_width = mean.T.ravel(), half_width.T.ravel()
+        columns[measure] = np.maximum(mean, 0.0)
+        columns[measure + LOWER_SUFFIX] = np.maximum(mean - half_width, 0.0)
+        columns[measure + UPPER_SUFFIX] = np.maximum(mean + half_width, 0.0)
+    return compact_frame(pd.DataFrame(columns))
+
+
+class Forecast:
+    """Lookup proyeksi per komoditas dan kode wilayah (sejalan dengan ``AggregateCube.trend``)."""
+
+    def __init__(self, forecasts):
+        self.forecasts = forecasts
+        self._trend = forecasts.set_index(['Komoditas', ID_COLUMN]).sort_index()
+
+    @property
+    def years(self):
+        return sorted(self.forecasts['Tahun'].unique().tolist())
+
+    def trend(self, komoditas, region_codes, measure='Produksi_Kg'):
+        """Proyeksi ``measure`` beserta batasnya per (Tahun, Kabupaten_Kota)."""
+        columns = ['Tahun', 'Kabupaten_Kota', measure, measure + LOWER_SUFFIX, measure + UPPER_SUFFIX]
+        try:
+            rows = self._trend.loc[komoditas]
+        except KeyError:
+            return pd.DataFrame(columns=columns)
+        rows = rows[rows.index.isin(list(region_codes))]
+        return rows.reset_index()[columns].sort_values(['Tahun', 'Kabupaten_Kota'], ignore_index=True)
@@ -0,0 +1,480 @@
+"""Geometri kabupaten/kota untuk peta choropleth, disederhanakan per tingkat detail.
+
+Batas wilayah dibaca dari GeoJSON lokal ``geo/jawa_barat_kabkota.geojson``
+(Polygon/MultiPolygon, koordinat bujur-lintang). Setiap fitur dicocokkan ke
+``Kode_Wilayah`` lewat properti kode (mis. ``Kode_Wilayah``, ``KDPKAB``,
+``ADM2_PCODE`` = ``ID3201``) atau, bila tidak ada, lewat nama wilayahnya.
+
+Untuk setiap tingkat di ``DETAIL_LEVELS`` geometri disederhanakan
+(Douglas-Peucker), koordinat dibulatkan, properti dibuang, dan ``id`` fitur
+diisi kode wilayah. Penyederhanaan berjalan per busur seperti TopoJSON: batas
+yang dipakai bersama dua wilayah disederhanakan sekali, sehingga tetangga
+tidak bercelah atau bertumpuk pada tingkat mana pun. Hasilnya disimpan
+sebagai JSON ringkas di ``.cache/geo/<hash>-<tingkat>.json``; hash mencakup
+isi GeoJSON dan tabel wilayah, jadi cache hanya dibangun ulang bila salah
+satunya berubah.
+
+Peta tidak memakai tile server maupun basemap Plotly (topojson dari CDN),
+sehingga tetap berfungsi tanpa koneksi internet.
+
+File batas wilayah dibuat dari geoBoundaries IDN ADM2 (CC BY 4.0)::
+
+    python geo.py --fetch
+
+Perintah ini mengunduh batas kabupaten/kota Indonesia, memilih 27
+kabupaten/kota Jawa Barat (gagal bila ada yang tidak ditemukan),
+menyederhanakannya sekali, lalu menulis GeoJSON beserta catatan sumber dan
+lisensinya di ``geo/SOURCE``. Batas dari sumber lain (mis. batas
+administrasi BIG, properti ``KDPKAB``/``WADMKK``) juga dapat dipakai; catat
+sumber dan lisensinya di ``geo/SOURCE``.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import urllib.request
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+
+from data_store import BASE_DIR
+from regions import ID_COLUMN, NAME_COLUMN, REGIONS_FILE, RegionIndex, read_region_table
+
+GEO_DIR = 'geo'
+GEOJSON_FILE = 'jawa_barat_kabkota.geojson'
+SOURCE_FILE = 'SOURCE'
+GEO_CACHE_DIR = BASE_DIR / '.cache' / 'geo'
+# Toleransi penyederhanaan dalam derajat (~0,001 derajat = ~110 m)
+DETAIL_LEVELS = {'Rinci': 0.0005, 'Sedang': 0.002, 'Ringkas': 0.008}
+DEFAULT_LEVEL = 'Sedang'
+COORD_DECIMALS = 4
+# Presisi kunci titik saat mencari titik yang dipakai bersama beberapa cincin (~1 cm)
+TOPOLOGY_DECIMALS = 7
+# Dinaikkan bila cara penyederhanaan berubah agar cache lama tidak terbaca
+SIMPLIFY_FORMAT = 2
+
+CODE_PROPERTIES = [ID_COLUMN, 'kode_wilayah', 'KODE', 'kode', 'KDPKAB', 'KODE_KAB', 'ADM2_PCODE', 'id']
+NAME_PROPERTIES = [NAME_COLUMN, 'WADMKK', 'NAMOBJ', 'ADM2_EN', 'NAME_2', 'shapeName', 'nama', 'name']
+
+GEOBOUNDARIES_API = 'https://www.geoboundaries.org/api/current/gbOpen/IDN/ADM2/'
+GEOBOUNDARIES_CITATION = (
+    "Runfola, D. et al. (2020) geoBoundaries: A global database of political administrative "
+    "boundaries. PLoS ONE 15(4): e0231866. https://doi.org/10.1371/journal.pone.0231866"
+)
+# Bujur/lintang min dan maks Jawa Barat: memisahkan nama kembar di provinsi lain
+JAWA_BARAT_BBOX = (106.3, -7.9, 108.9, -5.8)
+# Toleransi (derajat) dan presisi file yang disimpan; di bawah tingkat 'Rinci'
+BUNDLE_TOLERANCE = 0.0001
+BUNDLE_DECIMALS = 5
+DOWNLOAD_TIMEOUT = 120
+
+
+def geojson_path(base_dir=BASE_DIR):
+    return Path(base_dir) / GEO_DIR / GEOJSON_FILE
+
+
+def source_path(base_dir=BASE_DIR):
+    return Path(base_dir) / GEO_DIR / SOURCE_FILE
+
+
+def geojson_mtime(base_dir=BASE_DIR):
+    """mtime (ns) file GeoJSON untuk kunci cache, atau None bila file belum ada."""
+    try:
+        return geojson_path(base_dir).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _douglas_peucker(points, tolerance):
+    """Mask titik yang dipertahankan (Douglas-Peucker iteratif, tanpa rekursi)."""
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, stop = stack.pop()
+        if stop - start < 2:
+            continue
+        origin = points[start]
+        direction = points[stop] - origin
+        offsets = points[start + 1:stop] - origin
+        length = np.hypot(direction[0], direction[1])
+        if length == 0:
+            # Cincin tertutup: titik awal = titik akhir, pakai jarak ke titik tersebut
+            distance = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distance = np.abs(direction[0] * offsets[:, 1] - direction[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distance))
+        if distance[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, stop))
+    return keep
+
+
+def _polygon_parts(geometry):
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    raise ValueError(f"Jenis geometri tidak didukung: {geometry['type']!r}")
+
+
+def _open_ring(ring):
+    """Titik cincin tanpa titik penutup dan tanpa titik berurutan yang sama, beserta kunci titiknya."""
+    points = np.asarray(ring, dtype=np.float64)
+    if len(points) == 0:
+        return points.reshape(0, 2), []
+    points = points[:, :2]
+    quantized = np.round(points, TOPOLOGY_DECIMALS)
+    distinct = np.ones(len(points), dtype=bool)
+    distinct[1:] = np.any(quantized[1:] != quantized[:-1], axis=1)
+    if len(points) > 1 and np.array_equal(quantized[0], quantized[-1]):
+        distinct[-1] = False
+    return points[distinct], list(map(tuple, quantized[distinct].tolist()))
+
+
+def _junctions(rings):
+    """Titik yang tetangganya berbeda antar kemunculan: ujung busur bersama."""
+    first, junctions = {}, set()
+    for keys in rings:
+        for prev, key, following in zip(keys[-1:] + keys[:-1], keys, keys[1:] + keys[:1]):
+            pair = frozenset((prev, following))
+            if first.setdefault(key, pair) != pair:
+                junctions.add(key)
+    return junctions
+
+
+def _split_ring(keys, junctions):
+    """Potongan cincin di antara titik simpul, sebagai indeks titik (kedua ujung ikut)."""
+    n = len(keys)
+    starts = [i for i, key in enumerate(keys) if key in junctions]
+    if not starts:
+        # Cincin tanpa simpul (pulau, enklave) menjadi satu busur tertutup dari titik terkecilnya
+        start = min(range(n), key=keys.__getitem__)
+        return [[(start + i) % n for i in range(n + 1)]]
+    stops = starts[1:] + [starts[0] + n]
+    return [[i % n for i in range(start, stop + 1)] for start, stop in zip(starts, stops)]
+
+
+def _assemble_ring(refs, arcs, decimals):
+    """Cincin tertutup dari busur (dibalik bila perlu), dibulatkan; None bila degenerate."""
+    if not refs:
+        return None
+    pieces = [arcs[arc][::-1] if reverse else arcs[arc] for arc, reverse in refs]
+    points = np.round(np.concatenate([pieces[0]] + [piece[1:] for piece in pieces[1:]]), decimals)
+    # Titik berurutan yang sama setelah pembulatan dibuang
+    distinct = np.ones(len(points), dtype=bool)
+    distinct[1:] = np.any(points[1:] != points[:-1], axis=1)
+    points = points[distinct]
+    if len(points) < 4:
+        return None
+    return points.tolist()
+
+
+class Topology:
+    """Cincin poligon sekumpulan geometri yang dipecah menjadi busur bersama (seperti TopoJSON).
+
+    Batas antara dua wilayah disimpan sekali sebagai satu busur dan dirujuk
+    kedua wilayah (salah satunya dengan arah terbalik). Karena setiap busur
+    disederhanakan sekali, kedua sisi batas tetap berimpit di setiap tingkat
+    detail: tidak ada celah maupun tumpang tindih antar tetangga.
+    """
+
+    def __init__(self, geometries):
+        self._parts = [_polygon_parts(geometry) for geometry in geometries]
+        opened = [[[_open_ring(ring) for ring in polygon] for polygon in parts] for parts in self._parts]
+        junctions = _junctions([keys for shape in opened for polygon in shape for _, keys in polygon])
+        # Koordinat busur dalam arah kanonik; cincin merujuk (indeks busur, dibalik?)
+        self.arcs = []
+        index = {}
+        self._shapes = [
+            [[self._ring_refs(points, keys, junctions, index) for points, keys in polygon] for polygon in shape]
+            for shape in opened
+        ]
+
+    def _ring_refs(self, points, keys, junctions, index):
+        if not keys:
+            return []
+        refs = []
+        for positions in _split_ring(keys, junctions):
+            sequence = tuple(keys[i] for i in positions)
+            reverse = sequence[::-1] < sequence
+            canonical = sequence[::-1] if reverse else sequence
+            arc = index.get(canonical)
+            if arc is None:
+                arc = index[canonical] = len(self.arcs)
+                self.arcs.append(points[positions[::-1] if reverse else positions])
+            refs.append((arc, reverse))
+        return refs
+
+    def simplify(self, tolerance, decimals=COORD_DECIMALS):
+        """Geometri (urutan sama dengan masukan) dengan setiap busur disederhanakan sekali.
+
+        Ujung busur selalu dipertahankan. Bagian yang menjadi degenerate
+        dibuang, tetapi wilayah tidak pernah hilang: bila semua bagiannya
+        degenerate, bagian pertama dipertahankan tanpa penyederhanaan.
+        """
+        arcs = [
+            arc[_douglas_peucker(arc, tolerance)] if tolerance > 0 and len(arc) > 4 else arc
+            for arc in self.arcs
+        ]
+        geometries = []
+        for parts, shape in zip(self._parts, self._shapes):
+            polygons = [polygon for polygon in (self._polygon(rings, arcs, decimals) for rings in shape)
+                        if polygon is not None]
+            if not polygons:
+                polygons = [self._polygon(shape[0], self.arcs, decimals) or parts[0]]
+            if len(polygons) == 1:
+                geometries.append({'type': 'Polygon', 'coordinates': polygons[0]})
+            else:
+                geometries.append({'type': 'MultiPolygon', 'coordinates': polygons})
+        return geometries
+
+    @staticmethod
+    def _polygon(rings, arcs, decimals):
+        exterior = _assemble_ring(rings[0], arcs, decimals)
+        if exterior is None:
+            return None
+        holes = [hole for hole in (_assemble_ring(refs, arcs, decimals) for refs in rings[1:]) if hole is not None]
+        return [exterior] + holes
+
+
+def simplify_geometry(geometry, tolerance):
+    """Satu Polygon/MultiPolygon yang disederhanakan (lihat ``Topology.simplify``)."""
+    return Topology([geometry]).simplify(tolerance)[0]
+
+
+def _property(properties, names):
+    lowered = {str(key).casefold(): value for key, value in properties.items()}
+    for name in names:
+        value = lowered.get(name.casefold())
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def feature_code(feature, region_index):
+    """Kode wilayah fitur GeoJSON dari properti kode atau nama; None bila tidak dikenal.
+
+    Kode dengan awalan/pemisah (``ID3201``, ``32.01``) dinormalisasi ke digitnya.
+    """
+    properties = {**(feature.get('properties') or {}), 'id': feature.get('id')}
+    value = _property(properties, CODE_PROPERTIES)
+    if value is not None:
+        digits = re.sub(r'\D', '', str(value))
+        if digits and int(digits) in region_index:
+            return int(digits)
+    name = _property(properties, NAME_PROPERTIES)
+    return region_index.lookup(name) if name is not None else None
+
+
+def _write_text_atomic(path, text):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+class RegionGeometry:
+    """Batas kabupaten/kota per tingkat detail, berid ``Kode_Wilayah``.
+
+    GeoJSON hasil penyederhanaan dipakai bersama (hanya-baca) oleh semua
+    sesi; ``geojson(level)`` membangun, menyimpan, atau memuat cache sekali
+    per tingkat.
+    """
+
+    def __init__(self, source, region_table, cache_dir=GEO_CACHE_DIR):
+        self.source = Path(source)
+        self.cache_dir = Path(cache_dir)
+        self.region_index = RegionIndex(region_table)
+        raw = self.source.read_bytes()
+        digest = hashlib.sha256(raw)
+        digest.update(region_table[[ID_COLUMN, NAME_COLUMN]].to_csv(index=False).encode())
+        digest.update(f"decimals:{COORD_DECIMALS};format:{SIMPLIFY_FORMAT}".encode())
+        self.digest = digest.hexdigest()[:16]
+        self._raw = raw
+        self._topology = None
+        self._levels = {}
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.codes = []
+        self.unmatched = []
+
+    @classmethod
+    def load(cls, region_table, base_dir=BASE_DIR, cache_dir=GEO_CACHE_DIR):
+        """Geometri dari ``geo/`` di ``base_dir``, atau None bila file GeoJSON tidak ada."""
+        path = geojson_path(base_dir)
+        if not path.exists():
+            return None
+        return cls(path, region_table, cache_dir)
+
+    def _cache_path(self, level):
+        return self.cache_dir / f"{self.digest}-{level}.json"
+
+    def _matched(self):
+        """Kode, topologi busur, dan nama fitur tak dikenal; dibangun sekali untuk semua tingkat."""
+        if self._topology is None:
+            codes, geometries, unmatched = [], [], []
+            for feature in json.loads(self._raw).get('features', []):
+                geometry = feature.get('geometry')
+                code = feature_code(feature, self.region_index)
+                if code is None or geometry is None:
+                    unmatched.append(str(_property(feature.get('properties') or {}, NAME_PROPERTIES)))
+                    continue
+                codes.append(code)
+                geometries.append(geometry)
+            self._topology = codes, Topology(geometries), unmatched
+        return self._topology
+
+    def _build(self, tolerance):
+        codes, topology, unmatched = self._matched()
+        features = [
+            {'type': 'Feature', 'id': code, 'properties': {}, 'geometry': geometry}
+            for code, geometry in zip(codes, topology.simplify(tolerance))
+        ]
+        return {'type': 'FeatureCollection', 'features': features}, list(codes), list(unmatched)
+
+    def geojson(self, level=DEFAULT_LEVEL):
+        """FeatureCollection tingkat ``level``; ``id`` fitur = kode wilayah."""
+        if level not in DETAIL_LEVELS:
+            raise ValueError(f"Tingkat detail tidak dikenal: {level!r} (pilihan: {list(DETAIL_LEVELS)})")
+        with self._lock:
+            if level in self._levels:
+                return self._levels[level]
+            path = self._cache_path(level)
+            try:
+                cached = json.loads(path.read_text())
+                collection, self.codes, self.unmatched = cached['geojson'], cached['codes'], cached['unmatched']
+            except (OSError, ValueError, KeyError):
+                collection, self.codes, self.unmatched = self._build(DETAIL_LEVELS[level])
+                payload = {'geojson': collection, 'codes': self.codes, 'unmatched': self.unmatched}
+                try:
+                    self.cache_dir.mkdir(parents=True, exist_ok=True)
+                    _write_text_atomic(path, json.dumps(payload, separators=(',', ':')))
+                except OSError:
+                    # Folder cache tidak dapat ditulis: tetap pakai hasil di memori
+                    pass
+            self._levels[level] = collection
+            self._sizes[level] = len(json.dumps(collection, separators=(',', ':')))
+            return collection
+
+    def payload_size(self, level=DEFAULT_LEVEL):
+        """Ukuran GeoJSON tingkat ``level`` dalam byte (JSON ringkas)."""
+        self.geojson(level)
+        return self._sizes[level]
+
+
+# --- Pembuatan geo/jawa_barat_kabkota.geojson ---
+
+def _inside(geometry, bbox):
+    """True bila titik tengah (rata-rata titik cincin luar) geometri ada di dalam ``bbox``."""
+    points = np.concatenate([np.asarray(part[0], dtype=np.float64)[:, :2] for part in _polygon_parts(geometry)])
+    lon, lat = points.mean(axis=0)
+    return bbox[0] <= lon <= bbox[2] and bbox[1] <= lat <= bbox[3]
+
+
+def select_regions(collection, region_table, bbox=JAWA_BARAT_BBOX):
+    """Geometri per kode kabupaten/kota dari FeatureCollection nasional.
+
+    Hanya fitur yang dikenal ``region_table`` dan bertitik tengah di ``bbox``
+    yang dipilih. ``ValueError`` bila ada kabupaten/kota tanpa fitur atau
+    dengan lebih dari satu fitur.
+    """
+    index = RegionIndex(region_table)
+    wanted = set(index.region_codes)
+    found, duplicated = {}, set()
+    for feature in collection.get('features', []):
+        geometry = feature.get('geometry')
+        code = feature_code(feature, index)
+        if code not in wanted or geometry is None or not _inside(geometry, bbox):
+            continue
+        if code in found:
+            duplicated.add(code)
+        found[code] = geometry
+    missing = sorted(wanted - set(found))
+    if missing or duplicated:
+        raise ValueError(
+            f"Batas wilayah tidak cocok dengan {len(wanted)} kabupaten/kota: "
+            f"tidak ditemukan {[index.name(code) for code in missing]}, "
+            f"lebih dari satu fitur {[index.name(code) for code in sorted(duplicated)]}"
+        )
+    return dict(sorted(found.items()))
+
+
+def bundle_collection(geometries, region_table, tolerance=BUNDLE_TOLERANCE, decimals=BUNDLE_DECIMALS):
+    """FeatureCollection siap simpan: geometri disederhanakan bersama, properti kode dan nama wilayah."""
+    index = RegionIndex(region_table)
+    simplified = Topology(list(geometries.values())).simplify(tolerance, decimals)
+    return {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {ID_COLUMN: code, NAME_COLUMN: index.name(code)}, 'geometry': geometry}
+        for code, geometry in zip(geometries, simplified)
+    ]}
+
+
+def _get_json(url):
+    with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+        return json.load(response)
+
+
+def fetch_geoboundaries(base_dir=BASE_DIR, api_url=GEOBOUNDARIES_API, full=False):
+    """Mengunduh geoBoundaries IDN ADM2 dan menulis GeoJSON Jawa Barat serta ``geo/SOURCE``.
+
+    Mengembalikan path GeoJSON. File lama tidak disentuh bila unduhan gagal
+    atau ada kabupaten/kota yang tidak ditemukan.
+    """
+    region_table = read_region_table(base_dir)
+    if region_table is None:
+        raise ValueError(f"{REGIONS_FILE} tidak ada di {base_dir}")
+    meta = _get_json(api_url)
+    url = meta['gjDownloadURL'] if full else meta.get('simplifiedGeometryGeoJSON') or meta['gjDownloadURL']
+    collection = bundle_collection(select_regions(_get_json(url), region_table), region_table)
+
+    path = geojson_path(base_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_text_atomic(path, json.dumps(collection, ensure_ascii=False, separators=(',', ':')))
+    _write_text_atomic(source_path(base_dir), (
+        f"{GEOJSON_FILE}: batas {len(collection['features'])} kabupaten/kota Jawa Barat (ADM2).\n\n"
+        f"Sumber: geoBoundaries gbOpen IDN ADM2 ({meta.get('boundarySource', '-')}, "
+        f"tahun {meta.get('boundaryYearRepresented', '-')}, build {meta.get('buildDate', '-')})\n"
+        f"URL: {url}\n"
+        f"Lisensi: {meta.get('boundaryLicense', 'CC BY 4.0')} ({meta.get('licenseSource', '-')})\n"
+        f"Sitasi: {GEOBOUNDARIES_CITATION}\n\n"
+        f"Diunduh {date.today().isoformat()} dengan `python geo.py --fetch`: fitur dipilih menurut nama "
+        f"kabupaten/kota di regions.csv, disederhanakan per busur bersama (toleransi {BUNDLE_TOLERANCE} derajat), "
+        f"koordinat dibulatkan {BUNDLE_DECIMALS} desimal, properti diganti {ID_COLUMN} dan {NAME_COLUMN}.\n"
+    ))
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batas kabupaten/kota Jawa Barat untuk peta dashboard.")
+    parser.add_argument('--fetch', action='store_true', help='unduh geoBoundaries IDN ADM2 dan tulis geo/')
+    parser.add_argument('--full', action='store_true', help='pakai geometri resolusi penuh (unduhan besar)')
+    parser.add_argument('--data-dir', default=str(BASE_DIR), help='folder berisi regions.csv dan geo/')
+    args = parser.parse_args(argv)
+
+    if not args.fetch:
+        path = geojson_path(args.data_dir)
+        print(f"{path}: {'ada' if path.exists() else 'belum ada (jalankan dengan --fetch)'}")
+        return 0
+    try:
+        path = fetch_geoboundaries(args.data_dir, full=args.full)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Gagal membuat batas wilayah: {e}", file=sys.stderr)
+        return 1
+    print(f"Batas wilayah ditulis ke {path} (sumber dan lisensi: {source_path(args.data_dir)})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
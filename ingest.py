@@ -0,0 +1,347 @@
+"""Ingest data tahunan BPS biofarmaka tanpa membangun ulang seluruh dataset.
+
+Mencari pasangan ``produksibio_YY.csv`` / ``biofarmaka_YYYY.csv`` yang
+tahunnya belum ada di ``dataset_final.csv`` lalu hanya memproses tahun
+tersebut dengan langkah yang sama seperti notebook (``clean_numeric``,
+``clean_invalid_rows``, ``create_final_dataset``), lalu mengklaster tahun
+baru dengan ``clustering.py`` yang di-warm-start dari model tahun sebelumnya:
+
+- baris tahun baru ditambahkan ke akhir ``dataset_final.csv``;
+- ``dataset_YYYY.csv`` dan ``cluster_YYYY.csv`` ditulis untuk tahun baru;
+- snapshot kolumnar dan agregat versi baru disusun dari snapshot lama
+  ditambah partisi tahun baru, lalu diterbitkan bila ``loader.py`` dipakai.
+
+Semua tahun baru diproses di memori lebih dulu; file baru ditulis setelah
+semuanya berhasil, masing-masing lewat file sementara dan ``os.replace``.
+Bila satu tahun gagal, tidak ada file yang berubah.
+
+File BPS tiap tahun di-parse dan dibersihkan paralel per tahun
+(``ProcessPoolExecutor``); angka ``...`` dan pemisah ribuan ditangani langsung
+oleh parser ``read_csv``. Klastering tetap berurutan per tahun karena model
+tahun berikutnya di-warm-start dari tahun sebelumnya.
+
+Dashboard membaca daftar tahun dari file yang ada, jadi tahun baru langsung
+muncul tanpa perubahan kode. Contoh::
+
+    python ingest.py              # proses semua tahun baru
+    python ingest.py --dry-run    # hanya tampilkan tahun yang akan diproses
+    python ingest.py --jobs 4     # parse paling banyak 4 tahun sekaligus
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import clustering
+import data_store
+import loader
+from data_model import compact_frame
+from fact_table import build_cube, build_fact_table, concat_partitions
+from regions import REGIONS_FILE, RegionIndex, derive_region_table, load_region_table
+
+PRODUKSI_PATTERN = re.compile(r'^produksibio_(\d{2})\.csv$')
+LUAS_PANEN_TEMPLATE = 'biofarmaka_{year}.csv'
+ID_COLUMNS = ["Kabupaten/Kota", "Tahun"]
+# Penanda "data tidak tersedia" di tabel BPS
+NA_VALUES = ["..."]
+
+
+def read_bps_csv(path):
+    """Membaca satu file BPS; ``...`` menjadi NaN dan pemisah ribuan dibuang oleh parser."""
+    return pd.read_csv(path, na_values=NA_VALUES, thousands=",")
+
+
+def clean_numeric(df):
+    # Angka sudah di-parse read_bps_csv; hanya kolom yang masih berisi teks lain dipaksa numerik
+    df = df.copy()
+    for col in df.columns:
+        if col not in ID_COLUMNS and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    df = df.fillna(0)
+    return df
+
+
+# fungsi hapus baris tidak valid: hanya wilayah dengan Klaster=1 di regions.csv yang dipertahankan
+def clean_invalid_rows(df, regions=None):
+    if regions is None:
+        regions = derive_region_table(df["Kabupaten/Kota"].astype(str).unique())
+    index = RegionIndex(regions)
+    df = df[np.isin(index.codes(df["Kabupaten/Kota"]), index.cluster_codes)]
+    return df
+
+
+def create_final_dataset(df):
+    kolom_produksi = [c for c in df.columns if "Produksi" in c]
+    kolom_luas = [c for c in df.columns if "Luas Panen" in c]
+
+    df = df.copy()
+    df["Produksi_Total"] = df[kolom_produksi].sum(axis=1)
+    df["LuasPanen_Total"] = df[kolom_luas].sum(axis=1)
+
+    final = df[["Tahun", "Kabupaten/Kota", "Produksi_Total", "LuasPanen_Total"]]
+    return final
+
+
+def discover_year_pairs(data_dir):
+    """Mapping tahun -> (file produksi, file luas panen) yang pasangannya lengkap."""
+    data_dir = Path(data_dir)
+    pairs = {}
+    for path in sorted(data_dir.glob('produksibio_*.csv')):
+        match = PRODUKSI_PATTERN.match(path.name)
+        if not match:
+            continue
+        year = 2000 + int(match.group(1))
+        luas_path = data_dir / LUAS_PANEN_TEMPLATE.format(year=year)
+        if luas_path.exists():
+            pairs[year] = (path, luas_path)
+    return pairs
+
+
+def existing_years(data_dir):
+    """Tahun yang sudah ada di dataset_final.csv (hanya kolom Tahun yang dibaca)."""
+    path = Path(data_dir) / data_store.DATASET_FINAL
+    if not path.exists():
+        return set()
+    return set(pd.read_csv(path, usecols=['Tahun'])['Tahun'].astype(int))
+
+
+def merge_year(produksi_path, luas_path, year):
+    """Menggabungkan file produksi dan luas panen satu tahun lalu membersihkan angkanya."""
+    df_produksi = read_bps_csv(produksi_path)
+    df_luaspanen = read_bps_csv(luas_path)
+    df_produksi["Tahun"] = year
+    df_luaspanen["Tahun"] = year
+    merged = pd.merge(df_produksi, df_luaspanen, on=["Kabupaten/Kota", "Tahun"], how="inner")
+    return clean_numeric(merged)
+
+
+def parse_years(pairs, years, jobs=None):
+    """Mapping tahun -> hasil ``merge_year``, di-parse paralel satu proses per tahun.
+
+    ``jobs`` default jumlah core; dengan satu tahun atau ``jobs=1`` semuanya
+    dijalankan di proses ini tanpa pool.
+    """
+    jobs = min(jobs or os.cpu_count() or 1, len(years))
+    if jobs <= 1:
+        return {year: merge_year(*pairs[year], year) for year in years}
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {year: pool.submit(merge_year, *pairs[year], year) for year in years}
+        return {year: future.result() for year, future in futures.items()}
+
+
+def cluster_year(dataset, year, previous_models):
+    """Klastering tahun baru, warm-start dari model tahun sebelumnya bila ada.
+
+    Mengembalikan ``(clustered, models)``; ``models`` (semua k) disimpan
+    bersama file tahun ini sehingga ingest berikutnya dapat melanjutkan id
+    klaster yang sama.
+    """
+    models = clustering.fit_all({year: dataset}, previous_models=previous_models)
+    return clustering.clustered_dataset(dataset, models[year]), models
+
+
+def _line_terminator(path):
+    with open(path, 'rb') as f:
+        return '\r\n' if b'\r\n' in f.readline() else '\n'
+
+
+def _replace_atomic(path, write):
+    """Menulis ``path`` lewat file sementara di folder yang sama lalu ``os.replace``."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    os.close(fd)
+    try:
+        write(Path(tmp))
+        # mkstemp membuat file 0600; pertahankan izin file lama
+        if path.exists():
+            shutil.copymode(path, tmp)
+        else:
+            os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def check_final_columns(path, rows):
+    """Kolom baris baru harus sama dengan header dataset_final.csv."""
+    header = pd.read_csv(path, nrows=0).columns
+    if set(header) != set(rows.columns):
+        raise ValueError(
+            f"Kolom tahun baru tidak cocok dengan {path.name}: "
+            f"{sorted(set(rows.columns) ^ set(header))}"
+        )
+    return header
+
+
+def append_dataset_final(path, rows):
+    """Menambahkan baris ke dataset_final.csv; isi lama disalin apa adanya (tanpa parsing).
+
+    Salinan + baris baru ditulis ke file sementara lalu menggantikan file
+    asli sekaligus, jadi pembaca tidak pernah melihat file setengah jadi.
+    """
+    header = check_final_columns(path, rows)
+    lineterminator = _line_terminator(path)
+    with open(path, 'rb') as f:
+        f.seek(0, 2)
+        if f.tell() > 0:
+            f.seek(-1, 2)
+            needs_newline = f.read(1) != b'\n'
+        else:
+            needs_newline = False
+
+    def write(tmp):
+        shutil.copyfile(path, tmp)
+        with open(tmp, 'a', newline='', encoding='utf-8') as f:
+            if needs_newline:
+                f.write(lineterminator)
+            rows[list(header)].to_csv(f, header=False, index=False, lineterminator=lineterminator)
+
+    _replace_atomic(path, write)
+
+
+def prepare_final_rows(merged):
+    """Baris dataset_final untuk satu tahun, bertipe sama dengan hasil parsing CSV."""
+    rows = merged.copy()
+    rows["Kabupaten/Kota"] = rows["Kabupaten/Kota"].astype(str)
+    value_cols = [c for c in rows.columns if c not in ["Kabupaten/Kota", "Tahun"]]
+    rows[value_cols] = rows[value_cols].astype(float)
+    rows["Tahun"] = rows["Tahun"].astype('int64')
+    return rows.reset_index(drop=True)
+
+
+def validate_regions(merged, regions, year):
+    """Memastikan semua nama wilayah tahun baru dikenal di regions.csv."""
+    unknown = RegionIndex(regions).unknown_names(merged["Kabupaten/Kota"])
+    if unknown:
+        raise ValueError(f"Wilayah tidak dikenal pada tahun {year} (tambahkan ke {REGIONS_FILE}): {unknown}")
+
+
+def ingest_year(data_dir, year, merged, previous_models, regions=None):
+    """Memproses satu tahun baru (hasil ``merge_year``) di memori, tanpa menulis file.
+
+    Mengembalikan ``(final_rows, dataset, clustered, models)``; semua file
+    ditulis sekaligus oleh ``write_years`` setelah seluruh tahun berhasil.
+    """
+    if regions is not None:
+        validate_regions(merged, regions, year)
+    final_rows = prepare_final_rows(merged)
+    check_final_columns(Path(data_dir) / data_store.DATASET_FINAL, final_rows)
+
+    dataset = create_final_dataset(clean_invalid_rows(merged, regions))
+    clustered, models = cluster_year(dataset, year, previous_models)
+    return final_rows, dataset, clustered, models
+
+
+def write_years(data_dir, staged, model_dir):
+    """Menulis hasil ``ingest_year`` semua tahun baru.
+
+    File per tahun dan model ditulis lebih dulu, dan ``dataset_final.csv``
+    (penentu tahun yang sudah ada) diganti paling akhir. Bila proses terhenti
+    di tengah, tahun-tahun tersebut tetap dianggap baru dan diproses ulang.
+    """
+    data_dir = Path(data_dir)
+    for year, (_, dataset, clustered, models) in staged.items():
+        clustering.save_models(models, model_dir)
+        _replace_atomic(data_dir / f"dataset_{year}.csv",
+                        lambda tmp, df=dataset: df.to_csv(tmp, index=False, lineterminator='\r\n'))
+        _replace_atomic(data_dir / f"cluster_{year}.csv",
+                        lambda tmp, df=clustered: df.to_csv(tmp, index=False, lineterminator='\r\n'))
+    final_rows = pd.concat([rows for rows, *_ in staged.values()], ignore_index=True)
+    append_dataset_final(data_dir / data_store.DATASET_FINAL, final_rows)
+
+
+def update_snapshot(previous_version, additions, data_dir, cache_dir):
+    """Menyusun snapshot dan agregat versi baru dari versi lama + tahun baru.
+
+    Bila snapshot lama tidak ada, tidak ada yang dilakukan; dashboard akan
+    membangun snapshot dari CSV pada pemuatan berikutnya.
+    """
+    previous = data_store.read_snapshot(previous_version, cache_dir)
+    if previous is None:
+        return None
+
+    new_final = []
+    new_clusters = []
+    for final_rows, clustered in additions:
+        final_rows = final_rows.copy()
+        final_rows.columns = [data_store.clean_column_name(col) for col in final_rows.columns]
+        new_final.append(final_rows)
+        new_clusters.append(data_store.prepare_cluster_frame(clustered))
+
+    data = {'dataset_final': compact_frame(pd.concat([previous['dataset_final']] + new_final, ignore_index=True))}
+    cluster_frames = [previous['cluster_all']] if 'cluster_all' in previous else []
+    data['cluster_all'] = compact_frame(pd.concat(cluster_frames + new_clusters, ignore_index=True))
+    data = data_store.attach_regions(data, data_dir)
+    version = data_store.write_snapshot(data, data_dir, cache_dir)
+
+    previous_fact = data_store.read_derived(previous_version, 'fact', cache_dir)
+    previous_cube = data_store.read_derived(previous_version, 'cube', cache_dir)
+    if previous_fact is not None and previous_cube is not None:
+        fact_new = build_fact_table(pd.concat(new_final, ignore_index=True), data['regions'])
+        data_store.write_derived(version, 'fact', concat_partitions([previous_fact, fact_new]), cache_dir)
+        data_store.write_derived(version, 'cube', concat_partitions([previous_cube, build_cube(fact_new)]), cache_dir)
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest tahun baru data BPS biofarmaka.")
+    parser.add_argument('--data-dir', default=str(data_store.BASE_DIR), help='folder berisi file CSV')
+    parser.add_argument('--cache-dir', default=None, help='folder snapshot (default: <data-dir>/.cache/snapshot)')
+    parser.add_argument('--model-dir', default=None, help='folder model K-Means (default: <data-dir>/models)')
+    parser.add_argument('--dry-run', action='store_true', help='hanya tampilkan tahun yang akan diproses')
+    parser.add_argument('--jobs', type=int, default=None, help='jumlah proses parsing paralel (default: jumlah core)')
+    args = parser.parse_args(argv)
+
+    data_dir = Path(args.data_dir)
+    cache_dir = Path(args.cache_dir) if args.cache_dir else data_dir / '.cache' / 'snapshot'
+    model_dir = Path(args.model_dir) if args.model_dir else data_dir / 'models'
+
+    pairs = discover_year_pairs(data_dir)
+    new_years = sorted(set(pairs) - existing_years(data_dir))
+    if not new_years:
+        print("Tidak ada tahun baru untuk diproses.")
+        return 0
+    print(f"Tahun baru: {', '.join(map(str, new_years))}")
+    if args.dry_run:
+        return 0
+
+    previous_version = data_store.current_data_version(data_dir, cache_dir)
+    parsed = parse_years(pairs, new_years, args.jobs)
+    # Tanpa regions.csv tidak ada yang divalidasi; tabel diturunkan dari nama di data
+    regions = load_region_table(data_dir) if (data_dir / REGIONS_FILE).exists() else None
+    # Warm-start tahun berikutnya memakai model tahun baru yang masih di memori
+    models = clustering.load_models(model_dir)
+    staged = {}
+    for year in new_years:
+        try:
+            staged[year] = ingest_year(data_dir, year, parsed.pop(year), models, regions)
+        except ValueError as e:
+            print(f"Gagal memproses tahun {year}: {e}; tidak ada file yang diubah", file=sys.stderr)
+            return 1
+        models = {**models, **staged[year][3]}
+
+    write_years(data_dir, staged, model_dir)
+    for year, (final_rows, *_) in staged.items():
+        print(f"  {year}: {len(final_rows)} baris ditambahkan ke {data_store.DATASET_FINAL}")
+
+    additions = [(final_rows, clustered) for final_rows, _, clustered, _ in staged.values()]
+    version = update_snapshot(previous_version, additions, data_dir, cache_dir)
+    if version:
+        print(f"Snapshot diperbarui ke versi {version}")
+    # Bila worker memakai loader.py, versi baru baru terlihat setelah diterbitkan
+    if data_store.published_version(cache_dir) is not None:
+        published = loader.refresh(data_dir, cache_dir)
+        if published:
+            print(f"Versi {published} diterbitkan untuk semua worker")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Proses pemuat data bersama untuk semua worker dashboard.
+
+Tanpa loader, setiap worker Streamlit memeriksa hash CSV dan membangun
+snapshot/turunan sendiri bila belum ada. Dengan loader, satu proses ini yang
+membangun snapshot kolumnar, tabel fakta, kubus, dan proyeksi untuk versi CSV
+terbaru, lalu menerbitkannya di ``<cache>/CURRENT`` dengan penggantian file
+atomik. Worker (``app.py``, ``api.py``) hanya membaca penunjuk itu dan
+me-memory-map file Feather versi tersebut; kolom numerik dibagi semua proses
+lewat page cache, dan pergantian versi terlihat serentak oleh semua worker.
+
+Contoh::
+
+    python loader.py                 # bangun dan terbitkan versi CSV saat ini
+    python loader.py --watch 10      # periksa perubahan CSV setiap 10 detik
+    python loader.py --unpublish     # kembali ke mode per-worker
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import data_store
+from fact_table import build_cube, build_fact_table
+from forecast import fit_forecasts
+
+
+def build_version(base_dir=data_store.BASE_DIR, cache_dir=data_store.CACHE_DIR):
+    """Snapshot dan turunan (fact, cube, forecast) untuk versi CSV saat ini; mengembalikan versinya."""
+    data, version = data_store.load_snapshot(base_dir, cache_dir)
+    fact = data_store.load_derived(version, 'fact', lambda: build_fact_table(data['dataset_final'], data['regions']), cache_dir)
+    cube = data_store.load_derived(version, 'cube', lambda: build_cube(fact), cache_dir)
+    data_store.load_derived(version, 'forecast', lambda: fit_forecasts(cube), cache_dir)
+    return version
+
+
+def refresh(base_dir=data_store.BASE_DIR, cache_dir=data_store.CACHE_DIR):
+    """Membangun dan menerbitkan versi CSV saat ini bila berbeda; mengembalikan versi baru atau None."""
+    version = data_store.current_data_version(base_dir, cache_dir)
+    if version == data_store.published_version(cache_dir):
+        return None
+    version = build_version(base_dir, cache_dir)
+    data_store.publish_version(version, cache_dir)
+    return version
+
+
+def unpublish(cache_dir=data_store.CACHE_DIR):
+    (Path(cache_dir) / data_store.CURRENT_NAME).unlink(missing_ok=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pemuat data bersama untuk worker dashboard biofarmaka.")
+    parser.add_argument('--data-dir', default=str(data_store.BASE_DIR), help='folder berisi file CSV')
+    parser.add_argument('--cache-dir', default=None, help='folder snapshot (default: <data-dir>/.cache/snapshot)')
+    parser.add_argument('--watch', type=float, default=None, metavar='DETIK',
+                        help='terus berjalan dan periksa perubahan CSV setiap DETIK')
+    parser.add_argument('--unpublish', action='store_true', help='hapus penunjuk CURRENT (worker kembali memuat sendiri)')
+    args = parser.parse_args(argv)
+
+    data_dir = Path(args.data_dir)
+    cache_dir = Path(args.cache_dir) if args.cache_dir else data_dir / '.cache' / 'snapshot'
+    if args.unpublish:
+        unpublish(cache_dir)
+        print("Penunjuk CURRENT dihapus.")
+        return 0
+
+    while True:
+        version = refresh(data_dir, cache_dir)
+        if version:
+            print(f"Versi {version} diterbitkan.", flush=True)
+        elif args.watch is None:
+            print(f"Versi {data_store.published_version(cache_dir)} sudah aktif.")
+        if args.watch is None:
+            return 0
+        try:
+            time.sleep(args.watch)
+        except KeyboardInterrupt:
+            return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,290 @@
+"""Instrumentasi ringan per tahap untuk dashboard.
+
+Satu ``PerfRecorder`` per sesi Streamlit mencatat durasi tiap tahap, hitungan
+hit/miss cache, dan ukuran DataFrame. Tahap luar dibuka dengan
+``recorder.stage(...)``; di dalamnya (termasuk badan fungsi ber-cache) kode
+cukup memakai fungsi modul ``stage``, ``timed``, ``mark_miss``, dan
+``record_frame`` yang menulis ke recorder aktif di thread tersebut. Tanpa
+recorder aktif, atau bila recorder dimatikan, semua fungsi itu hanya
+mengembalikan konteks kosong bersama sehingga overhead-nya dapat diabaikan.
+
+Ekspor: baris log JSON (logger ``biofarmaka.perf``) dan file teks format
+Prometheus dari agregat seluruh sesi dalam satu proses (``PROCESS``). File
+Prometheus ditulis thread latar (``start_prometheus_export``) setiap
+``EXPORT_INTERVAL`` detik, terlepas dari ada tidaknya sesi yang membuka
+panel performa.
+"""
+import functools
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+ENV_ENABLED = 'BIOFARMAKA_PERF'
+ENV_PROMETHEUS = 'BIOFARMAKA_PERF_PROM'
+METRIC_PREFIX = 'biofarmaka'
+EXPORT_INTERVAL = 15.0
+
+logger = logging.getLogger('biofarmaka.perf')
+
+_NULL = nullcontext()
+_local = threading.local()
+
+
+def enabled_by_default():
+    return os.environ.get(ENV_ENABLED, '').lower() in ('1', 'true', 'yes', 'on')
+
+
+def prometheus_path():
+    """Path textfile Prometheus dari ``BIOFARMAKA_PERF_PROM``, atau None."""
+    return os.environ.get(ENV_PROMETHEUS) or None
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+class _Stage:
+    __slots__ = ('recorder', 'name', 'cache', 'missed', 'start')
+
+    def __init__(self, recorder, name, cache):
+        self.recorder = recorder
+        self.name = name
+        self.cache = cache
+        self.missed = False
+
+    def __enter__(self):
+        _stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        _stack().pop()
+        self.recorder.record_duration(self.name, seconds)
+        if self.cache:
+            self.recorder.record_cache(self.name, hit=not self.missed)
+        return False
+
+
+class PerfRecorder:
+    """Durasi, hit/miss cache, dan ukuran DataFrame; opsional diteruskan ke ``parent``."""
+
+    def __init__(self, enabled=False, parent=None, session=None):
+        self.enabled = enabled
+        self.parent = parent
+        self.session = session
+        self.durations = {}
+        self.cache = {}
+        self.frames = {}
+        self._lock = threading.Lock()
+
+    def stage(self, name, cache=False):
+        """Konteks pengukur waktu; ``cache=True`` menghitung hit kecuali ``mark_miss()`` dipanggil."""
+        if not self.enabled:
+            return _NULL
+        return _Stage(self, name, cache)
+
+    def timed(self, name=None, cache=False):
+        """Dekorator ``stage`` terikat ke recorder ini (mis. untuk badan tab/fragment)."""
+        def decorator(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name, cache):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record_duration(self, name, seconds):
+        with self._lock:
+            stat = self.durations.get(name)
+            if stat is None:
+                stat = self.durations[name] = {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0}
+            stat['count'] += 1
+            stat['total'] += seconds
+            stat['max'] = max(stat['max'], seconds)
+            stat['last'] = seconds
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({'event': 'stage', 'stage': name, 'seconds': round(seconds, 6), 'session': self.session}))
+        if self.parent is not None:
+            self.parent.record_duration(name, seconds)
+
+    def record_cache(self, name, hit):
+        with self._lock:
+            counts = self.cache.setdefault(name, {'hit': 0, 'miss': 0})
+            counts['hit' if hit else 'miss'] += 1
+        if self.parent is not None:
+            self.parent.record_cache(name, hit)
+
+    def record_frame(self, name, df):
+        if not self.enabled:
+            return
+        size = {
+            'rows': int(df.shape[0]),
+            'columns': int(df.shape[1]) if df.ndim > 1 else 1,
+            'bytes': int(df.memory_usage(index=True, deep=False).sum()),
+        }
+        with self._lock:
+            self.frames[name] = size
+        if self.parent is not None:
+            with self.parent._lock:
+                self.parent.frames[name] = size
+
+    def reset(self):
+        with self._lock:
+            self.durations.clear()
+            self.cache.clear()
+            self.frames.clear()
+
+    def snapshot(self):
+        """Salinan semua metrik dalam bentuk dict biasa (aman untuk JSON)."""
+        with self._lock:
+            return {
+                'durations': {name: dict(stat) for name, stat in self.durations.items()},
+                'cache': {name: dict(counts) for name, counts in self.cache.items()},
+                'frames': {name: dict(size) for name, size in self.frames.items()},
+            }
+
+    def prometheus_text(self):
+        """Metrik dalam format eksposisi teks Prometheus."""
+        snap = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{METRIC_PREFIX}_{name}{{{label_text}}} {value:g}")
+
+        durations = sorted(snap['durations'].items())
+        metric('stage_seconds_total', 'counter', 'Total durasi tahap dalam detik.',
+               [({'stage': name}, stat['total']) for name, stat in durations])
+        metric('stage_calls_total', 'counter', 'Jumlah eksekusi tahap.',
+               [({'stage': name}, stat['count']) for name, stat in durations])
+        metric('stage_seconds_max', 'gauge', 'Durasi terlama satu eksekusi tahap.',
+               [({'stage': name}, stat['max']) for name, stat in durations])
+        metric('cache_requests_total', 'counter', 'Permintaan cache per hasil (hit/miss).',
+               [({'cache': name, 'result': result}, counts[result])
+                for name, counts in sorted(snap['cache'].items()) for result in ('hit', 'miss')])
+        frames = sorted(snap['frames'].items())
+        metric('frame_rows', 'gauge', 'Jumlah baris DataFrame.', [({'frame': name}, size['rows']) for name, size in frames])
+        metric('frame_bytes', 'gauge', 'Ukuran memori DataFrame (tanpa deep).', [({'frame': name}, size['bytes']) for name, size in frames])
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Menulis ``prometheus_text()`` secara atomik (cocok untuk textfile collector)."""
+        path = Path(path)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Agregat semua sesi dalam proses ini, sumber ekspor Prometheus
+PROCESS = PerfRecorder(enabled=True)
+
+_exporters = {}
+_exporters_lock = threading.Lock()
+
+
+class _PrometheusExporter(threading.Thread):
+    def __init__(self, path, interval):
+        super().__init__(name='perf-prometheus', daemon=True)
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        failing = False
+        while True:
+            try:
+                PROCESS.write_prometheus(self.path)
+                failing = False
+            except OSError:
+                # Dicatat sekali per rangkaian kegagalan, bukan setiap interval
+                if not failing:
+                    logger.warning("Gagal menulis metrik Prometheus ke %s", self.path, exc_info=True)
+                failing = True
+            if self._stopped.wait(self.interval):
+                return
+
+    def stop(self):
+        self._stopped.set()
+
+
+def start_prometheus_export(path=None, interval=EXPORT_INTERVAL):
+    """Thread latar yang menulis agregat ``PROCESS`` ke ``path`` setiap ``interval`` detik.
+
+    ``path`` default ``prometheus_path()``; tanpa path tidak ada yang
+    dijalankan (None). Aman dipanggil setiap rerun: satu thread per path
+    dalam satu proses; ``stop()`` pada thread menghentikannya.
+    """
+    path = path or prometheus_path()
+    if path is None:
+        return None
+    with _exporters_lock:
+        thread = _exporters.get(str(path))
+        if thread is None or not thread.is_alive():
+            thread = _PrometheusExporter(path, interval)
+            thread.start()
+            _exporters[str(path)] = thread
+        return thread
+
+
+def active():
+    """Recorder milik tahap terdalam yang sedang berjalan di thread ini, atau None."""
+    stack = getattr(_local, 'stack', None)
+    return stack[-1].recorder if stack else None
+
+
+def stage(name, cache=False):
+    """Tahap bersarang pada recorder aktif; konteks kosong bila tidak ada."""
+    stack = getattr(_local, 'stack', None)
+    if not stack:
+        return _NULL
+    return stack[-1].recorder.stage(name, cache)
+
+
+def timed(name=None, cache=False):
+    """Dekorator ``stage`` untuk satu fungsi (nama default: nama fungsi)."""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name, cache):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def mark_miss():
+    """Menandai tahap ber-cache terdekat sebagai miss (dipanggil dari badan fungsi ber-cache)."""
+    for frame in reversed(getattr(_local, 'stack', None) or ()):
+        if frame.cache:
+            frame.missed = True
+            return
+
+
+def record_frame(name, df):
+    recorder = active()
+    if recorder is not None:
+        recorder.record_frame(name, df)
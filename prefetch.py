@@ -0,0 +1,138 @@
+"""Prefetch latar belakang untuk tampilan yang kemungkinan dibuka berikutnya.
+
+Setelah satu rerun selesai, dashboard menyusun daftar tugas (kunci cache dan
+fungsi pembangunnya) untuk tahun bertetangga, komoditas lain, dan tab lain,
+lalu ``Prefetcher`` menjalankannya di thread pool kecil yang dipakai bersama
+semua sesi dalam proses. Hasilnya masuk ke cache biasa (``FigureCache``),
+jadi klik berikutnya cukup berupa cache hit.
+
+- Konkurensi dibatasi oleh jumlah worker dan jumlah tugas per jadwal.
+- Setiap sesi punya nomor generasi; jadwal baru (pilihan berubah)
+  membatalkan tugas generasi lama yang belum berjalan, dan worker melewati
+  tugas yang generasinya sudah usang.
+- Tugas yang kuncinya sudah ada di cache (``is_cached``) tidak dijadwalkan.
+- Entri sesi dilupakan begitu semua tugas generasi terakhirnya selesai,
+  jadi sesi yang sudah berakhir tidak meninggalkan sisa di ``Prefetcher``.
+
+Prefetch dapat dimatikan dengan ``BIOFARMAKA_PREFETCH=0``.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ENV_ENABLED = 'BIOFARMAKA_PREFETCH'
+MAX_WORKERS = 2
+MAX_TASKS = 16
+
+logger = logging.getLogger('biofarmaka.prefetch')
+
+
+def enabled_by_default():
+    return os.environ.get(ENV_ENABLED, '1').lower() not in ('0', 'false', 'no', 'off')
+
+
+class Prefetcher:
+    """Thread pool berbatas dengan pembatalan per sesi lewat nomor generasi."""
+
+    def __init__(self, max_workers=MAX_WORKERS, max_tasks=MAX_TASKS):
+        self.max_tasks = max_tasks
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='prefetch')
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._futures = {}
+        self._counts = {'scheduled': 0, 'completed': 0, 'cancelled': 0, 'skipped': 0, 'failed': 0}
+
+    def schedule(self, session, tasks, is_cached=None):
+        """Mengganti tugas ``session`` dengan ``tasks`` (list ``(key, fn)`` terurut prioritas).
+
+        Mengembalikan jumlah tugas yang benar-benar dijadwalkan.
+        """
+        with self._lock:
+            generation = self._generations.get(session, 0) + 1
+            self._generations[session] = generation
+            stale = self._futures.pop(session, ())
+        self._cancel_all(stale)
+
+        with self._lock:
+            futures = []
+            seen = set()
+            for key, fn in tasks:
+                if len(futures) >= self.max_tasks:
+                    break
+                if key in seen or (is_cached is not None and is_cached(key)):
+                    continue
+                seen.add(key)
+                futures.append(self._executor.submit(self._run, session, generation, key, fn))
+            self._counts['scheduled'] += len(futures)
+            if futures:
+                self._futures[session] = futures
+            else:
+                self._generations.pop(session, None)
+        # Di luar lock: future yang sudah selesai langsung memanggil callback di thread ini
+        for future in futures:
+            future.add_done_callback(lambda _, generation=generation: self._release(session, generation))
+        return len(futures)
+
+    def cancel(self, session):
+        """Membatalkan semua tugas ``session`` yang belum berjalan dan melupakan sesinya."""
+        with self._lock:
+            self._generations.pop(session, None)
+            stale = self._futures.pop(session, ())
+        self._cancel_all(stale)
+
+    def _cancel_all(self, futures):
+        # Dipanggil di luar lock: future.cancel() langsung menjalankan callback _release
+        cancelled = sum(future.cancel() for future in futures)
+        with self._lock:
+            self._counts['cancelled'] += cancelled
+
+    def _release(self, session, generation):
+        """Melupakan ``session`` setelah semua tugas generasi ``generation`` selesai."""
+        with self._lock:
+            if self._generations.get(session) != generation:
+                return
+            if all(future.done() for future in self._futures.get(session, ())):
+                self._generations.pop(session, None)
+                self._futures.pop(session, None)
+
+    def _run(self, session, generation, key, fn):
+        with self._lock:
+            if self._generations.get(session) != generation:
+                self._counts['skipped'] += 1
+                return
+        try:
+            fn()
+        except Exception:
+            # Prefetch hanya optimasi; kesalahan diulang dan ditampilkan saat tampilan benar-benar dibuka
+            logger.debug("prefetch %r gagal", key, exc_info=True)
+            with self._lock:
+                self._counts['failed'] += 1
+            return
+        with self._lock:
+            self._counts['completed'] += 1
+
+    def stats(self):
+        with self._lock:
+            pending = sum(not future.done() for futures in self._futures.values() for future in futures)
+            return {**self._counts, 'pending': pending}
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+def neighbours(options, selected, limit=None):
+    """Anggota ``options`` di sekitar ``selected``, berselang-seling setelah lalu sebelum.
+
+    ``neighbours([2022, 2023, 2024], 2023)`` -> ``[2024, 2022]``.
+    """
+    options = list(options)
+    if selected not in options:
+        return options[:limit]
+    index = options.index(selected)
+    ordered = []
+    for step in range(1, len(options)):
+        for position in (index + step, index - step):
+            if 0 <= position < len(options):
+                ordered.append(options[position])
+    return ordered[:limit]
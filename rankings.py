@@ -0,0 +1,139 @@
+"""Peringkat komoditas per (wilayah, tahun) yang dihitung sekali per versi data.
+
+Dari kubus agregat, setiap komoditas diberi peringkat di dalam setiap
+(Tahun, Kode_Wilayah) dan di total provinsi (semua kabupaten/kota), baik
+menurut total produksi maupun rata-rata efisiensi. Aturannya sama dengan
+tabel "Peringkat Komoditas Unggulan": hanya komoditas berproduksi > 0,
+``rank(method='min')`` menurun, seri diurutkan menurut nama komoditas.
+
+Posisi baris disimpan dalam dua urutan:
+
+- per (Tahun, wilayah), hanya ``top_n`` teratas: ``top()``;
+- per (Komoditas, Tahun) atas semua wilayah: ``top_regions()``, yaitu
+  wilayah tempat komoditas tersebut berperingkat paling tinggi.
+
+Keduanya dicari lewat dict berisi rentang posisi, sehingga satu pilihan di
+dashboard tidak lagi memfilter, mengelompokkan, dan mengurutkan tabel.
+"""
+import numpy as np
+import pandas as pd
+
+from regions import ID_COLUMN
+
+TOP_N = 10
+# Kode internal untuk baris total provinsi (kode BPS wilayah selalu > 0)
+TOTAL_CODE = 0
+METRICS = {'produksi': 'Total_Produksi_Kg', 'efisiensi': 'Rata_rata_Efisiensi'}
+RANK_COLUMN = 'Peringkat'
+VALUE_COLUMNS = ['Total_Produksi_Kg', 'Total_Luas_Panen', 'Rata_rata_Efisiensi']
+RANKING_COLUMNS = [RANK_COLUMN, 'Komoditas'] + VALUE_COLUMNS
+REGION_RANKING_COLUMNS = [RANK_COLUMN, ID_COLUMN, 'Kabupaten_Kota'] + VALUE_COLUMNS
+
+
+def _ranking_cells(cube):
+    """Sel (Tahun, kode, Komoditas) per wilayah ditambah total provinsi, produksi > 0."""
+    cells = pd.DataFrame({
+        'Tahun': cube['Tahun'].to_numpy(dtype=np.int32),
+        ID_COLUMN: cube[ID_COLUMN].to_numpy(dtype=np.int32),
+        'Komoditas': cube['Komoditas'].cat.codes.to_numpy(dtype=np.int32),
+        'Total_Produksi_Kg': cube['Produksi_Kg'].to_numpy(dtype=np.float64),
+        'Total_Luas_Panen': cube['Luas_Panen'].to_numpy(dtype=np.float64),
+        'Efisiensi_Sum': cube['Efisiensi_Sum'].to_numpy(dtype=np.float64),
+        'N': cube['N'].to_numpy(dtype=np.float64),
+    })
+    totals = cells.groupby(['Tahun', 'Komoditas'], sort=True).sum().reset_index()
+    totals[ID_COLUMN] = TOTAL_CODE
+    cells = pd.concat([cells, totals[cells.columns]], ignore_index=True)
+    cells['Rata_rata_Efisiensi'] = cells['Efisiensi_Sum'] / cells['N']
+    cells = cells[cells['Total_Produksi_Kg'].to_numpy() > 0]
+    return cells.drop(columns=['Efisiensi_Sum', 'N']).reset_index(drop=True)
+
+
+def _group_slices(keys, order):
+    """Dict kunci grup -> (awal, akhir) pada ``order`` yang sudah terurut per ``keys``."""
+    if len(order) == 0:
+        return {}
+    sorted_keys = [key[order] for key in keys]
+    change = np.zeros(len(order), dtype=bool)
+    change[0] = True
+    for key in sorted_keys:
+        change[1:] |= key[1:] != key[:-1]
+    starts = np.flatnonzero(change)
+    stops = np.append(starts[1:], len(order))
+    group_keys = zip(*(key[starts].tolist() for key in sorted_keys))
+    return dict(zip(group_keys, zip(starts.tolist(), stops.tolist())))
+
+
+class RankingIndex:
+    """Top-N komoditas per (wilayah, tahun) dan wilayah teratas per komoditas."""
+
+    def __init__(self, cube, top_n=TOP_N):
+        self.top_n = top_n
+        self.komoditas = list(cube['Komoditas'].cat.categories)
+        self._komoditas_codes = {name: code for code, name in enumerate(self.komoditas)}
+        regions = cube[[ID_COLUMN, 'Kabupaten_Kota']].drop_duplicates(ID_COLUMN)
+        self._region_names = dict(zip(regions[ID_COLUMN].tolist(), regions['Kabupaten_Kota'].astype(str)))
+        self.cells = _ranking_cells(cube)
+
+        year = self.cells['Tahun'].to_numpy()
+        code = self.cells[ID_COLUMN].to_numpy()
+        komoditas = self.cells['Komoditas'].to_numpy()
+        regional = np.flatnonzero(code != TOTAL_CODE)
+        self._ranks = {}
+        self._top = {}
+        self._regions = {}
+        for metric, column in METRICS.items():
+            values = self.cells[column].to_numpy()
+            ranks = (
+                self.cells.groupby(['Tahun', ID_COLUMN], sort=False)[column]
+                .rank(method='min', ascending=False).to_numpy(dtype=np.int32)
+            )
+            self._ranks[metric] = ranks
+
+            order = np.lexsort((komoditas, ranks, code, year))
+            slices = _group_slices([year, code], order)
+            starts = np.repeat([start for start, _ in slices.values()], [stop - start for start, stop in slices.values()])
+            top = order[np.arange(len(order)) - starts < top_n]
+            self._top[metric] = (top, _group_slices([year, code], top))
+
+            # Wilayah per komoditas: peringkat di wilayahnya, lalu nilai terbesar
+            by_region = regional[np.lexsort((-values[regional], ranks[regional], year[regional], komoditas[regional]))]
+            self._regions[metric] = (by_region, _group_slices([komoditas, year], by_region))
+
+    def _check_metric(self, metric):
+        if metric not in METRICS:
+            raise ValueError(f"Metrik peringkat tidak dikenal: {metric!r} (pilihan: {list(METRICS)})")
+
+    def _frame(self, positions, metric, columns):
+        rows = self.cells.iloc[positions]
+        frame = {
+            RANK_COLUMN: self._ranks[metric][positions],
+            ID_COLUMN: rows[ID_COLUMN].to_numpy(),
+            'Kabupaten_Kota': [self._region_names.get(code, '') for code in rows[ID_COLUMN].tolist()],
+            'Komoditas': [self.komoditas[code] for code in rows['Komoditas'].tolist()],
+            **{col: rows[col].to_numpy() for col in VALUE_COLUMNS},
+        }
+        return pd.DataFrame({col: frame[col] for col in columns}, columns=columns)
+
+    def top(self, year, region_code=None, metric='produksi', n=None):
+        """Top-``n`` komoditas satu tahun untuk satu kode wilayah (None = total provinsi)."""
+        self._check_metric(metric)
+        positions, slices = self._top[metric]
+        code = TOTAL_CODE if region_code is None else int(region_code)
+        start, stop = slices.get((int(year), code), (0, 0))
+        n = self.top_n if n is None else min(n, self.top_n)
+        return self._frame(positions[start:min(stop, start + n)], metric, RANKING_COLUMNS)
+
+    def top_regions(self, komoditas, year, metric='produksi', n=None):
+        """Wilayah tempat ``komoditas`` berperingkat tertinggi pada satu tahun.
+
+        Diurutkan menurut peringkat komoditas di wilayah tersebut, lalu nilai
+        metriknya; ``n=None`` mengembalikan semua wilayah yang memproduksinya.
+        """
+        self._check_metric(metric)
+        positions, slices = self._regions[metric]
+        komoditas_code = self._komoditas_codes.get(komoditas)
+        start, stop = slices.get((komoditas_code, int(year)), (0, 0))
+        if n is not None:
+            stop = min(stop, start + n)
+        return self._frame(positions[start:stop], metric, REGION_RANKING_COLUMNS)
@@ -0,0 +1,89 @@
+"""Penjelajah data mentah: filter, urut, dan paginasi di sisi server.
+
+Hanya baris halaman yang diminta yang dikirim ke browser. Ekspor tampilan
+terfilter ditulis per potongan baris (CSV atau Parquet) ke file sementara,
+sehingga tidak pernah ada satu string/buffer berisi seluruh hasil di memori
+Python.
+"""
+import tempfile
+
+import numpy as np
+
+from data_model import isin_mask
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow opsional
+    pa = None
+    pq = None
+
+PAGE_SIZES = [25, 50, 100, 250]
+CHUNK_ROWS = 50_000
+FILTER_COLUMNS = ['Tahun', 'Kabupaten_Kota', 'Komoditas']
+
+
+def filter_mask(df, filters):
+    """Mask boolean untuk ``filters`` (kolom -> daftar nilai; daftar kosong = semua)."""
+    mask = np.ones(len(df), dtype=bool)
+    for col, values in (filters or {}).items():
+        if not values or col not in df.columns:
+            continue
+        mask &= isin_mask(df[col], values)
+    return mask
+
+
+def sort_order(df, sort_by=None, ascending=True):
+    """Posisi baris terurut menurut ``sort_by`` (stabil); urutan asli bila None."""
+    if sort_by is None or sort_by not in df.columns:
+        return np.arange(len(df))
+    column = df[sort_by].reset_index(drop=True)
+    return column.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+
+
+def selected_rows(df, filters=None, sort_by=None, ascending=True, order=None):
+    """Posisi baris hasil filter dalam urutan tampilan.
+
+    ``order`` dapat diisi urutan yang sudah di-cache (hasil ``sort_order``)
+    agar pengurutan tidak diulang pada setiap pergantian halaman.
+    """
+    if order is None:
+        order = sort_order(df, sort_by, ascending)
+    mask = filter_mask(df, filters)
+    return order[mask[order]]
+
+
+def page_count(total_rows, page_size):
+    return max(1, -(-total_rows // page_size))
+
+
+def iter_chunks(df, rows, chunk_rows=CHUNK_ROWS):
+    for start in range(0, len(rows), chunk_rows):
+        yield df.iloc[rows[start:start + chunk_rows]]
+
+
+def iter_csv(df, rows, chunk_rows=CHUNK_ROWS):
+    """CSV (bytes) per potongan baris; potongan pertama menyertakan header."""
+    yield df.iloc[:0].to_csv(index=False).encode('utf-8')
+    for chunk in iter_chunks(df, rows, chunk_rows):
+        yield chunk.to_csv(index=False, header=False).encode('utf-8')
+
+
+def write_parquet(df, rows, sink, chunk_rows=CHUNK_ROWS):
+    """Menulis baris terpilih ke ``sink`` sebagai Parquet, satu row group per potongan."""
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in iter_chunks(df, rows, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def spool_export(df, rows, fmt='csv', chunk_rows=CHUNK_ROWS):
+    """File sementara (posisi di awal) berisi ekspor tampilan terfilter."""
+    spool = tempfile.TemporaryFile()
+    if fmt == 'parquet':
+        write_parquet(df, rows, spool, chunk_rows)
+    else:
+        for block in iter_csv(df, rows, chunk_rows):
+            spool.write(block)
+    spool.seek(0)
+    return spool
@@ -0,0 +1,162 @@
+"""Dimensi wilayah kanonik: kode stabil, normalisasi nama, dan daftar baris sampah.
+
+``regions.csv`` memetakan setiap wilayah ke kode wilayah BPS (``Kode_Wilayah``)
+beserta jenisnya (kabupaten, kota, atau ``provinsi`` untuk baris total
+provinsi) dan apakah wilayah tersebut ikut klastering. Tabel ini dipakai
+bersama oleh ``ingest.py`` (validasi saat tahun baru masuk, baris untuk
+klastering) dan dashboard (baris yang dihitung sebagai wilayah), sehingga
+keduanya tidak lagi memakai daftar yang berbeda.
+
+Bila ``regions.csv`` tidak ada (mis. data sintetis), tabel diturunkan dari
+nama wilayah di data dengan kode berurutan.
+"""
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REGIONS_FILE = 'regions.csv'
+ID_COLUMN = 'Kode_Wilayah'
+NAME_COLUMN = 'Kabupaten_Kota'
+COLUMNS = [ID_COLUMN, NAME_COLUMN, 'Jenis', 'Klaster']
+KINDS = ['provinsi', 'kabupaten', 'kota']
+PROVINCE_KIND = 'provinsi'
+PROVINCE_TOTAL = 'Jawa Barat'
+ID_DTYPE = np.int16
+UNKNOWN_ID = -1
+
+# Baris non-wilayah di tabel BPS (dicocokkan tanpa memperhatikan huruf besar/kecil)
+JUNK_VALUES = ['0', 'Angka sementara', 'Angka tetap', 'Catatan']
+_JUNK_KEYS = {value.casefold() for value in JUNK_VALUES} | {'', 'nan'}
+_KABUPATEN_PREFIX = re.compile(r'^(kabupaten|kab\.?)\s+', re.IGNORECASE)
+
+
+def normalize_name(name):
+    """Nama wilayah kanonik: spasi dirapikan, awalan "Kabupaten"/"Kab." dibuang."""
+    text = ' '.join(str(name).split())
+    text = _KABUPATEN_PREFIX.sub('', text)
+    if text[:5].casefold() == 'kota ':
+        text = 'Kota ' + text[5:]
+    return text
+
+
+def name_key(name):
+    return normalize_name(name).casefold()
+
+
+def is_junk(name):
+    """True untuk baris catatan kaki, baris kosong, dan ``0`` (hasil fillna)."""
+    if name is None or (isinstance(name, float) and np.isnan(name)):
+        return True
+    return name_key(name) in _JUNK_KEYS
+
+
+def _kind_of(name):
+    if name_key(name) == PROVINCE_TOTAL.casefold():
+        return PROVINCE_KIND
+    return 'kota' if name.startswith('Kota ') else 'kabupaten'
+
+
+def derive_region_table(names):
+    """Tabel wilayah dari daftar nama (tanpa ``regions.csv``); kode berurutan menurut nama."""
+    canonical = sorted({normalize_name(name) for name in names if not is_junk(name)})
+    return validate_region_table(pd.DataFrame({
+        ID_COLUMN: np.arange(1, len(canonical) + 1),
+        NAME_COLUMN: canonical,
+        'Jenis': [_kind_of(name) for name in canonical],
+        'Klaster': 1,
+    }))
+
+
+def validate_region_table(table):
+    """Memeriksa kode/nama unik dan jenis yang dikenal; mengembalikan tabel bertipe rapi."""
+    missing = set(COLUMNS) - set(table.columns)
+    if missing:
+        raise ValueError(f"Kolom {REGIONS_FILE} tidak lengkap: {sorted(missing)}")
+    table = table[COLUMNS].copy()
+    table[NAME_COLUMN] = table[NAME_COLUMN].map(normalize_name)
+    duplicated_ids = table[ID_COLUMN][table[ID_COLUMN].duplicated()].tolist()
+    keys = table[NAME_COLUMN].str.casefold()
+    duplicated_names = table[NAME_COLUMN][keys.duplicated()].tolist()
+    unknown_kinds = sorted(set(table['Jenis']) - set(KINDS))
+    if duplicated_ids or duplicated_names or unknown_kinds:
+        raise ValueError(
+            f"{REGIONS_FILE} tidak valid: kode ganda {duplicated_ids}, "
+            f"nama ganda {duplicated_names}, jenis tidak dikenal {unknown_kinds}"
+        )
+    table[ID_COLUMN] = table[ID_COLUMN].astype(ID_DTYPE)
+    table['Klaster'] = table['Klaster'].astype(bool)
+    return table.sort_values(ID_COLUMN, ignore_index=True)
+
+
+def read_region_table(base_dir):
+    """Isi ``regions.csv`` yang sudah divalidasi, atau None bila file tidak ada."""
+    path = Path(base_dir) / REGIONS_FILE
+    if not path.exists():
+        return None
+    return validate_region_table(pd.read_csv(path))
+
+
+def load_region_table(base_dir, names=()):
+    """``regions.csv`` bila ada, selain itu tabel turunan dari ``names``."""
+    table = read_region_table(base_dir)
+    return table if table is not None else derive_region_table(names)
+
+
+class RegionIndex:
+    """Lookup nama <-> kode wilayah; nama dicocokkan setelah normalisasi."""
+
+    def __init__(self, table):
+        self.table = table
+        self._by_key = {name.casefold(): int(code) for code, name in zip(table[ID_COLUMN], table[NAME_COLUMN])}
+        self._names = dict(zip(table[ID_COLUMN].astype(int), table[NAME_COLUMN]))
+
+    def lookup(self, name):
+        """Kode wilayah untuk ``name``, atau None untuk baris sampah/nama tak dikenal."""
+        if is_junk(name):
+            return None
+        return self._by_key.get(name_key(name))
+
+    def __contains__(self, code):
+        """True bila ``code`` ada di tabel wilayah (termasuk baris total provinsi)."""
+        return int(code) in self._names
+
+    def name(self, code):
+        return self._names[int(code)]
+
+    def codes(self, values):
+        """Array kode untuk kolom nama (``UNKNOWN_ID`` untuk sampah/nama tak dikenal).
+
+        Untuk kolom kategori, lookup hanya dilakukan sekali per kategori lalu
+        disebar lewat kode integernya.
+        """
+        values = pd.Series(values)
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(str).astype('category')
+        per_category = [self.lookup(name) for name in values.cat.categories]
+        # Elemen terakhir untuk kode -1 (nilai kosong)
+        lookup = np.array([UNKNOWN_ID if code is None else code for code in per_category] + [UNKNOWN_ID], dtype=ID_DTYPE)
+        return lookup[values.cat.codes.to_numpy()]
+
+    def unknown_names(self, values):
+        """Nama non-sampah yang tidak ada di tabel wilayah."""
+        return sorted({str(name) for name in pd.unique(pd.Series(values)) if not is_junk(name) and self.lookup(name) is None})
+
+    def _select(self, mask):
+        return self.table.loc[mask, ID_COLUMN].astype(int).tolist()
+
+    @property
+    def region_codes(self):
+        """Kode kabupaten/kota (tanpa baris total provinsi)."""
+        return self._select(self.table['Jenis'] != PROVINCE_KIND)
+
+    @property
+    def cluster_codes(self):
+        """Kode wilayah yang ikut klastering."""
+        return self._select(self.table['Klaster'])
+
+    def names_for(self, codes):
+        """Kolom kategori berisi nama kanonik untuk array kode yang semuanya dikenal."""
+        uniques, inverse = np.unique(codes, return_inverse=True)
+        return pd.Categorical.from_codes(inverse, categories=[self._names[int(code)] for code in uniques])
@@ -0,0 +1,33 @@
+import shutil
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# Modul dashboard berada di root repositori (bukan paket)
+sys.path.insert(0, str(ROOT))
+
+SOURCE_PATTERNS = ['dataset_final.csv', 'dataset_*.csv', 'cluster_*.csv', 'produksibio_*.csv',
+                   'biofarmaka_*.csv', 'regions.csv']
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """Salinan CSV sumber repositori di folder sementara."""
+    target = tmp_path / 'data'
+    target.mkdir()
+    for pattern in SOURCE_PATTERNS:
+        for path in ROOT.glob(pattern):
+            shutil.copy(path, target / path.name)
+    return target
+
+
+def drop_year(data_dir, year):
+    """Menghapus satu tahun dari dataset_final.csv dan file per tahunnya (seolah belum di-ingest)."""
+    path = data_dir / 'dataset_final.csv'
+    df = pd.read_csv(path)
+    df[df['Tahun'] != year].to_csv(path, index=False, lineterminator='\r\n')
+    (data_dir / f"dataset_{year}.csv").unlink()
+    (data_dir / f"cluster_{year}.csv").unlink()
@@ -0,0 +1,88 @@
+import io
+import os
+import threading
+import urllib.request
+from urllib.error import HTTPError
+
+import pyarrow as pa
+import pytest
+
+import clustering
+from api import DataService, make_server
+
+
+@pytest.fixture
+def model_dir(data_dir):
+    model_dir = data_dir / 'models'
+    clustering.save_models(clustering.fit_all(clustering.load_yearly_datasets(data_dir), n_jobs=1), model_dir)
+    return model_dir
+
+
+@pytest.fixture
+def server(data_dir, model_dir):
+    service = DataService(data_dir, data_dir / '.cache' / 'snapshot', model_dir, check_interval=0.0)
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, headers=None):
+    """(status, header, body) untuk GET ``path``; status non-2xx tidak dilempar."""
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}{path}", headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_etag_answers_not_modified(server):
+    status, headers, body = get(server, '/v1/years/2024/summary')
+    assert status == 200 and body
+    etag = headers['ETag']
+
+    status, headers, body = get(server, '/v1/years/2024/summary', {'If-None-Match': etag})
+    assert status == 304 and body == b''
+    assert headers['ETag'] == etag
+
+    # Representasi Arrow punya ETag sendiri
+    status, headers, _ = get(server, '/v1/years/2024/summary?format=arrow', {'If-None-Match': etag})
+    assert status == 200 and headers['ETag'] != etag
+
+
+def test_cluster_etag_changes_when_models_change(server, model_dir):
+    path = '/v1/regions/Garut/clusters?k=4'
+    _, headers, _ = get(server, path)
+    cluster_etag = headers['ETag']
+    _, headers, _ = get(server, '/v1/years/2024/summary')
+    summary_etag = headers['ETag']
+
+    # Model difit ulang tanpa perubahan CSV
+    for path_model in model_dir.iterdir():
+        stat = path_model.stat()
+        os.utime(path_model, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    status, headers, _ = get(server, path, {'If-None-Match': cluster_etag})
+    assert status == 200 and headers['ETag'] != cluster_etag
+    status, _, _ = get(server, '/v1/years/2024/summary', {'If-None-Match': summary_etag})
+    assert status == 304
+
+
+def test_arrow_output_matches_json(server):
+    status, headers, body = get(server, '/v1/years/2024/commodities', {'Accept': 'application/vnd.apache.arrow.stream'})
+    assert status == 200
+    assert headers['Content-Type'] == 'application/vnd.apache.arrow.stream'
+    table = pa.ipc.open_stream(io.BytesIO(body)).read_all()
+
+    expected = server.service.commodity_summary(2024)
+    assert table.column_names == list(expected.columns)
+    assert table.to_pandas().equals(expected)
+    assert table.schema.metadata[b'data_version'].decode() == server.service.version
+
+
+def test_unknown_region_is_not_found(server):
+    status, _, body = get(server, '/v1/regions/Atlantis/clusters')
+    assert status == 404 and b'Atlantis' in body
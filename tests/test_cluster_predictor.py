@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+import clustering
+from cluster_predictor import ClusterPredictor, kmeans_numpy, nearest_centroid
+from conftest import ROOT
+
+
+def test_nearest_centroid_matches_sklearn_predict():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4)) * [1, 10, 100, 1000]
+    for k in (1, 3, 7):
+        km = KMeans(n_clusters=k, n_init=1, random_state=0).fit(X)
+        queries = rng.normal(size=(200, 4)) * [1, 10, 100, 1000]
+        np.testing.assert_array_equal(nearest_centroid(queries, km.cluster_centers_), km.predict(queries))
+
+
+def test_predictor_assign_matches_sklearn_predict():
+    rng = np.random.default_rng(1)
+    X = np.abs(rng.normal(size=(40, 2))) * [1e6, 1e5]
+    scaler = StandardScaler().fit(X)
+    km = KMeans(n_clusters=3, n_init=1, random_state=0).fit(scaler.transform(X))
+    models = {2024: {'scaler': scaler, 'models': {3: {'centroids_scaled': km.cluster_centers_}}}}
+    np.testing.assert_array_equal(ClusterPredictor(models).assign(2024, X, 3), km.predict(scaler.transform(X)))
+
+
+def test_predictor_reproduces_fitted_labels():
+    models = clustering.fit_all(clustering.load_yearly_datasets(ROOT), n_jobs=1)
+    predictor = ClusterPredictor(models)
+    for year, model in models.items():
+        X = clustering.load_yearly_datasets(ROOT)[year][clustering.FEATURES].to_numpy(dtype=float)
+        for k, result in model['models'].items():
+            np.testing.assert_array_equal(predictor.assign(year, X, k), result['labels'])
+
+
+def test_kmeans_numpy_rejects_k_above_rows():
+    with pytest.raises(ValueError):
+        kmeans_numpy(np.zeros((2, 3)), 3)
+
+
+def test_kmeans_numpy_orders_labels_by_score():
+    X = np.array([[0.0], [0.1], [5.0], [5.1], [10.0], [10.1]])
+    labels, centroids = kmeans_numpy(X, 3)
+    np.testing.assert_array_equal(labels, [0, 0, 1, 1, 2, 2])
+    assert np.all(np.diff(centroids[:, 0]) > 0)
@@ -0,0 +1,81 @@
+import os
+import shutil
+
+import pytest
+
+import data_store
+from data_store import (KEEP_SNAPSHOTS, SnapshotUnavailable, active_version, load_snapshot, load_version,
+                        publish_version, published_version, read_snapshot)
+
+
+def _change_sources(data_dir):
+    """Mengubah isi CSV (baris kosong tambahan) sehingga versi data berganti."""
+    with open(data_dir / 'dataset_final.csv', 'a') as f:
+        f.write('\n')
+
+
+def _age(path, seconds):
+    stat = path.stat()
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+def _snapshot_dirs(cache_dir):
+    return sorted(p.name for p in cache_dir.iterdir() if p.is_dir() and not p.name.startswith('.'))
+
+
+@pytest.fixture
+def cache_dir(data_dir):
+    return data_dir / '.cache' / 'snapshot'
+
+
+def test_snapshot_round_trip(data_dir, cache_dir):
+    data, version = load_snapshot(data_dir, cache_dir)
+    assert (cache_dir / version / data_store.MANIFEST_NAME).exists()
+    snapshot = read_snapshot(version, cache_dir)
+    assert sorted(snapshot) == sorted(data)
+    assert snapshot['dataset_final'].equals(data['dataset_final'])
+    # Versi hanya bergantung pada isi CSV
+    assert load_snapshot(data_dir, cache_dir)[1] == version
+
+
+def test_published_version_stays_active_until_republished(data_dir, cache_dir):
+    _, first = load_snapshot(data_dir, cache_dir)
+    publish_version(first, cache_dir)
+    _change_sources(data_dir)
+    _, second = load_snapshot(data_dir, cache_dir)
+
+    assert second != first
+    assert published_version(cache_dir) == first
+    assert active_version(data_dir, cache_dir) == first
+    publish_version(second, cache_dir)
+    assert active_version(data_dir, cache_dir) == second
+
+    with pytest.raises(FileNotFoundError):
+        publish_version('tidak-ada', cache_dir)
+
+
+def test_prune_keeps_recent_and_published_snapshots(data_dir, cache_dir):
+    _, published = load_snapshot(data_dir, cache_dir)
+    publish_version(published, cache_dir)
+    versions = [published]
+    for _ in range(KEEP_SNAPSHOTS + 2):
+        for path in cache_dir.iterdir():
+            _age(path, 10)
+        _change_sources(data_dir)
+        versions.append(load_snapshot(data_dir, cache_dir)[1])
+
+    # Versi terbitan (paling lama) tetap ada, ditambah KEEP_SNAPSHOTS - 1 versi terbaru
+    assert _snapshot_dirs(cache_dir) == sorted([published] + versions[-(KEEP_SNAPSHOTS - 1):])
+
+
+def test_load_version_raises_for_missing_snapshot(data_dir, cache_dir):
+    _, old = load_snapshot(data_dir, cache_dir)
+    _change_sources(data_dir)
+    _, current = load_snapshot(data_dir, cache_dir)
+    shutil.rmtree(cache_dir / old)
+
+    with pytest.raises(SnapshotUnavailable) as excinfo:
+        load_version(old, data_dir, cache_dir)
+    assert excinfo.value.version == old and excinfo.value.loaded == current
+    # Versi CSV saat ini dibangun ulang bila snapshot-nya hilang
+    assert load_version(current, data_dir, cache_dir)['dataset_final'] is not None
@@ -0,0 +1,46 @@
+import pandas as pd
+
+from fact_table import COMPARE_COLUMNS, AggregateCube, build_cube
+from regions import ID_COLUMN
+
+
+def _fact(rows):
+    """Tabel fakta kecil: (Tahun, kode, nama, komoditas, produksi, luas)."""
+    fact = pd.DataFrame(rows, columns=['Tahun', ID_COLUMN, 'Kabupaten_Kota', 'Komoditas', 'Produksi_Kg', 'Luas_Panen'])
+    fact['Efisiensi_Kg_per_M2'] = fact['Produksi_Kg'] / fact['Luas_Panen']
+    for col in ['Kabupaten_Kota', 'Komoditas']:
+        fact[col] = fact[col].astype('category')
+    return fact
+
+
+def test_commodity_summary_single_commodity_is_a_frame():
+    # Indeks (Tahun, kode) unik: .loc dengan kunci lengkap memberi Series, bukan DataFrame
+    cube = AggregateCube(build_cube(_fact([
+        (2023, 3201, 'Bogor', 'Jahe', 50.0, 10.0),
+        (2024, 3201, 'Bogor', 'Jahe', 100.0, 10.0),
+    ])))
+
+    summary = cube.commodity_summary(2024, 3201)
+    assert isinstance(summary, pd.DataFrame)
+    assert list(summary.columns) == COMPARE_COLUMNS
+    assert summary['Komoditas'].tolist() == ['Jahe']
+    assert summary['Total_Produksi_Kg'].tolist() == [100.0]
+
+
+def test_commodity_summary_single_commodity_region_is_a_frame():
+    cube = AggregateCube(build_cube(_fact([
+        (2024, 3201, 'Bogor', 'Jahe', 100.0, 10.0),
+        (2024, 3202, 'Sukabumi', 'Jahe', 200.0, 20.0),
+        (2024, 3202, 'Sukabumi', 'Kunyit', 300.0, 30.0),
+    ])))
+
+    single = cube.commodity_summary(2024, 3201)
+    assert isinstance(single, pd.DataFrame)
+    assert list(single.columns) == COMPARE_COLUMNS
+    assert single['Komoditas'].tolist() == ['Jahe']
+    assert single['Total_Produksi_Kg'].tolist() == [100.0]
+    assert single['Rata_rata_Efisiensi'].tolist() == [10.0]
+
+    assert cube.commodity_summary(2024, 3202)['Komoditas'].tolist() == ['Jahe', 'Kunyit']
+    assert cube.commodity_summary(2024, 3299).empty
+    assert cube.commodity_summary(2023, 3201).empty
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import plotly.graph_objects as go
+import pytest
+
+from figures import FigureCache, figure_key
+
+
+class FakeFigure:
+    def __init__(self, name):
+        self.name = name
+
+    def to_json(self):
+        return f'{{"name": "{self.name}"}}'
+
+
+def test_figure_key_normalizes_filters():
+    assert figure_key('trend', 'v1', 'plotly', regions=['Bogor', 'Garut'], komoditas='Jahe') == \
+        figure_key('trend', 'v1', 'plotly', komoditas='Jahe', regions=('Bogor', 'Garut'))
+    assert figure_key('trend', 'v1', 'plotly', komoditas='Jahe') != figure_key('trend', 'v2', 'plotly', komoditas='Jahe')
+
+
+def test_lru_evicts_least_recently_used():
+    cache = FigureCache(maxsize=2)
+    key_a, key_b, key_c = (figure_key('bar', 'v1', 'plotly', n=n) for n in range(3))
+    cache.get_json(key_a, lambda: FakeFigure('a'))
+    cache.get_json(key_b, lambda: FakeFigure('b'))
+    # a dipakai lagi, sehingga b menjadi entri terlama
+    assert cache.get_json(key_a, pytest.fail) == '{"name": "a"}'
+    cache.get_json(key_c, lambda: FakeFigure('c'))
+
+    assert cache.contains(key_a) and cache.contains(key_c)
+    assert not cache.contains(key_b)
+    assert cache.stats() == {'hits': 1, 'misses': 3, 'size': 2, 'maxsize': 2}
+
+
+def test_concurrent_requests_build_once():
+    cache = FigureCache()
+    key = figure_key('bar', 'v1', 'plotly')
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def build():
+        calls.append(threading.current_thread().name)
+        started.set()
+        release.wait(5)
+        return FakeFigure('shared')
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_json(key, build))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    # Beri waktu thread lain sampai menunggu figur yang sedang dibangun
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == ['{"name": "shared"}'] * 4
+    assert cache.stats()['misses'] == 1 and cache.stats()['hits'] == 3
+
+
+def test_failed_build_is_retried():
+    cache = FigureCache()
+    key = figure_key('bar', 'v1', 'plotly')
+
+    def broken():
+        raise RuntimeError('gagal')
+
+    with pytest.raises(RuntimeError):
+        cache.get_json(key, broken)
+    assert not cache.contains(key)
+    assert cache.get_json(key, lambda: FakeFigure('ok')) == '{"name": "ok"}'
+
+
+def test_get_figure_round_trips_plotly():
+    cache = FigureCache()
+    fig = cache.get_figure(figure_key('bar', 'v1', 'plotly'), lambda: go.Figure(go.Bar(x=[1, 2], y=[3, 4])))
+    assert list(fig.data[0].y) == [3, 4]
@@ -0,0 +1,160 @@
+import json
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import geo
+from conftest import ROOT
+from geo import (DETAIL_LEVELS, GEOBOUNDARIES_API, RegionGeometry, feature_code, geojson_path, select_regions,
+                 source_path)
+from regions import RegionIndex, read_region_table
+
+
+@pytest.fixture(scope='module')
+def region_index():
+    return RegionIndex(read_region_table(ROOT))
+
+
+@pytest.mark.parametrize('properties, expected', [
+    ({'Kode_Wilayah': 3201}, 3201),
+    ({'ADM2_PCODE': 'ID3205'}, 3205),
+    ({'KDPKAB': '32.73'}, 3273),
+    ({'shapeName': 'Kabupaten Garut'}, 3205),
+    ({'ADM2_PCODE': 'ID9999', 'WADMKK': 'Kota Bandung'}, 3273),
+    ({'shapeName': 'Atlantis'}, None),
+])
+def test_feature_code(region_index, properties, expected):
+    assert feature_code({'type': 'Feature', 'properties': properties}, region_index) == expected
+
+
+# Grid uji 2x2 di sekitar Bogor (derajat)
+X0, Y0, CELL = 107.0, -7.0, 0.1
+
+
+def _noisy_edge(start, end, rng, n=40, amplitude=0.004):
+    """Titik di antara ``start`` dan ``end`` (tanpa ujung), bergeser tegak lurus kecuali di tepi luar grid."""
+    start, end = np.asarray(start), np.asarray(end)
+    t = np.linspace(0, 1, n + 2)[1:-1, None]
+    points = start + t * (end - start)
+    on_border = (start[0] == end[0] and start[0] in (X0, X0 + 2 * CELL)) or \
+                (start[1] == end[1] and start[1] in (Y0, Y0 + 2 * CELL))
+    if not on_border:
+        normal = np.array([-(end - start)[1], (end - start)[0]]) / np.hypot(*(end - start))
+        points = points + rng.uniform(-amplitude, amplitude, (n, 1)) * normal
+    return [tuple(point) for point in points]
+
+
+def _tessellation():
+    """Grid 2x2 berbatas bergerigi (tepi bersama identik di kedua sel) ditambah satu enklave."""
+    rng = np.random.default_rng(0)
+    node = lambda i, j: (round(X0 + i * CELL, 4), round(Y0 + j * CELL, 4))
+    edges = {}
+
+    def edge(a, b):
+        if (b, a) in edges:
+            return edges[(b, a)][::-1]
+        return edges.setdefault((a, b), _noisy_edge(a, b, rng))
+
+    def cell(i, j):
+        corners = [node(i, j), node(i + 1, j), node(i + 1, j + 1), node(i, j + 1)]
+        ring = []
+        for a, b in zip(corners, corners[1:] + corners[:1]):
+            ring += [a] + edge(a, b)
+        return ring + [corners[0]]
+
+    angles = np.linspace(0, 2 * np.pi, 60, endpoint=False)
+    radius = 0.02 + rng.uniform(-0.003, 0.003, len(angles))
+    enclave = [(X0 + 0.05 + r * np.cos(a), Y0 + 0.05 + r * np.sin(a)) for a, r in zip(angles, radius)]
+    enclave.append(enclave[0])
+
+    polygon = lambda *rings: {'type': 'Polygon', 'coordinates': [[list(point) for point in ring] for ring in rings]}
+    return [
+        ('Bogor', polygon(cell(0, 0), enclave[::-1])),
+        ('Sukabumi', polygon(cell(1, 0))),
+        ('Cianjur', polygon(cell(0, 1))),
+        ('Garut', polygon(cell(1, 1))),
+        ('Kota Bogor', polygon(enclave)),
+    ]
+
+
+def _on_outer_border(a, b):
+    return any(a[axis] == b[axis] == value
+               for axis, values in ((0, (X0, X0 + 2 * CELL)), (1, (Y0, Y0 + 2 * CELL))) for value in values)
+
+
+@pytest.mark.parametrize('level', list(DETAIL_LEVELS))
+def test_neighbours_share_simplified_edges(tmp_path, level):
+    source = tmp_path / 'wilayah.geojson'
+    source.write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'shapeName': name}, 'geometry': geometry} for name, geometry in _tessellation()
+    ]}))
+    geometry = RegionGeometry(source, read_region_table(ROOT), cache_dir=tmp_path / 'cache')
+    collection = geometry.geojson(level)
+    assert len(collection['features']) == 5 and not geometry.unmatched
+
+    segments = Counter()
+    for feature in collection['features']:
+        for ring in feature['geometry']['coordinates']:
+            segments.update((tuple(a), tuple(b)) for a, b in zip(ring, ring[1:]))
+    for (a, b), count in segments.items():
+        assert count == 1, (a, b)
+        if (b, a) not in segments:
+            # Segmen tanpa pasangan terbalik hanya boleh ada di tepi luar grid
+            assert _on_outer_border(a, b), (level, a, b)
+    # Penyederhanaan benar-benar membuang titik
+    assert sum(segments.values()) < sum(len(ring) for _, g in _tessellation() for ring in g['coordinates'])
+
+
+def _national_collection():
+    """Semua kabupaten/kota regions.csv sebagai kotak di dalam Jawa Barat, ditambah nama kembar di luar."""
+    table = read_region_table(ROOT)
+    names = table.loc[table['Jenis'] != 'provinsi', 'Kabupaten_Kota'].tolist()
+    square = lambda x, y: {'type': 'Polygon', 'coordinates': [[[x, y], [x + .1, y], [x + .1, y + .1], [x, y + .1], [x, y]]]}
+    features = [
+        {'type': 'Feature', 'properties': {'shapeName': name if name.startswith('Kota') else f'Kabupaten {name}'},
+         'geometry': square(106.5 + (i % 6) * 0.1, -7.5 + (i // 6) * 0.1)}
+        for i, name in enumerate(names)
+    ]
+    features.append({'type': 'Feature', 'properties': {'shapeName': 'Bandung'}, 'geometry': square(120.0, -3.0)})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def test_select_regions_requires_every_region():
+    collection = _national_collection()
+    selected = select_regions(collection, read_region_table(ROOT))
+    assert list(selected) == RegionIndex(read_region_table(ROOT)).region_codes
+    # Nama kembar di luar Jawa Barat diabaikan
+    assert selected[3204]['coordinates'][0][0][0] < 109
+
+    collection['features'] = [f for f in collection['features'] if f['properties']['shapeName'] != 'Kabupaten Garut']
+    with pytest.raises(ValueError, match='Garut'):
+        select_regions(collection, read_region_table(ROOT))
+
+
+def test_fetch_writes_geojson_and_source(data_dir, tmp_path, monkeypatch):
+    downloads = {
+        GEOBOUNDARIES_API: {'simplifiedGeometryGeoJSON': 'https://example.test/idn-adm2.geojson',
+                            'gjDownloadURL': 'https://example.test/full.geojson', 'boundaryLicense': 'CC BY 4.0'},
+        'https://example.test/idn-adm2.geojson': _national_collection(),
+    }
+    monkeypatch.setattr(geo, '_get_json', downloads.__getitem__)
+    path = geo.fetch_geoboundaries(data_dir)
+    assert path == geojson_path(data_dir)
+    assert 'CC BY 4.0' in source_path(data_dir).read_text()
+
+    geometry = RegionGeometry.load(read_region_table(data_dir), data_dir, cache_dir=tmp_path / 'cache')
+    geometry.geojson()
+    assert sorted(geometry.codes) == RegionIndex(read_region_table(data_dir)).region_codes
+    assert not geometry.unmatched
+
+
+@pytest.mark.skipif(not geojson_path(ROOT).exists(), reason='geo/jawa_barat_kabkota.geojson belum dibuat (python geo.py --fetch)')
+def test_bundled_geojson_covers_every_region(tmp_path):
+    region_table = read_region_table(ROOT)
+    geometry = RegionGeometry.load(region_table, ROOT, cache_dir=tmp_path)
+    for level in DETAIL_LEVELS:
+        assert len(geometry.geojson(level)['features']) == len(geometry.codes)
+    assert sorted(geometry.codes) == RegionIndex(region_table).region_codes
+    assert not geometry.unmatched
+    assert 'CC BY 4.0' in source_path(ROOT).read_text()
@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+import data_store
+import ingest
+from conftest import drop_year
+from fact_table import build_cube, build_fact_table
+
+
+def _sorted(df, keys):
+    return df.sort_values(keys).reset_index(drop=True)
+
+
+@pytest.fixture
+def prepared(data_dir, tmp_path):
+    """Data 2022-2023 dengan snapshot dan turunannya; 2024 belum di-ingest."""
+    drop_year(data_dir, 2024)
+    cache_dir = tmp_path / 'cache'
+    data, version = data_store.load_snapshot(data_dir, cache_dir)
+    fact = data_store.load_derived(version, 'fact', lambda: build_fact_table(data['dataset_final'], data['regions']), cache_dir)
+    data_store.load_derived(version, 'cube', lambda: build_cube(fact), cache_dir)
+    return data_dir, cache_dir, tmp_path / 'models'
+
+
+def _ingest(data_dir, cache_dir, model_dir):
+    return ingest.main(['--data-dir', str(data_dir), '--cache-dir', str(cache_dir),
+                        '--model-dir', str(model_dir), '--jobs', '1'])
+
+
+def test_incremental_ingest_matches_full_rebuild(prepared, tmp_path):
+    data_dir, cache_dir, model_dir = prepared
+    assert ingest.existing_years(data_dir) == {2022, 2023}
+    assert _ingest(data_dir, cache_dir, model_dir) == 0
+    assert ingest.existing_years(data_dir) == {2022, 2023, 2024}
+
+    # Versi snapshot inkremental = versi hasil hash CSV yang baru ditulis
+    version = data_store.current_data_version(data_dir, cache_dir)
+    incremental = data_store.read_snapshot(version, cache_dir)
+    assert incremental is not None
+    full = data_store.read_sources(data_dir)
+    assert set(incremental) == set(full)
+    for name in full:
+        pd.testing.assert_frame_equal(incremental[name], full[name])
+
+    fact_full = build_fact_table(full['dataset_final'], full['regions'])
+    keys = ['Tahun', 'Kabupaten_Kota', 'Komoditas']
+    pd.testing.assert_frame_equal(
+        _sorted(data_store.read_derived(version, 'fact', cache_dir), keys), _sorted(fact_full, keys))
+    pd.testing.assert_frame_equal(
+        _sorted(data_store.read_derived(version, 'cube', cache_dir), keys), _sorted(build_cube(fact_full), keys))
+
+
+def test_failed_year_leaves_files_untouched(prepared):
+    data_dir, cache_dir, model_dir = prepared
+    # Tahun 2025 berisi wilayah yang tidak dikenal regions.csv -> ValueError setelah 2024 diproses
+    produksi = pd.read_csv(data_dir / 'produksibio_24.csv')
+    produksi.loc[0, 'Kabupaten/Kota'] = 'Wilayah Fiktif'
+    produksi.to_csv(data_dir / 'produksibio_25.csv', index=False)
+    luas = pd.read_csv(data_dir / 'biofarmaka_2024.csv')
+    luas.loc[0, 'Kabupaten/Kota'] = 'Wilayah Fiktif'
+    luas.to_csv(data_dir / 'biofarmaka_2025.csv', index=False)
+
+    before = {path.name: path.read_bytes() for path in data_dir.iterdir()}
+    snapshots = sorted(path.name for path in cache_dir.iterdir())
+    assert _ingest(data_dir, cache_dir, model_dir) == 1
+    assert {path.name: path.read_bytes() for path in data_dir.iterdir()} == before
+    assert sorted(path.name for path in cache_dir.iterdir()) == snapshots
+    assert not model_dir.exists() or not any(model_dir.iterdir())
+
+
+def test_read_bps_csv_handles_bps_quirks(tmp_path):
+    from benchmarks.bench_ingest import merge_year_regex
+    from benchmarks.synthetic import write_synthetic_bps_year
+
+    write_synthetic_bps_year(tmp_path, 2025, n_regions=50, n_komoditas=6)
+    raw = (tmp_path / 'produksibio_25.csv').read_text()
+    assert '"' in raw and '...' in raw and 'Angka sementara' in raw
+
+    (produksi_path, luas_path), = ingest.discover_year_pairs(tmp_path).values()
+    merged = ingest.merge_year(produksi_path, luas_path, 2025)
+    # Sama dengan pembersihan regex notebook; semua kolom angka benar-benar numerik
+    pd.testing.assert_frame_equal(merged, merge_year_regex(produksi_path, luas_path, 2025), check_dtype=False)
+    value_cols = [col for col in merged.columns if col not in ingest.ID_COLUMNS]
+    assert all(pd.api.types.is_numeric_dtype(merged[col]) for col in value_cols)
+    assert merged[value_cols].to_numpy().max() >= 1000
@@ -0,0 +1,45 @@
+import logging
+import time
+
+import perf
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_prometheus_export_runs_without_panel(tmp_path):
+    path = tmp_path / 'biofarmaka.prom'
+    recorder = perf.PerfRecorder(enabled=True, parent=perf.PROCESS, session='test')
+    with recorder.stage('load'):
+        pass
+    thread = perf.start_prometheus_export(path, interval=0.01)
+    try:
+        assert perf.start_prometheus_export(path, interval=0.01) is thread
+        assert _wait_for(lambda: path.exists() and 'stage="load"' in path.read_text())
+    finally:
+        thread.stop()
+
+
+def test_prometheus_export_logs_write_errors(tmp_path, caplog):
+    with caplog.at_level(logging.WARNING, logger='biofarmaka.perf'):
+        thread = perf.start_prometheus_export(tmp_path / 'tidak-ada' / 'biofarmaka.prom', interval=0.01)
+        try:
+            assert _wait_for(lambda: any('Prometheus' in record.message for record in caplog.records))
+            time.sleep(0.05)
+        finally:
+            thread.stop()
+    # Kegagalan berturut-turut hanya dicatat sekali
+    assert sum('Prometheus' in record.message for record in caplog.records) == 1
+
+
+def test_disabled_recorder_records_nothing():
+    recorder = perf.PerfRecorder(enabled=False)
+    with recorder.stage('load'):
+        pass
+    assert recorder.snapshot()['durations'] == {}
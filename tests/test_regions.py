@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from fact_table import build_fact_table
+from regions import (ID_COLUMN, UNKNOWN_ID, RegionIndex, derive_region_table, is_junk, normalize_name,
+                     read_region_table, validate_region_table)
+
+
+@pytest.fixture(scope='module')
+def index():
+    return RegionIndex(read_region_table(ROOT))
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('Bogor', 'Bogor'),
+    ('  Kabupaten   Bogor ', 'Bogor'),
+    ('Kab. Bogor', 'Bogor'),
+    ('kab Bogor', 'Bogor'),
+    ('KOTA Bandung', 'Kota Bandung'),
+    ('kota  Bandung', 'Kota Bandung'),
+])
+def test_normalize_name(raw, expected):
+    assert normalize_name(raw) == expected
+
+
+def test_lookup_matches_spelling_variants(index):
+    assert index.lookup('Kabupaten Bogor') == index.lookup('BOGOR') == 3201
+    assert index.lookup('kota bandung') == index.lookup('Kota Bandung') is not None
+    assert index.lookup('Bandung') != index.lookup('Kota Bandung')
+
+
+@pytest.mark.parametrize('junk', ['0', 'Angka sementara', 'ANGKA TETAP', ' Catatan ', '', None, np.nan])
+def test_junk_rows_are_rejected(index, junk):
+    assert is_junk(junk)
+    assert index.lookup(junk) is None
+
+
+def test_codes_mark_junk_and_unknown_rows(index):
+    values = pd.Series(['Kab. Garut', 'Angka sementara', None, 'Atlantis', 'Jawa Barat'], dtype='category')
+    codes = index.codes(values)
+    assert codes.tolist() == [index.lookup('Garut'), UNKNOWN_ID, UNKNOWN_ID, UNKNOWN_ID, 32]
+    assert index.unknown_names(values) == ['Atlantis']
+    # Baris total provinsi dikenal tetapi bukan kabupaten/kota
+    assert 32 not in index.region_codes
+
+
+def test_build_fact_table_drops_junk_and_merges_spellings():
+    df_final = pd.DataFrame({
+        'Kabupaten_Kota': ['Kabupaten Bogor', 'Bogor', 'Jawa Barat', 'Angka sementara', '0'],
+        'Tahun': [2023, 2024, 2024, 2024, 2024],
+        'Produksi_Jahe': [10.0, 20.0, 30.0, 0.0, 0.0],
+        'Luas_Panen_Jahe': [1.0, 2.0, 3.0, 0.0, 0.0],
+    })
+    fact = build_fact_table(df_final, read_region_table(ROOT))
+    assert fact[ID_COLUMN].tolist() == [3201, 3201]
+    assert fact['Kabupaten_Kota'].astype(str).tolist() == ['Bogor', 'Bogor']
+    assert fact['Produksi_Kg'].tolist() == [10.0, 20.0]
+
+
+def test_derive_region_table_skips_junk_and_duplicates():
+    table = derive_region_table(['Kab. Garut', 'Garut', 'Kota Bandung', 'Catatan', 'Jawa Barat', np.nan])
+    assert table['Kabupaten_Kota'].tolist() == ['Garut', 'Jawa Barat', 'Kota Bandung']
+    assert table['Jenis'].tolist() == ['kabupaten', 'provinsi', 'kota']
+
+
+def test_validate_region_table_rejects_duplicate_names():
+    table = pd.DataFrame({
+        ID_COLUMN: [3201, 3299], 'Kabupaten_Kota': ['Bogor', 'Kabupaten BOGOR'], 'Jenis': ['kabupaten'] * 2, 'Klaster': 1,
+    })
+    with pytest.raises(ValueError, match='nama ganda'):
+        validate_region_table(table)